@@ -0,0 +1,127 @@
+"""Compare the thread and process execution backends of the controller.
+
+Batches go through ``controller.download_many`` exactly as in the product:
+jobs are scheduled on the controller's executor, shipped to worker processes
+as ``DownloadJob`` tuples in process mode and report progress back through
+the progress queue. Only ``execute_download`` is replaced by a synthetic job
+that parses a large player response, walks every format and sleeps briefly to
+stand in for network I/O. A warm-up batch starts the workers before timing.
+
+The synthetic job reaches worker processes through ``fork``, so this script
+needs the fork start method (the default on Linux before Python 3.14).
+
+Usage::
+
+    python benchmarks/bench_backends.py [--jobs 8 16 32] [--parses 40]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(
+    0, str(Path(__file__).resolve().parent.parent / "src" / "mnlvm_video_downloader")
+)
+
+from controllers import executors, video  # noqa: E402
+from controllers.executors import DownloadOutcome  # noqa: E402
+from utils.constants import EXECUTION_BACKENDS  # noqa: E402
+
+PLAYER_RESPONSE = json.dumps(
+    {
+        "videoDetails": {"videoId": "x" * 11, "title": "Synthetic", "keywords": []},
+        "streamingData": {
+            "adaptiveFormats": [
+                {
+                    "itag": i,
+                    "url": (
+                        f"https://example.invalid/videoplayback?itag={i}"
+                        f"&sig={'s' * 120}"
+                    ),
+                    "mimeType": 'video/mp4; codecs="avc1.640028"',
+                    "bitrate": 1000 * i,
+                    "width": 1920,
+                    "height": 1080,
+                    "contentLength": str(10_000_000 + i),
+                }
+                for i in range(400)
+            ]
+        },
+    }
+)
+
+PARSES = 40
+
+
+def synthetic_execute_download(job, progress_hooks):
+    total = 0
+    for parse in range(PARSES):
+        data = json.loads(PLAYER_RESPONSE)
+        for fmt in data["streamingData"]["adaptiveFormats"]:
+            total += int(fmt["contentLength"]) + len(fmt["url"].split("&"))
+        for hook in progress_hooks:
+            hook(
+                {
+                    "status": "downloading",
+                    "_percent_str": f"{100 * (parse + 1) / PARSES:.1f}%",
+                    "downloaded_bytes": parse + 1,
+                    "total_bytes": PARSES,
+                    "tmpfilename": f"{job.job_id}.part",
+                }
+            )
+    time.sleep(0.05)
+    return DownloadOutcome({"title": f"video-{job.job_id}-{total}"})
+
+
+def urls(count: int, offset: int) -> list:
+    return [f"https://www.youtube.com/watch?v={offset + n:011d}" for n in range(count)]
+
+
+def run(backend: str, jobs: int) -> float:
+    with tempfile.TemporaryDirectory() as output_dir:
+        controller = video.YouTubeDownloaderController(
+            output_dir=output_dir,
+            max_workers=jobs,
+            browser=None,
+            backend=backend,
+            staging=False,
+            metadata_cache=False,
+        )
+        try:
+            asyncio.run(controller.download_many(urls(jobs, 0)))
+            start = time.perf_counter()
+            paths = asyncio.run(controller.download_many(urls(jobs, jobs)))
+            elapsed = time.perf_counter() - start
+        finally:
+            controller.shutdown()
+    assert all(paths), "synthetic downloads failed"
+    return elapsed
+
+
+def main() -> None:
+    global PARSES
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--parses", type=int, default=PARSES)
+    args = parser.parse_args()
+    if multiprocessing.get_start_method() != "fork":
+        sys.exit("This benchmark needs the fork start method.")
+
+    PARSES = args.parses
+    video.execute_download = synthetic_execute_download
+    executors.execute_download = synthetic_execute_download
+
+    print(f"{'jobs':>6} " + " ".join(f"{b:>10}" for b in EXECUTION_BACKENDS))
+    for jobs in args.jobs:
+        timings = [run(backend, jobs) for backend in EXECUTION_BACKENDS]
+        print(f"{jobs:>6} " + " ".join(f"{t:>9.2f}s" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
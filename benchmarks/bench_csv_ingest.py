@@ -0,0 +1,96 @@
+"""Measure CSV track ingestion throughput on a synthetic export.
+
+Writes a listening-history export in the format the app first supported
+(semicolon separated, queries in the "Listen num" column) with ``--rows``
+rows, and times reading every search query from it with the old reader
+(``csv.reader`` plus ``row[0].split(";")``, each query cleaned on its own)
+and with ``CsvTracks.queries()``, which also sniffs the file, respects
+quoting and normalizes queries a batch at a time. Peak traced memory is
+measured in a second, separate pass of each reader.
+
+Usage::
+
+    python benchmarks/bench_csv_ingest.py [--rows 1000000]
+"""
+
+import argparse
+import csv
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(
+    0, str(Path(__file__).resolve().parent.parent / "src" / "mnlvm_video_downloader")
+)
+
+from utils.ingest import CsvTracks  # noqa: E402
+
+SUFFIXES = ("", " (Official Video)", " - Extended Remix", "  (Live)  ", " [HD]")
+
+
+def write_export(path: Path, rows: int) -> None:
+    with open(path, "w", encoding="utf8", newline="") as file:
+        file.write("Date;Listen num;Count\n")
+        for n in range(rows):
+            file.write(
+                f"2024-01-{n % 28 + 1:02d};Artist {n % 5000} - Song {n}"
+                f"{SUFFIXES[n % len(SUFFIXES)]};{n % 7}\n"
+            )
+
+
+def legacy_queries(path: Path) -> list:
+    """The reader and per-query cleaning this benchmark replaces."""
+    results = []
+    with open(path, mode="r", encoding="utf8", errors="ignore") as file:
+        for row in csv.reader(file):
+            new_row = row[0].split(";")
+            if new_row[1] != "Listen num":
+                cleaned = re.sub(r"\([^)]*\)", "", new_row[1])
+                cleaned = re.sub(r" - .*Remix", "", cleaned)
+                results.append(re.sub(r"\s+", " ", cleaned).strip())
+    return results
+
+
+def streamed_queries(path: Path) -> int:
+    return sum(1 for _ in CsvTracks(path).queries())
+
+
+def timed(fn, path: Path) -> float:
+    started = time.perf_counter()
+    fn(path)
+    return time.perf_counter() - started
+
+
+def peak_memory(fn, path: Path) -> int:
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.csv"
+        write_export(path, args.rows)
+        assert legacy_queries(path)[:1000] == list(CsvTracks(path).queries())[:1000]
+        print(f"rows:    {args.rows}  ({path.stat().st_size / 2**20:.1f} MiB)")
+        for name, fn in (("legacy", legacy_queries), ("ingest", streamed_queries)):
+            seconds = timed(fn, path)
+            peak = peak_memory(fn, path)
+            print(
+                f"{name}:  {seconds:6.2f} s  {args.rows / seconds:12,.0f} rows/s"
+                f"  peak {peak / 2**20:8.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
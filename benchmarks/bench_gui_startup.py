@@ -0,0 +1,136 @@
+"""Measure GUI cold start: time to first paint and until the images show.
+
+Each run starts a fresh interpreter, so imports count as they do when the
+application starts. The clock starts before ``windows.views`` is imported;
+"first paint" is the first ``<Expose>`` of the window once Tk is idle again,
+"images" is when the logos are shown. Three modes are compared:
+
+- ``sync``: images decoded and scaled on the Tk thread before the window
+  paints, as the window used to do;
+- ``cold``: background loading with an empty image cache;
+- ``warm``: background loading from the cache the previous run filled.
+
+A stand-in controller replaces the downloader, so no cookies or ffmpeg
+probe are involved. Tk needs a display; on a headless machine run it under
+``xvfb-run``.
+
+Usage::
+
+    python benchmarks/bench_gui_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+MODES = ("sync", "cold", "warm")
+
+
+class IdleController:
+    """Just the controller methods the window binds to its buttons."""
+
+    def pause_batch(self, batch_id=None) -> None:
+        pass
+
+    def resume_batch(self, batch_id=None) -> None:
+        pass
+
+    def cancel_batch(self, batch_id=None) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+def child(mode: str, cache_dir: str) -> None:
+    start = time.perf_counter()
+    sys.path.insert(0, str(SRC))
+    sys.path.insert(0, str(SRC / "mnlvm_video_downloader"))
+    from PIL import Image
+
+    from utils.constants import IMAGES_DIR
+    from windows.assets import WINDOW_IMAGES
+    from windows.views import Window
+
+    timings = {}
+
+    class TimedWindow(Window):
+        def _load_images(self) -> None:
+            if mode != "sync":
+                return super()._load_images()
+            self._show_images(
+                {
+                    name: Image.open(IMAGES_DIR / filename)
+                    for name, (filename, _) in WINDOW_IMAGES.items()
+                }
+            )
+            # CTkImage scales on first use: force it like the first paint would.
+            self.update_idletasks()
+
+        def _show_images(self, images) -> None:
+            super()._show_images(images)
+            timings["images"] = time.perf_counter() - start
+            self._finish()
+
+        def _finish(self) -> None:
+            if len(timings) == 2:
+                self.after_idle(self.destroy)
+
+    app = TimedWindow(IdleController(), image_cache_dir=Path(cache_dir))
+
+    def painted(_event) -> None:
+        if "first_paint" not in timings:
+            app.after_idle(lambda: (paint_done(), app._finish()))
+
+    def paint_done() -> None:
+        timings.setdefault("first_paint", time.perf_counter() - start)
+
+    app.bind("<Expose>", painted, add="+")
+    app.mainloop()
+    print(json.dumps(timings))
+
+
+def run(mode: str, cache_dir: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--cache-dir", cache_dir],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.cache_dir)
+        return
+
+    results = {mode: [] for mode in MODES}
+    for _ in range(args.runs):
+        for mode in MODES:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                if mode == "warm":
+                    run("cold", cache_dir)
+                results[mode].append(run(mode, cache_dir))
+
+    print(f"runs: {args.runs} (median seconds)")
+    print(f"{'mode':<6} {'first paint':>12} {'images':>8}")
+    for mode, timings in results.items():
+        first_paint = statistics.median(t["first_paint"] for t in timings)
+        images = statistics.median(t["images"] for t in timings)
+        print(f"{mode:<6} {first_paint:12.3f} {images:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
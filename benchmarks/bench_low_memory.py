@@ -0,0 +1,113 @@
+"""Measure peak traced memory of a playlist download with and without low-memory mode.
+
+A fake ``YoutubeDL`` stands in for the network: it serves a synthetic
+playlist whose entries carry realistic format, thumbnail and subtitle lists.
+The default path keeps the whole processed playlist like ``extract_info``
+does; low-memory mode walks the entries lazily and keeps only
+``DownloadResult`` records.
+
+Usage::
+
+    python benchmarks/bench_low_memory.py [--entries 10000]
+"""
+
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(
+    0, str(Path(__file__).resolve().parent.parent / "src" / "mnlvm_video_downloader")
+)
+
+from controllers.executors import compact_info  # noqa: E402
+from controllers.results import iter_download_results  # noqa: E402
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLsynthetic"
+
+
+def video_info(video_id: str) -> dict:
+    return {
+        "id": video_id,
+        "title": f"Synthetic video {video_id}",
+        "duration": 240,
+        "formats": [
+            {
+                "format_id": str(itag),
+                "url": f"https://example.invalid/{video_id}/{itag}?sig={'s' * 150}",
+                "ext": "mp4",
+                "height": 144 * (itag % 15 + 1),
+                "filesize": 1_000_000 * itag,
+                "http_headers": {"User-Agent": "synthetic"},
+            }
+            for itag in range(40)
+        ],
+        "thumbnails": [
+            {"url": f"https://example.invalid/{video_id}/{n}.jpg", "id": str(n)}
+            for n in range(20)
+        ],
+        "subtitles": {
+            lang: [{"ext": "vtt", "url": f"https://example.invalid/{lang}.vtt"}]
+            for lang in ("en", "fr", "de", "es", "pt")
+        },
+    }
+
+
+def downloaded(info: dict) -> dict:
+    return {**info, "filepath": f"downloads/{info['id']}.mp4"}
+
+
+class FakeYoutubeDL:
+    def __init__(self, entries: int) -> None:
+        self.entries = entries
+
+    def _entries(self):
+        for index in range(self.entries):
+            yield {"_type": "url", "url": f"v{index:010d}", "ie_key": "Youtube"}
+
+    def extract_info(self, url, download=True, process=True, ie_key=None):
+        if url != PLAYLIST_URL:
+            return video_info(url)
+        if not process:
+            return {"_type": "playlist", "entries": self._entries()}
+        return {
+            "_type": "playlist",
+            "title": "Synthetic playlist",
+            "entries": [
+                downloaded(video_info(entry["url"])) for entry in self._entries()
+            ],
+        }
+
+    def process_ie_result(self, ie_result, download=True):
+        return downloaded(ie_result)
+
+
+def measure(fn) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10_000)
+    args = parser.parse_args()
+    ydl = FakeYoutubeDL(args.entries)
+
+    default_peak = measure(
+        lambda: compact_info(ydl.extract_info(PLAYLIST_URL, download=True))
+    )
+    low_memory_peak = measure(lambda: list(iter_download_results(ydl, PLAYLIST_URL)))
+
+    print(f"entries:         {args.entries}")
+    print(f"default peak:    {default_peak / 2**20:10.1f} MiB")
+    print(f"low-memory peak: {low_memory_peak / 2**20:10.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
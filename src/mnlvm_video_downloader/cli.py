@@ -0,0 +1,165 @@
+from typing import List, Optional
+
+import typer
+from controllers.client import DaemonClient
+from exceptions import DaemonRequestError
+from utils.constants import BULK_PRIORITY, DAEMON_HOST, DAEMON_PORT, THREAD_BACKEND
+
+app = typer.Typer(help="Run the download daemon or submit work to it.")
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    host: str = typer.Option(DAEMON_HOST, help="Daemon address."),
+    port: int = typer.Option(DAEMON_PORT, help="Daemon port."),
+) -> None:
+    ctx.obj = (host, port)
+
+
+def _connect(ctx: typer.Context) -> DaemonClient:
+    client = DaemonClient.connect(*ctx.obj)
+    if client is None:
+        typer.echo("No daemon is running; start one with the 'daemon' command.")
+        raise typer.Exit(1)
+    return client
+
+
+@app.command()
+def daemon(
+    ctx: typer.Context,
+    output_dir: str = "downloads",
+    max_workers: int = 4,
+    browser: Optional[str] = "chrome",
+    ffmpeg_path: str = "ffmpeg",
+    backend: str = THREAD_BACKEND,
+    bandwidth_limit: Optional[float] = None,
+) -> None:
+    """Start the daemon in the foreground; Ctrl+C stops it."""
+    from controllers.daemon import DownloadDaemon
+    from controllers.video import YouTubeDownloaderController
+
+    controller = YouTubeDownloaderController(
+        output_dir=output_dir,
+        max_workers=max_workers,
+        browser=browser,
+        ffmpeg_path=ffmpeg_path,
+        backend=backend,
+        bandwidth_limit=bandwidth_limit,
+    )
+    download_daemon = DownloadDaemon(controller, *ctx.obj)
+    host, port = download_daemon.address
+    typer.echo(f"Listening on http://{host}:{port}")
+    try:
+        download_daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def _wait(client: DaemonClient, batch_id: int) -> None:
+    client.set_progress_callback(
+        lambda fraction: typer.echo(f"\rBatch {batch_id}: {fraction:.0%}", nl=False)
+    )
+    records = client.wait_batch(batch_id)
+    typer.echo()
+    for record in records:
+        typer.echo(f"{record['status']:<10} {record['output_path'] or record['url']}")
+
+
+@app.command()
+def download(
+    ctx: typer.Context,
+    urls: List[str],
+    priority: int = BULK_PRIORITY,
+    deadline: Optional[float] = typer.Option(
+        None, help="Seconds the whole batch may take; lowers quality to fit."
+    ),
+    budget: Optional[float] = typer.Option(
+        None, help="Bytes the whole batch may download; lowers quality to fit."
+    ),
+    wait: bool = typer.Option(True, help="Follow progress until the batch ends."),
+) -> None:
+    """Queue URLs on the daemon as one batch."""
+    client = _connect(ctx)
+    batch = client.submit(urls, priority, deadline, budget)
+    for url in batch["rejected"]:
+        typer.echo(f"Skipped invalid URL: {url}")
+    typer.echo(f"Batch {batch['batch_id']}: {len(batch['job_ids'])} jobs")
+    if wait:
+        _wait(client, batch["batch_id"])
+
+
+@app.command()
+def csv(
+    ctx: typer.Context,
+    path: str,
+    wait: bool = typer.Option(True, help="Follow progress until the batch ends."),
+) -> None:
+    """Resolve the tracks of a CSV file and queue them on the daemon."""
+    client = _connect(ctx)
+    batch = client.submit_csv(path)
+    typer.echo(f"Batch {batch['batch_id']}: {len(batch['job_ids'])} jobs")
+    if wait and batch["job_ids"]:
+        _wait(client, batch["batch_id"])
+
+
+@app.command()
+def jobs(ctx: typer.Context, batch: Optional[int] = None) -> None:
+    """List the daemon's jobs, or those of one batch."""
+    for record in _connect(ctx).jobs(batch):
+        typer.echo(
+            f"{record['job_id']:>6} {record['status']:<10} "
+            f"{record['fraction']:>5.0%} {record['url']}"
+        )
+
+
+def _control(ctx: typer.Context, action: str, job_id: int, batch: bool) -> None:
+    client = _connect(ctx)
+    try:
+        if batch:
+            getattr(client, f"{action}_batch")(job_id)
+        else:
+            getattr(client, action)(job_id)
+    except DaemonRequestError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+
+
+@app.command()
+def pause(
+    ctx: typer.Context,
+    job_id: int,
+    batch: bool = typer.Option(False, help="JOB_ID is a batch ID."),
+) -> None:
+    """Pause a job, keeping its partial file."""
+    _control(ctx, "pause", job_id, batch)
+
+
+@app.command()
+def resume(
+    ctx: typer.Context,
+    job_id: int,
+    batch: bool = typer.Option(False, help="JOB_ID is a batch ID."),
+) -> None:
+    """Resume a paused job."""
+    _control(ctx, "resume", job_id, batch)
+
+
+@app.command()
+def cancel(
+    ctx: typer.Context,
+    job_id: int,
+    batch: bool = typer.Option(False, help="JOB_ID is a batch ID."),
+) -> None:
+    """Cancel a job and delete its partial file."""
+    _control(ctx, "cancel", job_id, batch)
+
+
+@app.command()
+def stop(ctx: typer.Context) -> None:
+    """Stop the daemon, cancelling every unfinished job."""
+    _connect(ctx).stop_daemon()
+
+
+if __name__ == "__main__":
+    app()
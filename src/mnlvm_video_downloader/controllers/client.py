@@ -0,0 +1,354 @@
+import asyncio
+import http.client
+import json
+import threading
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from exceptions import DaemonRequestError
+from controllers.jobs import (
+    FINISHED_STATUSES,
+    IndividualProgressCallback,
+    ProgressCallback,
+)
+from utils.constants import (
+    BULK_PRIORITY,
+    DAEMON_HOST,
+    DAEMON_KEEPALIVE,
+    DAEMON_PORT,
+    DAEMON_REQUEST_TIMEOUT,
+)
+from utils.utils import daemon_token_path
+
+FINISHED_STATUS_NAMES = frozenset(status.name.lower() for status in FINISHED_STATUSES)
+
+
+def iter_events(stream: Iterable[bytes]) -> Iterator[Tuple[Optional[str], Any]]:
+    """Parse a server-sent event stream into ``(event, data)`` pairs.
+
+    Comment lines, which the daemon sends as keepalives, yield
+    ``(None, None)`` so readers wake up regularly even when nothing changes.
+    """
+    event: Optional[str] = None
+    data: List[str] = []
+    for raw in stream:
+        line = raw.decode("utf8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event or "message", json.loads("\n".join(data))
+            event, data = None, []
+        elif line.startswith(":"):
+            yield None, None
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+
+
+def _read_token() -> str:
+    try:
+        return daemon_token_path().read_text().strip()
+    except OSError:
+        return ""
+
+
+class DaemonClient:
+    """Thin client for a running ``DownloadDaemon``.
+
+    Mirrors the part of the controller API the GUI and the CLI use, so
+    either can hand its work to the shared daemon instead of starting a
+    controller of its own. Batch controls without an ID act on the last
+    batch this client submitted. ``token`` defaults to the one the daemon
+    wrote to ``daemon_token_path()``.
+    """
+
+    def __init__(
+        self,
+        host: str = DAEMON_HOST,
+        port: int = DAEMON_PORT,
+        timeout: float = DAEMON_REQUEST_TIMEOUT,
+        token: Optional[str] = None,
+    ) -> None:
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+        self.token = token if token is not None else _read_token()
+        self.last_batch_id: Optional[int] = None
+        self._batches: List[int] = []
+        self._closed = threading.Event()
+        self._progress_callback: Optional[ProgressCallback] = None
+        self._individual_progress_callback: Optional[IndividualProgressCallback] = None
+
+    @classmethod
+    def connect(
+        cls,
+        host: str = DAEMON_HOST,
+        port: int = DAEMON_PORT,
+        token: Optional[str] = None,
+    ) -> Optional["DaemonClient"]:
+        """Return a client if a daemon answers on ``host:port``, else None."""
+        client = cls(host, port, token=token)
+        try:
+            client.health()
+        except (OSError, DaemonRequestError):
+            return None
+        return client
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = DAEMON_REQUEST_TIMEOUT,
+    ) -> Any:
+        data = None if body is None else json.dumps(body).encode("utf8")
+        request = Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json", **self._auth_headers()},
+        )
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                return json.load(response)
+        except HTTPError as e:
+            try:
+                message = json.load(e).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise DaemonRequestError(e.code, message) from e
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def health(self) -> Dict[str, Any]:
+        return cast(
+            Dict[str, Any], self._request("GET", "/health", timeout=self.timeout)
+        )
+
+    def set_progress_callback(self, callback: ProgressCallback) -> None:
+        self._progress_callback = callback
+
+    def set_individual_progress_callback(
+        self, callback: IndividualProgressCallback
+    ) -> None:
+        self._individual_progress_callback = callback
+
+    def submit(
+        self,
+        urls: List[str],
+        priority: int = BULK_PRIORITY,
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Queue ``urls`` as one batch; returns its ID, job IDs and rejected URLs."""
+        body = {"urls": list(urls), "priority": priority}
+        if deadline is not None:
+            body["deadline"] = deadline
+        if byte_budget is not None:
+            body["byte_budget"] = byte_budget
+        batch = self._request("POST", "/jobs", body, self.timeout)
+        return self._remember(batch)
+
+    def submit_csv(self, csv_path: str) -> Dict[str, Any]:
+        """Resolve and queue every track of a CSV file read by the daemon.
+
+        Resolution searches YouTube once per row, so the call has no timeout.
+        """
+        path = str(Path(csv_path).resolve())
+        return self._remember(self._request("POST", "/csv", {"path": path}, None))
+
+    def _remember(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        self._batches.append(batch["batch_id"])
+        self.last_batch_id = batch["batch_id"]
+        return batch
+
+    def jobs(self, batch_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = "" if batch_id is None else f"?batch={batch_id}"
+        return cast(
+            List[Dict[str, Any]],
+            self._request("GET", f"/jobs{query}", timeout=self.timeout),
+        )
+
+    def batch(self, batch_id: int) -> Dict[str, Any]:
+        return cast(
+            Dict[str, Any],
+            self._request("GET", f"/batches/{batch_id}", timeout=self.timeout),
+        )
+
+    def _job_action(self, job_id: int, action: str, **body: Any) -> Dict[str, Any]:
+        return cast(
+            Dict[str, Any],
+            self._request("POST", f"/jobs/{job_id}/{action}", body, self.timeout),
+        )
+
+    def pause(self, job_id: int) -> None:
+        self._job_action(job_id, "pause")
+
+    def resume(self, job_id: int) -> None:
+        self._job_action(job_id, "resume")
+
+    def cancel(self, job_id: int) -> None:
+        self._job_action(job_id, "cancel")
+
+    def reprioritize(self, job_id: int, priority: int) -> None:
+        self._job_action(job_id, "prioritize", priority=priority)
+
+    def _batch_action(self, batch_id: Optional[int], action: str, **body: Any) -> None:
+        if batch_id is None:
+            batch_id = self.last_batch_id
+        if batch_id is None:
+            return
+        self._request("POST", f"/batches/{batch_id}/{action}", body, self.timeout)
+
+    def pause_batch(self, batch_id: Optional[int] = None) -> None:
+        self._batch_action(batch_id, "pause")
+
+    def resume_batch(self, batch_id: Optional[int] = None) -> None:
+        self._batch_action(batch_id, "resume")
+
+    def cancel_batch(self, batch_id: Optional[int] = None) -> None:
+        self._batch_action(batch_id, "cancel")
+
+    def reprioritize_batch(self, priority: int, batch_id: Optional[int] = None) -> None:
+        self._batch_action(batch_id, "prioritize", priority=priority)
+
+    def stop_daemon(self) -> None:
+        self._request("POST", "/shutdown", {}, self.timeout)
+
+    def events(self) -> IO[bytes]:
+        """Open the daemon's event stream; read it with ``iter_events``.
+
+        The daemon sends a keepalive every ``DAEMON_KEEPALIVE`` seconds, so a
+        read that stays silent for several of them means the daemon is gone.
+        """
+        request = Request(self.base_url + "/events", headers=self._auth_headers())
+        return cast(IO[bytes], urlopen(request, timeout=3 * DAEMON_KEEPALIVE))
+
+    def wait_batch(self, batch_id: int) -> List[Dict[str, Any]]:
+        """Block until a batch finishes, feeding the progress callbacks.
+
+        Job records arrive over the event stream. The batch is re-read after
+        every (re)connection and checked on every keepalive, so missed events
+        cannot stall the wait. Returns the final job records, or the last
+        ones seen if ``shutdown`` is called meanwhile.
+        """
+        progress = _BatchProgress(
+            self._progress_callback, self._individual_progress_callback
+        )
+        while not self._closed.is_set():
+            stream = self.events()
+            try:
+                if self._follow(batch_id, stream, progress):
+                    progress.update(self.jobs(batch_id))
+                    break
+            except (TimeoutError, ConnectionError, http.client.HTTPException):
+                # A stalled or dropped stream: reconnect and resync.
+                continue
+            finally:
+                stream.close()
+        return progress.records()
+
+    def _follow(
+        self, batch_id: int, stream: IO[bytes], progress: "_BatchProgress"
+    ) -> bool:
+        """Feed ``progress`` from ``stream``; True once the batch is done.
+
+        Returns False when the stream ends, which is how the daemon drops a
+        subscriber that fell behind, or when ``shutdown`` is called.
+        """
+        # Subscribed first, so nothing after these reads is missed.
+        progress.update(self.jobs(batch_id))
+        if self.batch(batch_id)["done"]:
+            return True
+        for event, data in iter_events(stream):
+            if self._closed.is_set():
+                return False
+            if event == "job" and data["job_id"] in progress:
+                progress.update([data])
+            elif event == "batch" and data["batch_id"] == batch_id:
+                return bool(data["done"])
+            elif event is None and self.batch(batch_id)["done"]:
+                return True
+        return False
+
+    async def _download(
+        self,
+        csv_path: str,
+        on_batch: Optional[Callable[[List[int], List[str]], None]] = None,
+    ) -> None:
+        """Same contract as the controller's ``_download``, run by the daemon."""
+        await asyncio.to_thread(self._download_blocking, csv_path, on_batch)
+
+    def _download_blocking(
+        self,
+        csv_path: str,
+        on_batch: Optional[Callable[[List[int], List[str]], None]],
+    ) -> None:
+        batch = self.submit_csv(csv_path)
+        if not batch["job_ids"]:
+            return
+        if on_batch is not None:
+            on_batch(batch["job_ids"], batch["urls"])
+        self.wait_batch(batch["batch_id"])
+
+    def shutdown(self) -> None:
+        """Cancel this client's batches; the daemon keeps serving others."""
+        self._closed.set()
+        for batch_id in self._batches:
+            try:
+                self.cancel_batch(batch_id)
+            except (OSError, DaemonRequestError):
+                continue
+
+
+class _BatchProgress:
+    """Turn job records of one batch into controller-style progress callbacks."""
+
+    def __init__(
+        self,
+        progress_callback: Optional[ProgressCallback],
+        individual_progress_callback: Optional[IndividualProgressCallback],
+    ) -> None:
+        self._progress_callback = progress_callback
+        self._individual_progress_callback = individual_progress_callback
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._reported: Optional[float] = None
+
+    def __contains__(self, job_id: int) -> bool:
+        return job_id in self._records
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self._records.values())
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            self._records[record["job_id"]] = record
+            if self._individual_progress_callback:
+                self._individual_progress_callback(record["job_id"], record["fraction"])
+        if not self._records or not self._progress_callback:
+            return
+        finished = sum(
+            record["status"] in FINISHED_STATUS_NAMES
+            for record in self._records.values()
+        )
+        fraction = finished / len(self._records)
+        # The GUI announces completion at 100%, so report each value once.
+        if fraction != self._reported:
+            self._reported = fraction
+            self._progress_callback(fraction)
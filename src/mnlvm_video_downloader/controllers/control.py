@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import itertools
+import threading
+from array import array
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from multiprocessing import get_context
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    MutableSequence,
+    Optional,
+    Tuple,
+)
+
+from yt_dlp.postprocessor import PostProcessor
+from exceptions import DownloadPaused
+from utils.constants import CONTROL_TABLE_SLOTS
+from yt_dlp.utils import DownloadCancelled
+
+
+class ControlCode(IntEnum):
+    RUN = 0
+    PAUSE = 1
+    CANCEL = 2
+
+
+class ControlTable:
+    """One control byte and one priority per job, readable from progress hooks.
+
+    The controller's copy is indexed by job ID and grows with the job store.
+    With the process backend, a job handed to a worker process is also
+    attached to one of ``capacity`` slots in shared memory inherited by the
+    workers, so pausing, cancelling or reprioritizing it is a single write
+    the worker sees at its next progress update. A slot is detached, and
+    reused, once the worker call returns, so only jobs in flight hold one.
+    """
+
+    def __init__(
+        self, shared: bool = False, capacity: int = CONTROL_TABLE_SLOTS
+    ) -> None:
+        self.shared = shared
+        self._codes = bytearray()
+        self._priorities = array("i")
+        self._slots: Dict[int, int] = {}
+        self._slot_codes: MutableSequence[int]
+        self._slot_priorities: MutableSequence[int]
+        self._free: List[int]
+        self._lock: ContextManager[Any]
+        if shared:
+            context = get_context()
+            self._slot_codes = context.RawArray("b", capacity)
+            self._slot_priorities = context.RawArray("i", capacity)
+            self._free = list(reversed(range(capacity)))
+            self._lock = context.Lock()
+        else:
+            self._free = []
+            self._lock = threading.Lock()
+
+    def _grow(self, job_id: int) -> None:
+        missing = job_id + 1 - len(self._codes)
+        if missing > 0:
+            self._codes.extend(bytes(missing))
+            self._priorities.frombytes(bytes(self._priorities.itemsize * missing))
+
+    def get(self, job_id: int) -> ControlCode:
+        if job_id < len(self._codes):
+            return ControlCode(self._codes[job_id])
+        return ControlCode.RUN
+
+    def set(self, job_id: int, code: ControlCode) -> None:
+        with self._lock:
+            self._grow(job_id)
+            self._codes[job_id] = code
+            slot = self._slots.get(job_id)
+            if slot is not None:
+                self._slot_codes[slot] = code
+
+    def priority(self, job_id: int) -> int:
+        if job_id < len(self._priorities):
+            return self._priorities[job_id]
+        return 0
+
+    def set_priority(self, job_id: int, priority: int) -> None:
+        with self._lock:
+            self._grow(job_id)
+            self._priorities[job_id] = priority
+            slot = self._slots.get(job_id)
+            if slot is not None:
+                self._slot_priorities[slot] = priority
+
+    def attach(self, job_id: int) -> Optional[int]:
+        """Shared slot mirroring ``job_id`` for a worker; None if all are taken."""
+        with self._lock:
+            slot = self._slots.get(job_id)
+            if slot is None:
+                if not self._free:
+                    return None
+                slot = self._slots[job_id] = self._free.pop()
+            self._slot_codes[slot] = self.get(job_id)
+            self._slot_priorities[slot] = self.priority(job_id)
+            return slot
+
+    def detach(self, job_id: int) -> None:
+        with self._lock:
+            slot = self._slots.pop(job_id, None)
+            if slot is not None:
+                self._free.append(slot)
+
+    def check(self, job_id: int) -> None:
+        """Raise inside a yt-dlp progress hook if the job must stop."""
+        _raise_for(self.get(job_id), job_id)
+
+    def slot_priority(self, slot: int) -> int:
+        return self._slot_priorities[slot]
+
+    def check_slot(self, slot: int, job_id: int) -> None:
+        """``check`` for a worker process, reading the job's shared slot."""
+        _raise_for(ControlCode(self._slot_codes[slot]), job_id)
+
+
+def _raise_for(code: ControlCode, job_id: int) -> None:
+    if code == ControlCode.PAUSE:
+        raise DownloadPaused(f"Job {job_id} paused")
+    if code == ControlCode.CANCEL:
+        raise DownloadCancelled(f"Job {job_id} cancelled")
+
+
+class ControlCheckPP(PostProcessor):
+    """Check the job's control code between yt-dlp's processing stages.
+
+    Progress hooks only fire while bytes arrive. Registered at
+    ``pre_process`` and ``before_dl``, this lets a job stop right after
+    extraction or before its download starts; ``control_check_hook`` covers
+    the start of every postprocessor.
+    """
+
+    def __init__(self, check: Callable[[], None], downloader: Any = None) -> None:
+        super().__init__(downloader)
+        self.check = check
+
+    def run(self, info: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
+        self.check()
+        return [], info
+
+
+def control_check_hook(check: Callable[[], None]) -> Callable[[Dict[str, Any]], None]:
+    """yt-dlp postprocessor hook running ``check`` before each postprocessor."""
+
+    def postprocessor_hook(d: Dict[str, Any]) -> None:
+        if d["status"] == "started":
+            check()
+
+    return postprocessor_hook
+
+
+def resolve_future(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class PrioritySlots:
+    """Asyncio counterpart of a semaphore that wakes waiters by priority.
+
+    Lower priority values run first; waiters with equal priority keep FIFO
+    order. Must be used from the event loop that owns it.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._free = capacity
+        # Entries are ``[priority, sequence, job_id, future]``, compared in order.
+        self._waiters: List[List[Any]] = []
+        self._entries: Dict[int, List[Any]] = {}
+        self._sequence = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, job_id: Optional[int], priority: int) -> AsyncIterator[None]:
+        await self.acquire(job_id, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, job_id: Optional[int], priority: int) -> None:
+        """Wait for a free slot; only waiters with a ``job_id`` can be reprioritized."""
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), job_id, future]
+        heapq.heappush(self._waiters, entry)
+        if job_id is not None:
+            self._entries[job_id] = entry
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation.
+                self.release()
+            raise
+        finally:
+            if job_id is not None:
+                current = self._entries.get(job_id)
+                if current is not None and current[3] is future:
+                    del self._entries[job_id]
+
+    def release(self) -> None:
+        while self._waiters:
+            future: "Optional[asyncio.Future[None]]" = heapq.heappop(self._waiters)[3]
+            if future is not None and not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+    def reprioritize(self, job_id: int, priority: int) -> None:
+        entry = self._entries.get(job_id)
+        if entry is None:
+            return
+        # Changing a key in place would break the heap; retire the old entry.
+        future, entry[3] = entry[3], None
+        new_entry = [priority, next(self._sequence), job_id, future]
+        heapq.heappush(self._waiters, new_entry)
+        self._entries[job_id] = new_entry
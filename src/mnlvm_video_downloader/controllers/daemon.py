@@ -0,0 +1,532 @@
+import asyncio
+import hmac
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+)
+from urllib.parse import parse_qs, urlsplit
+
+import validators
+from exceptions import DaemonRequestError
+from controllers.jobs import FINISHED_STATUSES, JobRecord, JobSnapshot
+from utils.constants import (
+    BULK_PRIORITY,
+    DAEMON_ALLOWED_HOSTS,
+    DAEMON_EVENT_BACKLOG,
+    DAEMON_EVENT_INTERVAL,
+    DAEMON_HOST,
+    DAEMON_KEEPALIVE,
+    DAEMON_PORT,
+    INTERACTIVE_PRIORITY,
+)
+from utils.utils import create_dir, daemon_token_path
+
+if TYPE_CHECKING:
+    from controllers.video import YouTubeDownloaderController
+
+_JOB = re.compile(r"^/jobs/(\d+)$")
+_JOB_ACTION = re.compile(r"^/jobs/(\d+)/(pause|resume|cancel|prioritize)$")
+_BATCH = re.compile(r"^/batches/(\d+)$")
+_BATCH_ACTION = re.compile(r"^/batches/(\d+)/(pause|resume|cancel|prioritize)$")
+
+T = TypeVar("T")
+
+# ``None`` tells the reader that it has been disconnected.
+Subscriber = queue.Queue[Optional[bytes]]
+
+
+def record_json(record: JobRecord) -> Dict[str, Any]:
+    data = record._asdict()
+    data["status"] = record.status.name.lower()
+    data["fraction"] = record.fraction
+    return data
+
+
+def format_event(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf8")
+
+
+class EventStream:
+    """Fan-out of server-sent events to every connected subscriber.
+
+    Each subscriber reads its own bounded queue. One that falls ``backlog``
+    events behind is disconnected rather than buffered without limit; clients
+    resync from ``GET /jobs`` when they reconnect.
+    """
+
+    def __init__(self, backlog: int = DAEMON_EVENT_BACKLOG) -> None:
+        self._backlog = backlog
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscriber] = set()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        subscriber: Subscriber = queue.Queue(self._backlog)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: Any) -> None:
+        message = format_event(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                self.disconnect(subscriber)
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        self.unsubscribe(subscriber)
+        # Make room for the sentinel so the reader stops straight away.
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        subscriber.put_nowait(None)
+
+    def close(self) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self.disconnect(subscriber)
+
+
+class DownloadDaemon:
+    """Long-running owner of one controller, serving a localhost HTTP API.
+
+    Every submitter shares the controller's event loop, worker slots,
+    bandwidth budget and caches, and pays the startup cost (cookie
+    extraction, ffmpeg probe) once. Routes, all JSON:
+
+    * ``GET /health``, ``GET /jobs[?batch=ID]``, ``GET /jobs/ID``,
+      ``GET /batches/ID``
+    * ``POST /jobs`` with ``{"urls": [...], "priority": n}``, optionally
+      with a ``deadline`` in seconds and/or a ``byte_budget``, and
+      ``POST /csv`` with ``{"path": ...}``, both starting a batch
+    * ``POST /jobs/ID/ACTION`` and ``POST /batches/ID/ACTION`` where ACTION
+      is ``pause``, ``resume``, ``cancel`` or ``prioritize``
+    * ``POST /shutdown``
+    * ``GET /events``: server-sent ``job`` events with the record of every
+      job whose state changed, and a ``batch`` event when a batch finishes.
+
+    Loopback is reachable from every web page the user opens, so each
+    request must carry the token written to ``token_path`` (readable by the
+    user only) as ``Authorization: Bearer ...``, a loopback ``Host`` and no
+    foreign ``Origin``; POST bodies must be ``application/json``.
+    """
+
+    def __init__(
+        self,
+        controller: "YouTubeDownloaderController",
+        host: str = DAEMON_HOST,
+        port: int = DAEMON_PORT,
+        token_path: Optional[Path] = None,
+    ) -> None:
+        self.controller = controller
+        self.events = EventStream()
+        self.server = DaemonServer((host, port), DaemonRequestHandler, self)
+        self.token = secrets.token_urlsafe(32)
+        self.token_path = Path(token_path or daemon_token_path())
+        _write_token(self.token_path, self.token)
+        self._loop = asyncio.new_event_loop()
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._finished_batches: Set[int] = set()
+        # Batch events wait for the job events of the same tick; see
+        # ``_publish_changes``.
+        self._batch_events: List[int] = []
+        self._stop_lock = threading.Lock()
+        self._stopped = False
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        host, port = self.server.server_address[:2]
+        return str(host), port
+
+    def start(self) -> None:
+        """Serve from background threads and return immediately."""
+        self._start_loop()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def serve_forever(self) -> None:
+        self._start_loop()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stop()
+
+    def _start_loop(self) -> None:
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._publish_changes(), self._loop)
+
+    def stop(self) -> None:
+        """Stop serving and cancel every job that has not finished."""
+        with self._stop_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self.server.shutdown()
+            self.server.server_close()
+            self.events.close()
+            self.controller.shutdown()
+            asyncio.run_coroutine_threadsafe(self._close_loop(), self._loop)
+
+    async def _close_loop(self) -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def _call(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run ``coroutine`` on the daemon loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _publish_changes(self) -> None:
+        previous: Optional[JobSnapshot] = None
+        while True:
+            finished_batches, self._batch_events = self._batch_events, []
+            snapshot = self.controller.jobs.snapshot()
+            if self.events.has_subscribers:
+                for job_id in snapshot.changed_since(previous):
+                    self.events.publish("job", record_json(snapshot[job_id]))
+                for batch_id in finished_batches:
+                    self.events.publish("batch", self.batch(batch_id))
+            previous = snapshot
+            await asyncio.sleep(DAEMON_EVENT_INTERVAL)
+
+    def submit(
+        self,
+        urls: List[str],
+        priority: int = BULK_PRIORITY,
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        accepted: List[str] = []
+        rejected: List[str] = []
+        for url in urls:
+            (accepted if validators.url(url) else rejected).append(url)
+        batch_id, job_ids = self._call(
+            self._start_batch(accepted, priority, deadline, byte_budget)
+        )
+        return {
+            "batch_id": batch_id,
+            "job_ids": job_ids,
+            "urls": accepted,
+            "rejected": rejected,
+        }
+
+    def submit_csv(self, csv_path: str) -> Dict[str, Any]:
+        queries = self.controller._read_csv_queries(csv_path)
+        tracks = self._call(self.controller.resolve_many(queries))
+        return self.submit([track for track in tracks if track])
+
+    async def _start_batch(
+        self,
+        urls: List[str],
+        priority: int,
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+    ) -> Tuple[int, List[int]]:
+        job_ids = self.controller._submit_batch(urls, priority)
+        # Set by ``_submit_batch`` just above.
+        batch_id = cast(int, self.controller.last_batch_id)
+        task = self._loop.create_task(
+            self._run_batch(batch_id, job_ids, deadline, byte_budget)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return batch_id, job_ids
+
+    async def _run_batch(
+        self,
+        batch_id: int,
+        job_ids: List[int],
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+    ) -> None:
+        try:
+            await self.controller._drive_batch(
+                job_ids, deadline=deadline, byte_budget=byte_budget
+            )
+        except Exception as e:
+            self.controller._handle_error(f"batch {batch_id}", e)
+        finally:
+            self._finished_batches.add(batch_id)
+            self._batch_events.append(batch_id)
+
+    def jobs(self, batch_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        snapshot = self.controller.jobs.snapshot()
+        if batch_id is None:
+            return [record_json(record) for record in snapshot]
+        return [record_json(snapshot[job_id]) for job_id in self._batch(batch_id)]
+
+    def batch(self, batch_id: int) -> Dict[str, Any]:
+        job_ids = self._batch(batch_id)
+        jobs = self.controller.jobs
+        return {
+            "batch_id": batch_id,
+            "done": batch_id in self._finished_batches,
+            "total": len(job_ids),
+            "finished": sum(
+                jobs.status(job_id) in FINISHED_STATUSES for job_id in job_ids
+            ),
+        }
+
+    def _batch(self, batch_id: int) -> List[int]:
+        try:
+            return self.controller.batch_jobs(batch_id)
+        except IndexError:
+            raise DaemonRequestError(HTTPStatus.NOT_FOUND, f"No batch {batch_id}")
+
+    def handle_get(self, path: str, query: Dict[str, List[str]]) -> Any:
+        if path == "/health":
+            snapshot = self.controller.jobs.snapshot()
+            return {
+                "status": "ok",
+                "jobs": len(snapshot),
+                "counts": {
+                    status.name.lower(): count
+                    for status, count in snapshot.counts.items()
+                },
+            }
+        if path == "/jobs":
+            batch_ids = query.get("batch")
+            return self.jobs(_parse_id(batch_ids[0]) if batch_ids else None)
+        match = _JOB.match(path)
+        if match:
+            try:
+                return record_json(self.controller.jobs.snapshot()[int(match[1])])
+            except IndexError:
+                raise DaemonRequestError(HTTPStatus.NOT_FOUND, f"No job {match[1]}")
+        match = _BATCH.match(path)
+        if match:
+            return self.batch(int(match[1]))
+        raise DaemonRequestError(HTTPStatus.NOT_FOUND, f"No route for GET {path}")
+
+    def handle_post(self, path: str, body: Dict[str, Any]) -> Any:
+        if path == "/jobs":
+            urls = body.get("urls")
+            if not isinstance(urls, list):
+                raise DaemonRequestError(HTTPStatus.BAD_REQUEST, "urls must be a list")
+            return self.submit(
+                urls,
+                int(body.get("priority", BULK_PRIORITY)),
+                _optional_float(body.get("deadline")),
+                _optional_float(body.get("byte_budget")),
+            )
+        if path == "/csv":
+            try:
+                return self.submit_csv(body["path"])
+            except (KeyError, OSError, IndexError) as e:
+                raise DaemonRequestError(
+                    HTTPStatus.BAD_REQUEST, f"Cannot read CSV: {e}"
+                )
+        match = _JOB_ACTION.match(path)
+        if match:
+            job_id, action = int(match[1]), match[2]
+            if job_id >= len(self.controller.jobs):
+                raise DaemonRequestError(HTTPStatus.NOT_FOUND, f"No job {job_id}")
+            if action == "prioritize":
+                priority = int(body.get("priority", INTERACTIVE_PRIORITY))
+                self.controller.reprioritize(job_id, priority)
+            else:
+                getattr(self.controller, action)(job_id)
+            return self.handle_get(f"/jobs/{job_id}", {})
+        match = _BATCH_ACTION.match(path)
+        if match:
+            batch_id, action = int(match[1]), match[2]
+            self._batch(batch_id)
+            if action == "prioritize":
+                priority = int(body.get("priority", INTERACTIVE_PRIORITY))
+                self.controller.reprioritize_batch(priority, batch_id)
+            else:
+                getattr(self.controller, f"{action}_batch")(batch_id)
+            return self.batch(batch_id)
+        if path == "/shutdown":
+            # ``server.shutdown`` blocks until serving stops: not from a handler.
+            threading.Thread(target=self.stop, daemon=True).start()
+            return {"status": "stopping"}
+        raise DaemonRequestError(HTTPStatus.NOT_FOUND, f"No route for POST {path}")
+
+
+def _write_token(path: Path, token: str) -> None:
+    create_dir(path.parent)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as token_file:
+        token_file.write(token)
+    # O_CREAT's mode only applies to a new file.
+    os.chmod(path, 0o600)
+
+
+def _hostname(value: str) -> Optional[str]:
+    try:
+        return urlsplit(f"//{value}").hostname
+    except ValueError:
+        return None
+
+
+def _parse_id(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise DaemonRequestError(HTTPStatus.BAD_REQUEST, f"Invalid ID {value!r}")
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class DaemonServer(ThreadingHTTPServer):
+    """HTTP server that hands its requests to ``download_daemon``."""
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        handler: Callable[..., BaseHTTPRequestHandler],
+        download_daemon: DownloadDaemon,
+    ) -> None:
+        super().__init__(address, handler)
+        self.download_daemon = download_daemon
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    server_version = "MNLVMDownloadDaemon/0.1"
+
+    @property
+    def download_daemon(self) -> DownloadDaemon:
+        return cast(DaemonServer, self.server).download_daemon
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/events":
+            try:
+                self._authorize()
+            except DaemonRequestError as e:
+                self._send_json(e.status, {"error": e.message})
+                return
+            self._stream_events()
+            return
+        self._respond(
+            lambda: self.download_daemon.handle_get(url.path, parse_qs(url.query))
+        )
+
+    def do_POST(self) -> None:
+        self._respond(
+            lambda: self.download_daemon.handle_post(
+                urlsplit(self.path).path, self._read_body()
+            )
+        )
+
+    def _authorize(self) -> None:
+        """Reject requests a web page could have made on the user's behalf."""
+        if _hostname(self.headers.get("Host", "")) not in DAEMON_ALLOWED_HOSTS:
+            raise DaemonRequestError(HTTPStatus.FORBIDDEN, "Unexpected Host header")
+        origin = self.headers.get("Origin")
+        if origin is not None:
+            url = urlsplit(origin)
+            if (
+                url.scheme != "http"
+                or url.hostname not in DAEMON_ALLOWED_HOSTS
+                or url.port != self.download_daemon.address[1]
+            ):
+                raise DaemonRequestError(HTTPStatus.FORBIDDEN, "Foreign origin")
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        if scheme != "Bearer" or not hmac.compare_digest(
+            token.encode("utf8"), self.download_daemon.token.encode("utf8")
+        ):
+            raise DaemonRequestError(HTTPStatus.UNAUTHORIZED, "Missing or bad token")
+
+    def _read_body(self) -> Dict[str, Any]:
+        # A form or text/plain POST needs no CORS preflight; JSON does.
+        if self.headers.get_content_type() != "application/json":
+            raise DaemonRequestError(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Body must be application/json"
+            )
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise DaemonRequestError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+        if not isinstance(body, dict):
+            raise DaemonRequestError(HTTPStatus.BAD_REQUEST, "Body must be an object")
+        return body
+
+    def _respond(self, handle: Callable[[], Any]) -> None:
+        try:
+            self._authorize()
+            status: int
+            status, payload = HTTPStatus.OK, handle()
+        except DaemonRequestError as e:
+            status, payload = e.status, {"error": e.message}
+        except (TypeError, ValueError) as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            logger = self.download_daemon.controller.logger
+            if logger:
+                logger.exception(f"Daemon request {self.command} {self.path} failed")
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+        self._send_json(status, payload)
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        events = self.download_daemon.events
+        subscriber = events.subscribe()
+        try:
+            while True:
+                try:
+                    message = subscriber.get(timeout=DAEMON_KEEPALIVE)
+                except queue.Empty:
+                    message = b": keepalive\n\n"
+                if message is None:
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            events.unsubscribe(subscriber)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger = self.download_daemon.controller.logger
+        if logger:
+            logger.debug(f"{self.address_string()} {format % args}")
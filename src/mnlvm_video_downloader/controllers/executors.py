@@ -0,0 +1,290 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from multiprocessing.queues import SimpleQueue
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadCancelled
+from controllers.control import ControlCheckPP, ControlTable, control_check_hook
+from controllers.results import extract_and_download, iter_download_results
+from utils.bandwidth import BandwidthLimiter, throttle_hook
+from utils.cache import CacheStats, MetadataCache
+from utils.fragments import FragmentBudget, FragmentPlanPP, FragmentTuner
+from utils.integrity import ContentHashPP, StreamHasher
+from utils.staging import (
+    AtomicPublishPP,
+    FreeSpaceCheckPP,
+    StagingArea,
+    preallocation_hook,
+)
+from utils.utils import clean_percent_str
+
+# ``(job_id, fraction, done, total, speed)``; see ``progress_event``.
+ProgressEvent = Tuple[int, float, int, int, float]
+# A ``None`` tells the controller's reader thread to stop.
+ProgressQueue = SimpleQueue[Optional[ProgressEvent]]
+
+# Set in each worker process by ``_init_worker``; progress events are sent
+# through it as small tuples (see ``progress_event``) instead of callbacks.
+_progress_queue: Optional[ProgressQueue] = None
+# Shared with the parent so it can pause or cancel jobs running here.
+_control_table: Optional[ControlTable] = None
+# Shared bandwidth budget; every worker throttles against the same buckets.
+_limiter: Optional[BandwidthLimiter] = None
+# Shared connection budget split among the jobs of every worker.
+_fragment_budget: Optional[FragmentBudget] = None
+
+
+def _init_worker(
+    progress_queue: ProgressQueue,
+    control_table: Optional[ControlTable] = None,
+    limiter: Optional[BandwidthLimiter] = None,
+    fragment_budget: Optional[FragmentBudget] = None,
+) -> None:
+    global _progress_queue, _control_table, _limiter, _fragment_budget
+    _progress_queue = progress_queue
+    _control_table = control_table
+    _limiter = limiter
+    _fragment_budget = fragment_budget
+
+
+def progress_fraction(d: Dict[str, Any]) -> float:
+    raw_percent = d.get("_percent_str", "0.0%")
+    return float(clean_percent_str(raw_percent)) / 100.0
+
+
+def progress_event(job_id: int, d: Dict[str, Any]) -> ProgressEvent:
+    """Reduce a yt-dlp progress dict to ``(job_id, fraction, done, total, speed)``."""
+    return (
+        job_id,
+        progress_fraction(d),
+        int(d.get("downloaded_bytes") or 0),
+        int(d.get("total_bytes") or d.get("total_bytes_estimate") or 0),
+        float(d.get("speed") or 0.0),
+    )
+
+
+def compact_info(info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Keep only the fields the controller reads from an ``extract_info`` result.
+
+    Full info dicts carry every format, thumbnail and subtitle entry, which is
+    expensive to pickle back from a worker process.
+    """
+    if info is None:
+        return None
+
+    compact = _compact_entry(info)
+    if info.get("entries") is not None:
+        compact["entries"] = [
+            _compact_entry(entry) if entry else None for entry in info["entries"]
+        ]
+    return compact
+
+
+def _compact_entry(info: Dict[str, Any]) -> Dict[str, Any]:
+    compact = {"title": info.get("title")}
+    filepath = final_filepath(info)
+    if filepath:
+        compact["filepath"] = filepath
+    content_hash = _final_download(info).get("content_hash")
+    if content_hash:
+        compact["content_hash"] = content_hash
+    return compact
+
+
+def _final_download(info: Dict[str, Any]) -> Dict[str, Any]:
+    downloads = info.get("requested_downloads")
+    return downloads[-1] if downloads else info
+
+
+def final_filepath(info: Dict[str, Any]) -> Optional[str]:
+    """Path of the file yt-dlp wrote, after merging, renaming and publishing."""
+    return _final_download(info).get("filepath")
+
+
+def output_files(result: Any) -> List[Tuple[str, Optional[str]]]:
+    """``(filepath, content_hash)`` of every file in a ``DownloadOutcome.result``."""
+    if not result:
+        return []
+    if isinstance(result, list):
+        entries = [
+            {"filepath": r.filepath, "content_hash": r.content_hash} for r in result
+        ]
+    elif result.get("entries") is not None:
+        entries = [entry for entry in result["entries"] if entry]
+    else:
+        entries = [result]
+    return [
+        (entry["filepath"], entry.get("content_hash"))
+        for entry in entries
+        if entry.get("filepath")
+    ]
+
+
+def _queue_progress_hook(job: "DownloadJob") -> Callable[[Dict[str, Any]], None]:
+    def progress_hook(d: Dict[str, Any]) -> None:
+        _check_control(job)
+        if d["status"] == "downloading" and _progress_queue is not None:
+            try:
+                _progress_queue.put(progress_event(job.job_id, d))
+            except Exception as e:
+                print("Progress parse error:", e)
+
+    return progress_hook
+
+
+def _check_control(job: "DownloadJob") -> None:
+    if _control_table is not None and job.control_slot is not None:
+        _control_table.check_slot(job.control_slot, job.job_id)
+
+
+def _job_priority(job: "DownloadJob") -> int:
+    if _control_table is None or job.control_slot is None:
+        return 0
+    return _control_table.slot_priority(job.control_slot)
+
+
+def _worker_hooks(job: "DownloadJob") -> List[Callable[[Dict[str, Any]], None]]:
+    hooks = [_queue_progress_hook(job)]
+    if _limiter is not None:
+        hooks.append(
+            throttle_hook(
+                _limiter,
+                partial(_job_priority, job),
+                partial(_check_control, job),
+            )
+        )
+    return hooks
+
+
+class DownloadJob(NamedTuple):
+    job_id: int
+    url: str
+    options: Dict[str, Any]
+    low_memory: bool = False
+    staging: Optional[StagingArea] = None
+    cache: Optional[MetadataCache] = None
+    # Thread mode only; worker processes use the table from ``_init_worker``.
+    control: Optional[ControlTable] = None
+    # Hash the output while it is written so the controller can check it.
+    verify: bool = False
+    # Thread mode only, like ``control``.
+    fragments: Optional[FragmentBudget] = None
+    # Process mode: the job's slot in the shared control table, if it got one.
+    control_slot: Optional[int] = None
+
+
+class DownloadOutcome(NamedTuple):
+    """What a finished job sends back to the controller.
+
+    ``result`` is a compact info dict, or a list of ``DownloadResult``
+    records in low-memory mode.
+    """
+
+    result: Any
+    cache_hits: int = 0
+    cache_misses: int = 0
+    seconds_saved: float = 0.0
+
+
+def _job_check(job: DownloadJob) -> Callable[[], None]:
+    if job.control is not None:
+        return partial(job.control.check, job.job_id)
+    return partial(_check_control, job)
+
+
+def execute_download(
+    job: DownloadJob, progress_hooks: List[Callable[[Dict[str, Any]], None]]
+) -> DownloadOutcome:
+    """Run yt-dlp for one job; shared by the thread and process backends."""
+    options = dict(job.options)
+    hooks = list(progress_hooks)
+    staging = job.staging
+    job_dir = None
+    if staging is not None:
+        job_dir = staging.job_dir(job.url)
+        options["paths"] = {**options.get("paths", {}), "temp": str(job_dir)}
+        hooks.append(preallocation_hook())
+    hasher = StreamHasher() if job.verify else None
+    if hasher is not None:
+        hooks.append(hasher)
+    budget = job.fragments if job.fragments is not None else _fragment_budget
+    tuner = FragmentTuner(budget, job.job_id) if budget is not None else None
+    if tuner is not None:
+        hooks.append(tuner)
+    options["progress_hooks"] = hooks
+    check = _job_check(job)
+    options["postprocessor_hooks"] = [
+        *options.get("postprocessor_hooks", ()),
+        control_check_hook(check),
+    ]
+
+    try:
+        with YoutubeDL(options) as ydl:
+            for when in ("pre_process", "before_dl"):
+                ydl.add_post_processor(ControlCheckPP(check), when=when)
+            if tuner is not None:
+                tuner.params = ydl.params
+                ydl.add_post_processor(FragmentPlanPP(tuner), when="before_dl")
+            if hasher is not None:
+                # Before publishing, so the streamed digest is found by its path.
+                ydl.add_post_processor(ContentHashPP(hasher), when="post_process")
+            if staging is not None:
+                ydl.add_post_processor(FreeSpaceCheckPP(staging), when="before_dl")
+                ydl.add_post_processor(AtomicPublishPP(staging), when="post_process")
+            stats = CacheStats()
+            result: Any
+            if job.low_memory:
+                result = list(iter_download_results(ydl, job.url, job.cache, stats))
+            else:
+                result = compact_info(
+                    extract_and_download(ydl, job.url, job.cache, stats)
+                )
+    finally:
+        if tuner is not None:
+            tuner.close()
+
+    if staging is not None and job_dir is not None and result:
+        staging.release(job_dir)
+    return DownloadOutcome(result, stats.hits, stats.misses, stats.seconds_saved)
+
+
+def run_download(
+    job: DownloadJob,
+) -> Tuple[int, Optional[DownloadOutcome], Optional[str]]:
+    """Download one URL inside a worker process.
+
+    Returns ``(job_id, result, error)`` so failures are reported by the
+    parent exactly like in thread mode. A paused or cancelled job returns
+    neither; the parent reads the reason from its control table.
+    """
+    try:
+        return (
+            job.job_id,
+            execute_download(job, _worker_hooks(job)),
+            None,
+        )
+    except DownloadCancelled:
+        return job.job_id, None, None
+    except Exception as e:
+        return job.job_id, None, str(e)
+
+
+def create_process_executor(
+    max_workers: int,
+    progress_queue: ProgressQueue,
+    control_table: Optional[ControlTable] = None,
+    limiter: Optional[BandwidthLimiter] = None,
+    fragment_budget: Optional[FragmentBudget] = None,
+) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers,
+        mp_context=get_context(),
+        initializer=_init_worker,
+        initargs=(progress_queue, control_table, limiter, fragment_budget),
+    )
+
+
+def create_progress_queue() -> ProgressQueue:
+    return get_context().SimpleQueue()
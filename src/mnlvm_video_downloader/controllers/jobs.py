@@ -0,0 +1,269 @@
+import threading
+import time
+from array import array
+from enum import IntEnum
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+
+class JobStatus(IntEnum):
+    QUEUED = 0
+    RUNNING = 1
+    COMPLETED = 2
+    FAILED = 3
+    SKIPPED = 4
+    CANCELLED = 5
+    PAUSED = 6
+
+
+FINISHED_STATUSES = (
+    JobStatus.COMPLETED,
+    JobStatus.FAILED,
+    JobStatus.SKIPPED,
+    JobStatus.CANCELLED,
+)
+
+NO_OUTPUT = -1
+
+# Fraction of a batch that has finished.
+ProgressCallback = Callable[[float], None]
+# Job ID and the fraction of that job downloaded.
+IndividualProgressCallback = Callable[[int, float], None]
+
+
+class JobRecord(NamedTuple):
+    job_id: int
+    url: str
+    status: JobStatus
+    bytes_done: int
+    bytes_total: int
+    speed: float
+    started_at: float
+    finished_at: float
+    output_path: Optional[str]
+    priority: int = 0
+
+    @property
+    def fraction(self) -> float:
+        if self.status == JobStatus.COMPLETED:
+            return 1.0
+        if self.bytes_total <= 0:
+            return 0.0
+        return min(self.bytes_done / self.bytes_total, 1.0)
+
+
+class JobSnapshot:
+    """Point-in-time copy of a ``JobStore``.
+
+    Columns are copied as flat arrays, so taking a snapshot of 100k jobs is a
+    handful of memcpy calls and readers never touch the live store.
+    """
+
+    __slots__ = (
+        "_urls",
+        "_paths",
+        "_status",
+        "_bytes_done",
+        "_bytes_total",
+        "_speed",
+        "_started",
+        "_finished",
+        "_path_index",
+        "_priority",
+        "counts",
+        "cache_hits",
+        "cache_misses",
+        "extraction_seconds_saved",
+        "bytes_reclaimed",
+        "taken_at",
+    )
+
+    def __init__(self, store: "JobStore") -> None:
+        self._urls = store._urls[:]
+        self._paths = store._paths[:]
+        self._status = store._status[:]
+        self._bytes_done = store._bytes_done[:]
+        self._bytes_total = store._bytes_total[:]
+        self._speed = store._speed[:]
+        self._started = store._started[:]
+        self._finished = store._finished[:]
+        self._path_index = store._path_index[:]
+        self._priority = store._priority[:]
+        self.counts: Dict[JobStatus, int] = {
+            status: store._counts[status] for status in JobStatus
+        }
+        self.cache_hits = store._cache_hits
+        self.cache_misses = store._cache_misses
+        self.extraction_seconds_saved = store._seconds_saved
+        self.bytes_reclaimed = store._bytes_reclaimed
+        self.taken_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __getitem__(self, job_id: int) -> JobRecord:
+        path_index = self._path_index[job_id]
+        return JobRecord(
+            job_id=job_id,
+            url=self._urls[job_id],
+            status=JobStatus(self._status[job_id]),
+            bytes_done=self._bytes_done[job_id],
+            bytes_total=self._bytes_total[job_id],
+            speed=self._speed[job_id],
+            started_at=self._started[job_id],
+            finished_at=self._finished[job_id],
+            output_path=None if path_index == NO_OUTPUT else self._paths[path_index],
+            priority=self._priority[job_id],
+        )
+
+    def __iter__(self) -> Iterator[JobRecord]:
+        for job_id in range(len(self)):
+            yield self[job_id]
+
+    def changed_since(self, previous: Optional["JobSnapshot"]) -> Iterator[int]:
+        """IDs of jobs added, or whose status, progress or priority moved."""
+        start = 0
+        if previous is not None:
+            start = len(previous)
+            rows = zip(
+                zip(self._status, self._bytes_done, self._priority),
+                zip(previous._status, previous._bytes_done, previous._priority),
+            )
+            for job_id, (row, old_row) in enumerate(rows):
+                if row != old_row:
+                    yield job_id
+        yield from range(start, len(self))
+
+    @property
+    def finished(self) -> int:
+        return sum(self.counts[status] for status in FINISHED_STATUSES)
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    @property
+    def total_speed(self) -> float:
+        running = JobStatus.RUNNING
+        return sum(
+            speed
+            for status, speed in zip(self._status, self._speed)
+            if status == running
+        )
+
+
+class JobStore:
+    """Array-backed state table with one row per download job.
+
+    Each column is a typed ``array`` so a row costs a few dozen bytes plus
+    the URL string. Writers take one uncontended lock per update, which keeps
+    ``snapshot()`` consistent across columns.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._urls: List[str] = []
+        self._ids_by_url: Dict[str, int] = {}
+        self._paths: List[str] = []
+        self._status = array("b")
+        self._bytes_done = array("q")
+        self._bytes_total = array("q")
+        self._speed = array("d")
+        self._started = array("d")
+        self._finished = array("d")
+        self._path_index = array("i")
+        self._priority = array("i")
+        self._counts = [0] * len(JobStatus)
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._seconds_saved = 0.0
+        self._bytes_reclaimed = 0
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def add(self, url: str, priority: int = 0) -> int:
+        with self._lock:
+            job_id = len(self._urls)
+            self._urls.append(url)
+            self._ids_by_url[url] = job_id
+            self._status.append(JobStatus.QUEUED)
+            self._bytes_done.append(0)
+            self._bytes_total.append(0)
+            self._speed.append(0.0)
+            self._started.append(0.0)
+            self._finished.append(0.0)
+            self._path_index.append(NO_OUTPUT)
+            self._priority.append(priority)
+            self._counts[JobStatus.QUEUED] += 1
+        return job_id
+
+    def job_id(self, url: str) -> Optional[int]:
+        """Return the most recent job submitted for ``url``."""
+        return self._ids_by_url.get(url)
+
+    def url(self, job_id: int) -> str:
+        return self._urls[job_id]
+
+    def status(self, job_id: int) -> JobStatus:
+        return JobStatus(self._status[job_id])
+
+    def set_status(self, job_id: int, status: JobStatus) -> None:
+        now = time.time()
+        with self._lock:
+            previous = self._status[job_id]
+            if previous == status:
+                return
+            self._status[job_id] = status
+            self._counts[previous] -= 1
+            self._counts[status] += 1
+            if status == JobStatus.RUNNING:
+                self._started[job_id] = now
+            elif status in FINISHED_STATUSES:
+                self._finished[job_id] = now
+                self._speed[job_id] = 0.0
+            elif status == JobStatus.PAUSED:
+                self._speed[job_id] = 0.0
+
+    def priority(self, job_id: int) -> int:
+        return self._priority[job_id]
+
+    def set_priority(self, job_id: int, priority: int) -> None:
+        with self._lock:
+            self._priority[job_id] = priority
+
+    def update_progress(
+        self, job_id: int, bytes_done: int, bytes_total: int, speed: float
+    ) -> None:
+        with self._lock:
+            self._bytes_done[job_id] = bytes_done
+            if bytes_total:
+                self._bytes_total[job_id] = bytes_total
+            self._speed[job_id] = speed
+
+    def set_output_path(self, job_id: int, path: str) -> None:
+        with self._lock:
+            self._path_index[job_id] = len(self._paths)
+            self._paths.append(path)
+
+    def record_cache_use(self, hits: int, misses: int, seconds_saved: float) -> None:
+        """Account metadata cache lookups made while running a job."""
+        with self._lock:
+            self._cache_hits += hits
+            self._cache_misses += misses
+            self._seconds_saved += seconds_saved
+
+    def record_dedup(self, bytes_reclaimed: int) -> None:
+        """Account space freed by hardlinking duplicate outputs."""
+        with self._lock:
+            self._bytes_reclaimed += bytes_reclaimed
+
+    def count(self, *statuses: JobStatus) -> int:
+        return sum(self._counts[status] for status in statuses)
+
+    def finished_count(self) -> int:
+        return self.count(*FINISHED_STATUSES)
+
+    def snapshot(self) -> JobSnapshot:
+        with self._lock:
+            return JobSnapshot(self)
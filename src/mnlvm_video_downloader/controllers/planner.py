@@ -0,0 +1,197 @@
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.constants import (
+    PLAN_INITIAL_THROUGHPUT,
+    PLAN_THROUGHPUT_SMOOTHING,
+    QUALITY_LADDER,
+)
+
+DEFAULT_FORMAT = (
+    "bestvideo[ext=mp4][height<=2160]+bestaudio[ext=m4a]/bestvideo+bestaudio/best"
+)
+
+
+def format_selector(max_height: Optional[int] = None) -> str:
+    """yt-dlp format string capped at ``max_height``; None keeps the default."""
+    if max_height is None:
+        return DEFAULT_FORMAT
+    return (
+        f"bestvideo[ext=mp4][height<={max_height}]+bestaudio[ext=m4a]"
+        f"/bestvideo[height<={max_height}]+bestaudio"
+        f"/best[height<={max_height}]/worst"
+    )
+
+
+def _format_size(fmt: Dict[str, Any], duration: Optional[float]) -> Optional[float]:
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return float(size)
+    if fmt.get("tbr") and duration:
+        return float(fmt["tbr"]) * 1000 / 8 * duration
+    return None
+
+
+def _best(formats: List[Dict[str, Any]], ext: str) -> Optional[Dict[str, Any]]:
+    """Pick like the format string does: the preferred extension first."""
+    preferred = [fmt for fmt in formats if fmt.get("ext") == ext] or formats
+    if not preferred:
+        return None
+    return max(preferred, key=lambda fmt: (fmt.get("height") or 0, fmt.get("tbr") or 0))
+
+
+def estimate_sizes(
+    formats: Iterable[Dict[str, Any]],
+    duration: Optional[float],
+    ladder: Iterable[int] = QUALITY_LADDER,
+) -> Dict[int, float]:
+    """Expected download size in bytes for each height cap of ``ladder``.
+
+    Mirrors ``format_selector``: the best video-only stream under the cap
+    plus the best audio stream, else the best muxed format under the cap.
+    Caps no format fits, or whose formats carry no size, are left out.
+    """
+    formats = list(formats)
+    video_only = [
+        fmt
+        for fmt in formats
+        if fmt.get("vcodec") not in (None, "none") and fmt.get("acodec") == "none"
+    ]
+    audio_only = [
+        fmt
+        for fmt in formats
+        if fmt.get("acodec") not in (None, "none") and fmt.get("vcodec") == "none"
+    ]
+    muxed = [
+        fmt
+        for fmt in formats
+        if fmt.get("vcodec") not in (None, "none")
+        and fmt.get("acodec") not in (None, "none")
+    ]
+    audio = _best(audio_only, "m4a")
+    audio_size = _format_size(audio, duration) if audio else None
+
+    sizes = {}
+    for height in ladder:
+        fitting = [fmt for fmt in video_only if (fmt.get("height") or 0) <= height]
+        video = _best(fitting, "mp4")
+        if video is not None and audio_size is not None:
+            video_size = _format_size(video, duration)
+            if video_size is not None:
+                sizes[height] = video_size + audio_size
+                continue
+        single = _best([f for f in muxed if (f.get("height") or 0) <= height], "mp4")
+        size = _format_size(single, duration) if single else None
+        if size is not None:
+            sizes[height] = size
+    return sizes
+
+
+class BatchPlan:
+    """Choose a height cap per job so a whole batch fits a deadline or budget.
+
+    Each job is planned when it starts, against what is left of the budget:
+    the bytes the measured throughput can still move before the deadline,
+    minus what running jobs have yet to fetch, and/or the byte budget minus
+    what started jobs committed to. The cap is the highest rung at which
+    every job not yet started still fits, so later jobs are re-planned as
+    throughput changes. A resumed job keeps its first choice so yt-dlp can
+    continue its partial file.
+
+    Jobs are planned on executor threads and finished on the event loop, so
+    every method holds the plan's lock.
+    """
+
+    def __init__(
+        self,
+        job_ids: Iterable[int],
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+        throughput: Optional[float] = None,
+        ladder: Iterable[int] = QUALITY_LADDER,
+    ) -> None:
+        self.ladder = sorted(ladder, reverse=True)
+        self.deadline_at = time.monotonic() + deadline if deadline else None
+        self.byte_budget = byte_budget
+        self.throughput = throughput or PLAN_INITIAL_THROUGHPUT
+        self.committed = 0.0
+        self.sizes: Dict[int, Dict[int, float]] = {}
+        self.choices: Dict[int, int] = {}
+        self._pending = set(job_ids)
+        self._running: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def set_sizes(self, job_id: int, sizes: Dict[int, float]) -> None:
+        if sizes:
+            with self._lock:
+                self.sizes[job_id] = sizes
+
+    def observe(self, throughput: float) -> None:
+        """Fold a measured total speed of the batch into the estimate."""
+        if throughput > 0:
+            alpha = PLAN_THROUGHPUT_SMOOTHING
+            with self._lock:
+                self.throughput = alpha * throughput + (1 - alpha) * self.throughput
+
+    def _size(self, job_id: int, height: int) -> float:
+        sizes = self.sizes.get(job_id)
+        if sizes is None:
+            # Unknown jobs are assumed to be as large as the average known one.
+            known = [s[height] for s in self.sizes.values() if height in s]
+            return sum(known) / len(known) if known else 0.0
+        fitting = [size for rung, size in sizes.items() if rung <= height]
+        return sizes.get(height, max(fitting, default=0.0))
+
+    def _available(self, in_flight_done: Dict[int, int], now: float) -> float:
+        """Bytes that the jobs not started yet may still use."""
+        available = math.inf
+        if self.byte_budget is not None:
+            available = self.byte_budget - self.committed
+        if self.deadline_at is not None:
+            in_flight = sum(
+                max(size - in_flight_done.get(job_id, 0), 0.0)
+                for job_id, size in self._running.items()
+            )
+            movable = self.throughput * max(self.deadline_at - now, 0.0)
+            available = min(available, movable - in_flight)
+        return available
+
+    @property
+    def running(self) -> List[int]:
+        with self._lock:
+            return list(self._running)
+
+    def choose(
+        self,
+        job_id: int,
+        in_flight_done: Optional[Dict[int, int]] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """Height cap for ``job_id``, which is about to start."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if job_id in self.choices:
+                return self.choices[job_id]
+            available = self._available(in_flight_done or {}, now)
+            choice = self.ladder[-1]
+            for height in self.ladder:
+                if sum(self._size(job, height) for job in self._pending) <= available:
+                    choice = height
+                    break
+            self._pending.discard(job_id)
+            size = self._size(job_id, choice)
+            self.committed += size
+            self._running[job_id] = size
+            self.choices[job_id] = choice
+            return choice
+
+    def planned_size(self, job_id: int) -> float:
+        """Bytes ``job_id`` is expected to download at its chosen height."""
+        with self._lock:
+            return self._running.get(job_id, 0.0)
+
+    def finish(self, job_id: int) -> None:
+        with self._lock:
+            self._running.pop(job_id, None)
@@ -0,0 +1,177 @@
+import os
+import time
+from typing import Any, Dict, Iterator, Optional, cast
+
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadCancelled
+from utils.cache import CacheStats, MetadataCache, download_cached, video_id_from_url
+
+TRANSPARENT_SKIP_KEYS = ("_type", "url", "ie_key")
+
+
+class DownloadResult:
+    """Compact record of one finished download.
+
+    Low-memory mode keeps these instead of yt-dlp info dicts, which carry
+    every format, thumbnail and subtitle entry.
+    """
+
+    __slots__ = (
+        "video_id",
+        "title",
+        "filepath",
+        "filesize",
+        "duration",
+        "content_hash",
+    )
+
+    def __init__(
+        self,
+        video_id: Optional[str],
+        title: Optional[str],
+        filepath: Optional[str],
+        filesize: Optional[int],
+        duration: Optional[float],
+        content_hash: Optional[str] = None,
+    ) -> None:
+        self.video_id = video_id
+        self.title = title
+        self.filepath = filepath
+        self.filesize = filesize
+        self.duration = duration
+        self.content_hash = content_hash
+
+    def __repr__(self) -> str:
+        return f"DownloadResult(video_id={self.video_id!r}, filepath={self.filepath!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DownloadResult):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    @classmethod
+    def from_info(cls, info: Dict[str, Any]) -> "DownloadResult":
+        filepath = content_hash = None
+        requested = info.get("requested_downloads")
+        if requested:
+            filepath = requested[-1].get("filepath")
+            content_hash = requested[-1].get("content_hash")
+        filepath = filepath or info.get("filepath") or info.get("_filename")
+        content_hash = content_hash or info.get("content_hash")
+
+        filesize = None
+        if filepath and os.path.exists(filepath):
+            filesize = os.path.getsize(filepath)
+        if filesize is None:
+            filesize = info.get("filesize") or info.get("filesize_approx")
+
+        return cls(
+            video_id=info.get("id"),
+            title=info.get("title"),
+            filepath=filepath,
+            filesize=filesize,
+            duration=info.get("duration"),
+            content_hash=content_hash,
+        )
+
+
+def extract_and_download(
+    ydl: YoutubeDL,
+    url: str,
+    cache: Optional[MetadataCache] = None,
+    stats: Optional[CacheStats] = None,
+) -> Optional[Dict[str, Any]]:
+    """``extract_info(url, download=True)`` that reuses cached video metadata."""
+    video_id = video_id_from_url(url) if cache is not None else None
+    if cache is None or video_id is None:
+        return cast(Optional[Dict[str, Any]], ydl.extract_info(url, download=True))
+
+    stats = stats if stats is not None else CacheStats()
+    info = download_cached(ydl, cache, video_id, stats)
+    if info is not None:
+        return info
+
+    started = time.perf_counter()
+    info = ydl.extract_info(url, download=False)
+    if info is None:
+        return None
+    stats.misses += 1
+    cache.put(info, time.perf_counter() - started)
+    return cast(Optional[Dict[str, Any]], ydl.process_ie_result(info, download=True))
+
+
+def iter_download_results(
+    ydl: YoutubeDL,
+    url: str,
+    cache: Optional[MetadataCache] = None,
+    stats: Optional[CacheStats] = None,
+) -> Iterator[DownloadResult]:
+    """Download ``url`` entry by entry, yielding a compact record for each.
+
+    Playlists are extracted without processing so their entries stay a lazy
+    generator; each video is then processed and downloaded on its own and its
+    info dict is dropped before the next entry is fetched.
+    """
+    stats = stats if stats is not None else CacheStats()
+    video_id = video_id_from_url(url) if cache is not None else None
+    if video_id is not None:
+        ie_result = {"_type": "url", "url": url, "id": video_id, "ie_key": "Youtube"}
+    else:
+        ie_result = ydl.extract_info(url, download=False, process=False)
+    yield from _iter_results(ydl, ie_result, cache, stats)
+
+
+def _iter_results(
+    ydl: YoutubeDL,
+    ie_result: Optional[Dict[str, Any]],
+    cache: Optional[MetadataCache],
+    stats: CacheStats,
+) -> Iterator[DownloadResult]:
+    if not ie_result:
+        return
+
+    result_type = ie_result.get("_type", "video")
+    if result_type in ("playlist", "multi_video"):
+        for entry in ie_result.get("entries") or ():
+            try:
+                yield from _iter_results(ydl, entry, cache, stats)
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                # yt-dlp's own playlist walk skips failed entries the same way.
+                if not ydl.params.get("ignoreerrors"):
+                    raise
+                ydl.report_error(f"Skipping playlist entry: {e}")
+        return
+
+    if result_type in ("url", "url_transparent"):
+        if cache is not None:
+            info = download_cached(ydl, cache, ie_result.get("id"), stats)
+            if info is not None:
+                yield DownloadResult.from_info(info)
+                return
+
+        started = time.perf_counter()
+        resolved = ydl.extract_info(
+            ie_result["url"],
+            download=False,
+            process=False,
+            ie_key=ie_result.get("ie_key"),
+        )
+        if resolved and result_type == "url_transparent":
+            resolved.update(
+                (key, value)
+                for key, value in ie_result.items()
+                if value is not None and key not in TRANSPARENT_SKIP_KEYS
+            )
+        if cache is not None and resolved and resolved.get("_type", "video") == "video":
+            stats.misses += 1
+            cache.put(resolved, time.perf_counter() - started)
+        yield from _iter_results(ydl, resolved, cache, stats)
+        return
+
+    info = ydl.process_ie_result(ie_result, download=True)
+    if info:
+        yield DownloadResult.from_info(info)
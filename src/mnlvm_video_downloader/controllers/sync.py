@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from yt_dlp import YoutubeDL
+from controllers.jobs import JobStatus
+from utils.constants import PLAYLIST_SNAPSHOT_DIRNAME
+from utils.utils import create_dir, safe_path_string
+
+FLAT_PLAYLIST_OPTIONS: Dict[str, Any] = {
+    "quiet": True,
+    "extract_flat": "in_playlist",
+    "lazy_playlist": True,
+    "ignoreerrors": True,
+}
+
+
+def playlist_fingerprint(entry_ids: List[str]) -> str:
+    return hashlib.sha1("\n".join(entry_ids).encode("utf8")).hexdigest()
+
+
+class PlaylistSnapshot(NamedTuple):
+    """State of a playlist after its last successful sync."""
+
+    playlist_id: str
+    entry_ids: List[str]
+    fingerprint: str
+    files: Dict[str, str]
+    synced_at: float
+
+    @classmethod
+    def empty(cls, playlist_id: str) -> "PlaylistSnapshot":
+        return cls(playlist_id, [], playlist_fingerprint([]), {}, 0.0)
+
+
+class SyncResult(NamedTuple):
+    playlist_id: str
+    added: List[str]
+    failed: List[str]
+    removed: List[str]
+    pruned: List[str]
+    unchanged: bool
+
+
+class PlaylistSync:
+    """Mirror a playlist incrementally.
+
+    Each run fetches only the flat entry list, diffs it against the snapshot
+    stored under ``PathHolder.data_path`` and queues just the new entries.
+    """
+
+    def __init__(self, controller: Any, snapshot_dir: Optional[Path] = None) -> None:
+        self.controller = controller
+        if snapshot_dir is None:
+            snapshot_dir = controller.path_holder.data_path / PLAYLIST_SNAPSHOT_DIRNAME
+        self.snapshot_dir = Path(snapshot_dir)
+        create_dir(self.snapshot_dir)
+
+    def _snapshot_path(self, playlist_id: str) -> Path:
+        return self.snapshot_dir / f"{safe_path_string(playlist_id)}.json"
+
+    def load_snapshot(self, playlist_id: str) -> PlaylistSnapshot:
+        try:
+            with open(self._snapshot_path(playlist_id), encoding="utf8") as file:
+                return PlaylistSnapshot(**json.load(file))
+        except (OSError, ValueError, TypeError):
+            return PlaylistSnapshot.empty(playlist_id)
+
+    def save_snapshot(self, snapshot: PlaylistSnapshot) -> None:
+        path = self._snapshot_path(snapshot.playlist_id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf8") as file:
+            json.dump(snapshot._asdict(), file)
+        os.replace(tmp_path, path)
+
+    def fetch_entries(self, url: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Return the playlist ID and its ordered ``(entry_id, entry_url)`` pairs."""
+        options = dict(FLAT_PLAYLIST_OPTIONS)
+        if self.controller.cookies_file:
+            options["cookiefile"] = self.controller.cookies_file
+        with YoutubeDL(options) as ydl:
+            info = ydl.extract_info(url, download=False)
+        if not info:
+            raise ValueError(f"Could not fetch playlist entries for {url}")
+
+        entries = []
+        for entry in info.get("entries") or ():
+            if not entry or not entry.get("id"):
+                continue
+            entry_url = (
+                entry.get("url") or f"https://www.youtube.com/watch?v={entry['id']}"
+            )
+            entries.append((entry["id"], entry_url))
+        return info.get("id") or url, entries
+
+    def sync(self, url: str, prune: bool = False) -> SyncResult:
+        playlist_id, entries = self.fetch_entries(url)
+        entry_ids = [entry_id for entry_id, _ in entries]
+        snapshot = self.load_snapshot(playlist_id)
+        current = set(entry_ids)
+        stale_files = any(entry_id not in current for entry_id in snapshot.files)
+        if playlist_fingerprint(entry_ids) == snapshot.fingerprint and not (
+            prune and stale_files
+        ):
+            return SyncResult(playlist_id, [], [], [], [], unchanged=True)
+
+        known = set(snapshot.entry_ids)
+        new_entries = [
+            (entry_id, u) for entry_id, u in entries if entry_id not in known
+        ]
+        removed = [
+            entry_id for entry_id in snapshot.entry_ids if entry_id not in current
+        ]
+
+        added, failed, files = self._download_new(new_entries, snapshot.files)
+        pruned = self._prune(playlist_id, current, files) if prune else []
+
+        # Failed entries stay out of the snapshot so the next run retries them.
+        synced = set(added) | (known & current)
+        synced_ids = [entry_id for entry_id in entry_ids if entry_id in synced]
+        self.save_snapshot(
+            PlaylistSnapshot(
+                playlist_id=playlist_id,
+                entry_ids=synced_ids,
+                fingerprint=playlist_fingerprint(synced_ids),
+                files=files,
+                synced_at=time.time(),
+            )
+        )
+        return SyncResult(playlist_id, added, failed, removed, pruned, unchanged=False)
+
+    def _download_new(
+        self, new_entries: List[Tuple[str, str]], files: Dict[str, str]
+    ) -> Tuple[List[str], List[str], Dict[str, str]]:
+        files = dict(files)
+        added: List[str] = []
+        failed: List[str] = []
+        if not new_entries:
+            return added, failed, files
+
+        job_ids = self.controller.run_batch([entry_url for _, entry_url in new_entries])
+        snapshot = self.controller.jobs.snapshot()
+        for (entry_id, _), job_id in zip(new_entries, job_ids):
+            record = snapshot[job_id]
+            if record.status == JobStatus.COMPLETED:
+                added.append(entry_id)
+                if record.output_path:
+                    files[entry_id] = record.output_path
+            else:
+                failed.append(entry_id)
+        return added, failed, files
+
+    def _prune(
+        self, playlist_id: str, current: Set[str], files: Dict[str, str]
+    ) -> List[str]:
+        """Delete files of every entry no longer in the playlist.
+
+        Works from ``files`` rather than the latest diff so entries removed
+        during earlier runs without pruning are cleaned up too. A video that
+        is also part of another mirrored playlist keeps its file.
+        """
+        pruned = [entry_id for entry_id in files if entry_id not in current]
+        if not pruned:
+            return pruned
+        shared = self._files_of_other_playlists(playlist_id)
+        for entry_id in pruned:
+            path = files.pop(entry_id)
+            if os.path.abspath(path) in shared:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return pruned
+
+    def _files_of_other_playlists(self, playlist_id: str) -> Set[str]:
+        own = self._snapshot_path(playlist_id)
+        files: Set[str] = set()
+        for path in self.snapshot_dir.glob("*.json"):
+            if path == own:
+                continue
+            try:
+                with open(path, encoding="utf8") as file:
+                    other = json.load(file).get("files") or {}
+            except (OSError, ValueError, AttributeError):
+                continue
+            files.update(os.path.abspath(p) for p in other.values())
+        return files
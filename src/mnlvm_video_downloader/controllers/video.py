@@ -1,23 +1,89 @@
 import asyncio
-import csv
-from concurrent.futures import ThreadPoolExecutor
+import weakref
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 import subprocess
-import customtkinter
+import threading
+import time
 import validators
 from yt_dlp import YoutubeDL
-from exceptions import FFmpegNotInstalledError
-from multiprocessing import cpu_count
-from multiprocessing.pool import ThreadPool
+from yt_dlp.utils import DownloadCancelled
+from exceptions import (
+    CorruptOutputError,
+    FFmpegNotInstalledError,
+    WorkerDownloadError,
+)
+from controllers.control import (
+    ControlCode,
+    ControlTable,
+    PrioritySlots,
+    resolve_future,
+)
+from controllers.executors import (
+    create_process_executor,
+    create_progress_queue,
+    DownloadJob,
+    DownloadOutcome,
+    execute_download,
+    output_files,
+    progress_event,
+    ProgressQueue,
+    run_download,
+)
+from controllers.jobs import (
+    FINISHED_STATUSES,
+    IndividualProgressCallback,
+    JobStatus,
+    JobStore,
+    ProgressCallback,
+)
+from controllers.planner import BatchPlan, estimate_sizes, format_selector
+from controllers.results import DownloadResult
+from controllers.sync import PlaylistSync, SyncResult
+from utils.bandwidth import BandwidthLimiter, throttle_hook
+from utils.cache import MetadataCache, video_id_from_url
+from utils.fragments import FragmentBudget
+from utils.constants import (
+    BULK_PRIORITY,
+    EXECUTION_BACKENDS,
+    INTEGRITY_WORKERS,
+    INTERACTIVE_PRIORITY,
+    MAX_CONNECTIONS,
+    METADATA_CACHE_DIRNAME,
+    PROCESS_BACKEND,
+    RESOLVE_BATCH,
+    THREAD_BACKEND,
+)
+from utils.ingest import CsvTracks
+from utils.integrity import ContentIndex, find_ffprobe, probe_media, quarantine
+from utils.staging import StagingArea
+from utils.volumes import Volume, VolumeSet
 from utils.utils import (
+    PathHolder,
     safe_path_string,
     clean_search_query,
     check_ffmpeg,
-    clean_percent_str,
 )
 
 
+T = TypeVar("T")
+
+
 class YouTubeDownloaderController:
     def __init__(
         self,
@@ -26,8 +92,29 @@ class YouTubeDownloaderController:
         logger: Any = None,
         browser: Optional[str] = "chrome",
         ffmpeg_path: Optional[str | Path] = "ffmpeg",
+        backend: str = THREAD_BACKEND,
+        low_memory: bool = False,
+        staging: bool = True,
+        metadata_cache: bool = True,
+        bandwidth_limit: Optional[float] = None,
+        verify_outputs: bool = True,
+        max_connections: int = MAX_CONNECTIONS,
+        output_dirs: Optional[Mapping[str | Path, float]] = None,
+        data_dir: Optional[str | Path] = None,
     ):
-        self.output_dir = Path(output_dir)
+        """``output_dirs``, mapping output roots to weights, replaces
+        ``output_dir`` to spread jobs over several disks (see ``VolumeSet``);
+        the first root holds the content index.
+
+        ``data_dir`` holds the metadata cache, playlist snapshots and temp
+        files; it defaults to the per-user application data directory.
+        """
+        if backend not in EXECUTION_BACKENDS:
+            raise ValueError(
+                f"backend must be one of {EXECUTION_BACKENDS}, got {backend!r}"
+            )
+        self.volumes = VolumeSet(output_dirs or {output_dir: 1.0})
+        self.output_dir = self.volumes.primary.root
         self.max_workers = max_workers
         self.logger = logger
         self.cookies_file = self._extract_cookies(browser) if browser else None
@@ -35,16 +122,65 @@ class YouTubeDownloaderController:
         self.is_processing = False
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.ffmpeg_path = self._validate_ffmpeg_path(ffmpeg_path)
+        self.backend = backend
+        self.low_memory = low_memory
+        self.jobs = JobStore()
+        self.controls = ControlTable(shared=backend == PROCESS_BACKEND)
+        self.limiter = BandwidthLimiter(
+            bandwidth_limit, shared=backend == PROCESS_BACKEND
+        )
+        self.fragments = FragmentBudget(
+            max_connections, shared=backend == PROCESS_BACKEND
+        )
+        self._batches: List[List[int]] = []
+        self.last_batch_id: Optional[int] = None
+        self._resume_waiters: Dict[int, Tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self._loop_slots: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, PrioritySlots
+        ] = weakref.WeakKeyDictionary()
+        self._inflight_urls: Dict[str, int] = {}
+        # Executor call each job is waiting on; see _in_worker.
+        self._workers: Dict[int, Future[Any]] = {}
+        self._inflight_lock = threading.Lock()
+        self._executor_lock = threading.Lock()
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue: Optional[ProgressQueue] = None
+        self.verify_outputs = verify_outputs
+        self.ffprobe_path = find_ffprobe(self.ffmpeg_path) if verify_outputs else None
+        self.content_index = self._library_index() if verify_outputs else None
+        self._integrity_executor = ThreadPoolExecutor(max_workers=INTEGRITY_WORKERS)
+        self._unverified: Dict[int, List[Tuple[str, Optional[str]]]] = {}
+        self._plans: Dict[int, BatchPlan] = {}
 
-        self._progress_callback = None
+        self._progress_callback: Optional[ProgressCallback] = None
+        self._individual_progress_callback: Optional[IndividualProgressCallback] = None
         self._current_downloads = 0
         self._total_downloads = 0
 
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.path_holder = PathHolder(data_dir)
+        self.staging = self._create_staging_areas() if staging else None
+        self.metadata_cache = (
+            MetadataCache(self.path_holder.data_path / METADATA_CACHE_DIRNAME)
+            if metadata_cache
+            else None
+        )
 
         if not check_ffmpeg() and self.ffmpeg_path == "ffmpeg":
             raise FFmpegNotInstalledError
 
+    def _create_staging_areas(self) -> Optional[StagingArea]:
+        """Give each volume its own staging area; returns the primary one."""
+        swept = 0
+        for volume in self.volumes:
+            volume.staging = StagingArea(volume.root, self.path_holder.get_temp_dir())
+            swept += volume.staging.sweep()
+        if swept and self.logger:
+            self.logger.info(f"Removed {swept} orphaned staging directories")
+        return self.volumes.primary.staging
+
+    def _library_index(self) -> ContentIndex:
+        return ContentIndex(self.output_dir, extra_roots=self.volumes.roots[1:])
+
     def _validate_ffmpeg_path(self, ffmpeg_path: Optional[str]) -> Optional[str]:
         if ffmpeg_path is None:
             try:
@@ -60,10 +196,12 @@ class YouTubeDownloaderController:
             return str(ffmpeg_path)
         return None
 
-    def set_progress_callback(self, callback):
+    def set_progress_callback(self, callback: ProgressCallback) -> None:
         self._progress_callback = callback
 
-    def set_individual_progress_callback(self, callback):
+    def set_individual_progress_callback(
+        self, callback: IndividualProgressCallback
+    ) -> None:
         self._individual_progress_callback = callback
 
     def _is_youtube_url(self, query: str) -> bool:
@@ -74,8 +212,9 @@ class YouTubeDownloaderController:
 
     def _get_ydl_options(self) -> Dict[str, Any]:
         options = {
-            "format": "bestvideo[ext=mp4][height<=2160]+bestaudio[ext=m4a]/bestvideo+bestaudio/best",
-            "outtmpl": str(self.output_dir / "%(title)s.%(ext)s"),
+            "format": format_selector(),
+            "outtmpl": "%(title)s.%(ext)s",
+            "paths": {"home": str(self.output_dir)},
             "restrictfilenames": True,
             "quiet": False,
             "no_warnings": False,
@@ -118,20 +257,17 @@ class YouTubeDownloaderController:
                 video_url = result["entries"][0]["url"]
         return video_url
 
-    def process_track(self, query: str) -> Dict[str, str]:
+    def process_track(self, query: str) -> Optional[str]:
         search_query = clean_search_query(query)
         youtube_url = self.search_youtube(search_query)
         return youtube_url
 
-    def get_youtube_urls_from_csv(self, csv_path: str) -> List[Dict[str, str]]:
-        results = []
-        with open(csv_path, mode="r", encoding="utf8", errors="ignore") as file:
-            csvreader = csv.reader(file)
-            for row in csvreader:
-                new_row = row[0].split(";")
-                if new_row[1] != "Listen num":
-                    results.append(new_row[1])
-        return [self.process_track(q) for q in results]
+    def _read_csv_queries(self, csv_path: str) -> Iterator[str]:
+        """Stream the normalized search queries of a CSV export."""
+        return CsvTracks(csv_path).queries()
+
+    def get_youtube_urls_from_csv(self, csv_path: str) -> List[Optional[str]]:
+        return [self.process_track(q) for q in self._read_csv_queries(csv_path)]
 
     async def process_queue(self) -> None:
         self.is_processing = True
@@ -182,34 +318,636 @@ class YouTubeDownloaderController:
             print("yt-dlp not found. Please install yt-dlp first.")
         return None
 
-    def download(self, url: str) -> Optional[Path]:
+    def _download_blocking(
+        self, url: str, job_id: Optional[int] = None
+    ) -> Optional[Path]:
+        if job_id is None:
+            job_id = self.jobs.add(url)
+
+        if self.controls.get(job_id) != ControlCode.RUN:
+            self._settle_interrupted(job_id)
+            return None
+
         is_youtube_uri: bool = self._is_youtube_url(url)
         if not is_youtube_uri:
+            self.jobs.set_status(job_id, JobStatus.SKIPPED)
             return None
 
-        options = self._get_ydl_options()
-        options["no_color"] = True
-
-        def make_progress_hook(url):
+        def make_progress_hook(job_id):
             def progress_hook(d):
-                if d["status"] == "downloading" and self._individual_progress_callback:
+                self.controls.check(job_id)
+                if d["status"] == "downloading":
                     try:
-                        raw_percent = d.get("_percent_str", "0.0%")
-                        percent_clean = float(clean_percent_str(raw_percent)) / 100.0
-                        self._individual_progress_callback(url, percent_clean)
+                        self._on_progress(*progress_event(job_id, d))
                     except Exception as e:
                         print("Progress parse error:", e)
 
             return progress_hook
 
-        options["progress_hooks"] = [make_progress_hook(url)]
+        hooks = [
+            make_progress_hook(job_id),
+            throttle_hook(
+                self.limiter,
+                partial(self.controls.priority, job_id),
+                partial(self.controls.check, job_id),
+            ),
+        ]
+        self.jobs.set_status(job_id, JobStatus.RUNNING)
         try:
-            with YoutubeDL(options) as ydl:
-                info = ydl.extract_info(url, download=True)
-                return self._handle_download_result(info)
+            outcome = execute_download(self._make_job(job_id, url), hooks)
+            return self._finish_job(job_id, outcome)
+        except DownloadCancelled:
+            self._settle_interrupted(job_id)
+            return None
         except Exception as e:
             self._handle_error(url, e)
+            self.jobs.set_status(job_id, JobStatus.FAILED)
+            return None
+
+    def _settle_interrupted(self, job_id: int) -> None:
+        """Record why a worker stopped early, from the job's control code."""
+        code = self.controls.get(job_id)
+        if code == ControlCode.PAUSE:
+            self.jobs.set_status(job_id, JobStatus.PAUSED)
+        elif code == ControlCode.RUN:
+            # Resumed before the worker noticed the pause: run it again.
+            self.jobs.set_status(job_id, JobStatus.QUEUED)
+        else:
+            self.jobs.set_status(job_id, JobStatus.CANCELLED)
+            self._discard_partial(job_id)
+
+    def _job_volume(self, job_id: int) -> Volume:
+        """Volume the job writes to, chosen when it first starts."""
+        volume = self.volumes.placement(job_id)
+        if volume is None:
+            url = self.jobs.url(job_id)
+            resumable = next(
+                (v for v in self.volumes if v.staging and v.staging.has_partial(url)),
+                None,
+            )
+            size = self._expected_job_size(job_id, url) if len(self.volumes) > 1 else 0
+            volume = self.volumes.place(job_id, size=size, prefer=resumable)
+        return volume
+
+    def _expected_job_size(self, job_id: int, url: str) -> int:
+        """Disk space a job needs, from its batch plan or cached formats.
+
+        0 when neither knows the video yet; the job is then placed by free
+        space and load alone, and the free space check after extraction
+        still refuses a download that does not fit.
+        """
+        plan = self._plans.get(job_id)
+        if plan is not None:
+            size = plan.planned_size(job_id)
+        elif self.metadata_cache is not None and self._is_youtube_url(url):
+            info = self.metadata_cache.get_metadata(video_id_from_url(url)) or {}
+            sizes = estimate_sizes(info.get("formats") or (), info.get("duration"))
+            size = max(sizes.values(), default=0)
+        else:
+            size = 0
+        # The default format merges separate streams, kept until the merge is
+        # written; FreeSpaceCheckPP counts them the same way.
+        return int(2 * size)
+
+    def _discard_partial(self, job_id: int) -> None:
+        url = self.jobs.url(job_id)
+        placed = self.volumes.placement(job_id)
+        # A job that never started may still have a partial from an earlier run.
+        for volume in [placed] if placed is not None else self.volumes:
+            if volume.staging is not None:
+                volume.staging.release(volume.staging.job_dir(url))
+
+    def pause(self, job_id: int) -> None:
+        """Stop a job at its next checkpoint, keeping its partial file.
+
+        The worker slot is freed; ``resume`` queues the job again and yt-dlp
+        continues from the ``.part`` file. See ``cancel`` for when a running
+        job notices.
+        """
+        status = self.jobs.status(job_id)
+        if status in FINISHED_STATUSES or status == JobStatus.PAUSED:
+            return
+        self.controls.set(job_id, ControlCode.PAUSE)
+        if status == JobStatus.QUEUED:
+            self.jobs.set_status(job_id, JobStatus.PAUSED)
+
+    def resume(self, job_id: int) -> None:
+        if self.controls.get(job_id) != ControlCode.PAUSE:
+            return
+        self.controls.set(job_id, ControlCode.RUN)
+        if self.jobs.status(job_id) == JobStatus.PAUSED:
+            self.jobs.set_status(job_id, JobStatus.QUEUED)
+        self._wake(job_id)
+
+    def cancel(self, job_id: int) -> None:
+        """Stop a job; a running download aborts at its next checkpoint.
+
+        Checkpoints are yt-dlp progress updates, the end of extraction, the
+        start of the download and the start of each postprocessor. Between
+        them nothing can interrupt yt-dlp: extraction and an FFmpeg merge run
+        to completion, and a stalled connection only reports back once a read
+        times out, after up to ``retries`` times ``socket_timeout`` seconds.
+        """
+        status = self.jobs.status(job_id)
+        if status in FINISHED_STATUSES:
+            return
+        self.controls.set(job_id, ControlCode.CANCEL)
+        self.jobs.set_status(job_id, JobStatus.CANCELLED)
+        if status == JobStatus.PAUSED:
+            self._discard_partial(job_id)
+        self._wake(job_id)
+
+    def reprioritize(self, job_id: int, priority: int) -> None:
+        """Move a queued job ahead of (or behind) the other waiting jobs."""
+        self.jobs.set_priority(job_id, priority)
+        self.controls.set_priority(job_id, priority)
+        for loop, slots in list(self._loop_slots.items()):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(slots.reprioritize, job_id, priority)
+
+    def batch_jobs(self, batch_id: Optional[int] = None) -> List[int]:
+        """Job IDs of a batch, by default the most recent one."""
+        if batch_id is None:
+            batch_id = self.last_batch_id
+        if batch_id is None:
+            return []
+        return self._batches[batch_id]
+
+    def pause_batch(self, batch_id: Optional[int] = None) -> None:
+        for job_id in self.batch_jobs(batch_id):
+            self.pause(job_id)
+
+    def resume_batch(self, batch_id: Optional[int] = None) -> None:
+        for job_id in self.batch_jobs(batch_id):
+            self.resume(job_id)
+
+    def cancel_batch(self, batch_id: Optional[int] = None) -> None:
+        for job_id in self.batch_jobs(batch_id):
+            self.cancel(job_id)
+
+    def reprioritize_batch(self, priority: int, batch_id: Optional[int] = None) -> None:
+        for job_id in self.batch_jobs(batch_id):
+            self.reprioritize(job_id, priority)
+
+    def set_bandwidth_limit(self, rate: Optional[float]) -> None:
+        """Cap total download speed in bytes per second; None lifts the cap.
+
+        Applies immediately to running downloads, including worker processes.
+        """
+        self.limiter.set_rate(rate)
+
+    def set_connection_budget(self, connections: int) -> None:
+        """Change how many connections all downloads may open together.
+
+        Fragmented (DASH, HLS) downloads split the budget; running jobs pick
+        up their new share from their next format or playlist entry.
+        """
+        self.fragments.set_connections(connections)
+
+    def set_priority_weight(self, priority: int, weight: float) -> None:
+        """Change the bandwidth share of a priority class relative to the others."""
+        self.limiter.set_weight(priority, weight)
+
+    def _wake(self, job_id: int) -> None:
+        waiter = self._resume_waiters.pop(job_id, None)
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(resolve_future, future)
+
+    async def _wait_for_resume(self, job_id: int) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._resume_waiters[job_id] = (loop, future)
+        try:
+            # Re-check after registering so a concurrent resume is not lost.
+            if self.jobs.status(job_id) == JobStatus.PAUSED:
+                await future
+        finally:
+            self._resume_waiters.pop(job_id, None)
+
+    def _slots(self) -> PrioritySlots:
+        """Slots bounding concurrent jobs on the running event loop."""
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots.get(loop)
+        if slots is None:
+            slots = self._loop_slots[loop] = PrioritySlots(self.max_workers)
+        return slots
+
+    async def download(
+        self,
+        url: str,
+        timeout: Optional[float] = None,
+        priority: int = INTERACTIVE_PRIORITY,
+    ) -> Optional[Path]:
+        """Download ``url`` without blocking the event loop.
+
+        At most ``max_workers`` jobs run at once per event loop, lowest
+        ``priority`` first. ``timeout`` applies to each run of the job and
+        excludes time spent waiting or paused. Cancelling the awaiting task,
+        or hitting the timeout, cancels the job as well.
+        """
+        return await self._drive_job(self._add_job(url, priority), timeout)
+
+    def _add_job(self, url: str, priority: int) -> int:
+        job_id = self.jobs.add(url, priority)
+        self.controls.set_priority(job_id, priority)
+        return job_id
+
+    async def _drive_job(
+        self, job_id: int, timeout: Optional[float] = None
+    ) -> Optional[Path]:
+        """Run a job until it finishes, waiting out any pauses."""
+        runnable = (JobStatus.QUEUED, JobStatus.RUNNING)
+        slots = self._slots()
+        path = None
+        if not self._claim_url(job_id):
             return None
+        try:
+            while True:
+                status = self.jobs.status(job_id)
+                if status == JobStatus.PAUSED:
+                    await self._wait_for_resume(job_id)
+                    continue
+                if status not in runnable:
+                    return path
+                async with slots.slot(job_id, self.jobs.priority(job_id)):
+                    if self.jobs.status(job_id) in runnable:
+                        path = await asyncio.wait_for(self._run_job(job_id), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            self.cancel(job_id)
+            raise
+        finally:
+            worker = self._workers.pop(job_id, None)
+            if worker is None:
+                self._release_job(job_id)
+            else:
+                # A timed out or cancelled job's call keeps running until it
+                # notices the cancel; its URL and volume stay taken until then
+                # so a retry cannot write into the same staging directory.
+                worker.add_done_callback(lambda _: self._release_job(job_id))
+
+    def _claim_url(self, job_id: int) -> bool:
+        """Reserve the job's URL, skipping the job if another one holds it.
+
+        Jobs for the same URL share a staging directory, so only one of them
+        may be in flight; the claim is kept while the job is paused, and after
+        a cancel until its download has actually stopped.
+        """
+        url = self.jobs.url(job_id)
+        with self._inflight_lock:
+            owner = self._inflight_urls.setdefault(url, job_id)
+        if owner == job_id:
+            return True
+        if self.logger:
+            self.logger.info(f"Skipping {url}: already being downloaded by job {owner}")
+        self.jobs.set_status(job_id, JobStatus.SKIPPED)
+        return False
+
+    def _release_url(self, job_id: int) -> None:
+        url = self.jobs.url(job_id)
+        with self._inflight_lock:
+            if self._inflight_urls.get(url) == job_id:
+                del self._inflight_urls[url]
+
+    def _release_job(self, job_id: int) -> None:
+        self._release_url(job_id)
+        self.volumes.release(job_id)
+
+    async def _in_worker(
+        self,
+        job_id: int,
+        executor: Executor,
+        fn: Callable[..., T],
+        *args: Any,
+        then: Optional[Callable[[], None]] = None,
+    ) -> T:
+        """Await ``fn(*args)`` on ``executor`` on behalf of a job.
+
+        Cancelling the await does not stop a call that has started, so the
+        call is recorded for ``_drive_job`` to release the job after it;
+        ``then`` also runs once the call has returned.
+        """
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            if then is not None:
+                then()
+            raise
+        if then is not None:
+            future.add_done_callback(lambda _: then())
+        self._workers[job_id] = future
+        return await asyncio.wrap_future(future)
+
+    async def _run_job(self, job_id: int) -> Optional[Path]:
+        path = await self._download_job(job_id)
+        return await self._verify_job(job_id, path)
+
+    async def _download_job(self, job_id: int) -> Optional[Path]:
+        url = self.jobs.url(job_id)
+        if self.backend != PROCESS_BACKEND:
+            return await self._in_worker(
+                job_id, self.executor, self._download_blocking, url, job_id
+            )
+
+        if not self._is_youtube_url(url):
+            self.jobs.set_status(job_id, JobStatus.SKIPPED)
+            return None
+        slot = self.controls.attach(job_id)
+        if slot is None and self.logger:
+            self.logger.warning(
+                f"Job {job_id} cannot be paused or cancelled while it runs: "
+                "every control slot is taken"
+            )
+        _, outcome, error = await self._in_worker(
+            job_id,
+            self._get_process_executor(),
+            run_download,
+            self._make_job(job_id, url, control_slot=slot),
+            then=partial(self.controls.detach, job_id),
+        )
+        if error is not None:
+            self._handle_error(url, WorkerDownloadError(error))
+            self.jobs.set_status(job_id, JobStatus.FAILED)
+            return None
+        if outcome is None:
+            self._settle_interrupted(job_id)
+            return None
+        return self._finish_job(job_id, outcome)
+
+    async def _verify_job(self, job_id: int, path: Optional[Path]) -> Optional[Path]:
+        """Check a downloaded job's files before it is marked completed."""
+        files = self._unverified.pop(job_id, None)
+        if files is None:
+            return path
+        corrupt = await self._in_worker(
+            job_id, self._integrity_executor, self._check_outputs, files
+        )
+        if corrupt:
+            self._handle_error(self.jobs.url(job_id), CorruptOutputError(corrupt))
+            self.jobs.set_status(job_id, JobStatus.FAILED)
+            return None
+        self.jobs.set_status(job_id, JobStatus.COMPLETED)
+        return path
+
+    def _check_outputs(self, files: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """Probe each file and dedup the good ones; returns the rejected paths.
+
+        Rejected files are renamed with ``CORRUPT_SUFFIX`` so a retry
+        downloads them again instead of finding them already present.
+        """
+        corrupt = []
+        reclaimed = 0
+        for filepath, content_hash in files:
+            if not Path(filepath).is_file():
+                continue
+            if self.ffprobe_path and probe_media(
+                filepath, self.ffprobe_path, self.logger
+            ):
+                quarantine(filepath)
+                corrupt.append(filepath)
+            elif content_hash and self.content_index is not None:
+                reclaimed += self.content_index.add(filepath, content_hash)
+        if reclaimed:
+            self.jobs.record_dedup(reclaimed)
+            if self.logger:
+                self.logger.info(f"Reclaimed {reclaimed} bytes of duplicate output")
+        return corrupt
+
+    def dedup_library(self) -> int:
+        """Hash every output volume and hardlink byte-identical files.
+
+        Returns the bytes reclaimed. Needed once for a library downloaded
+        before outputs were verified; new downloads are indexed as they finish.
+        """
+        index = self.content_index or self._library_index()
+        reclaimed = index.scan()
+        self.jobs.record_dedup(reclaimed)
+        return reclaimed
+
+    def _get_process_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._process_executor is None:
+                progress_queue = self._progress_queue = create_progress_queue()
+                threading.Thread(
+                    target=self._drain_progress_queue,
+                    args=(progress_queue,),
+                    daemon=True,
+                ).start()
+                self._process_executor = create_process_executor(
+                    self.max_workers,
+                    progress_queue,
+                    self.controls,
+                    self.limiter,
+                    self.fragments,
+                )
+            return self._process_executor
+
+    async def download_many(
+        self,
+        urls: Iterable[str],
+        timeout: Optional[float] = None,
+        priority: int = BULK_PRIORITY,
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+    ) -> List[Optional[Path]]:
+        """Download ``urls`` concurrently as one batch.
+
+        Failed, cancelled or timed out jobs yield None. The batch can be
+        controlled through ``last_batch_id`` and the ``*_batch`` methods.
+
+        With a ``deadline`` in seconds and/or a ``byte_budget``, each job is
+        capped at the highest resolution that still lets the rest of the
+        batch finish in time and within budget at the measured throughput.
+        """
+        return await self._drive_batch(
+            self._submit_batch(urls, priority), timeout, deadline, byte_budget
+        )
+
+    def _submit_batch(self, urls: Iterable[str], priority: int) -> List[int]:
+        job_ids = [self._add_job(url, priority) for url in urls]
+        self._batches.append(job_ids)
+        self.last_batch_id = len(self._batches) - 1
+        return job_ids
+
+    async def _drive_batch(
+        self,
+        job_ids: List[int],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+    ) -> List[Optional[Path]]:
+        if job_ids and self._progress_callback:
+            self._progress_callback(0.0)
+        if job_ids and (deadline or byte_budget is not None):
+            await self._plan_batch(job_ids, deadline, byte_budget)
+        # Progress counts this batch's own jobs only, so overlapping batches
+        # and single downloads cannot move it. All jobs finish on this loop,
+        # so the count needs no lock and only ever grows.
+        completed = 0
+
+        async def run(job_id: int) -> Optional[Path]:
+            nonlocal completed
+            try:
+                return await self._drive_job(job_id, timeout)
+            except asyncio.TimeoutError as e:
+                self._handle_error(self.jobs.url(job_id), e)
+                return None
+            finally:
+                plan = self._plans.pop(job_id, None)
+                if plan is not None:
+                    plan.finish(job_id)
+                completed += 1
+                if self._progress_callback:
+                    self._progress_callback(completed / len(job_ids))
+
+        return list(await asyncio.gather(*(run(job_id) for job_id in job_ids)))
+
+    async def _plan_batch(
+        self,
+        job_ids: List[int],
+        deadline: Optional[float],
+        byte_budget: Optional[float],
+    ) -> BatchPlan:
+        """Probe the format sizes of a batch and attach a plan to its jobs.
+
+        The deadline runs from here, so probing counts against it; the
+        probes fill the metadata cache, which the downloads then reuse.
+        """
+        # The batch's own class share of the bandwidth limit, if one is set.
+        throughput = self.limiter.class_rate(self.jobs.priority(job_ids[0]))
+        plan = BatchPlan(job_ids, deadline, byte_budget, throughput=throughput)
+        loop = asyncio.get_running_loop()
+
+        async def probe(job_id: int) -> None:
+            async with self._slots().slot(None, self.jobs.priority(job_id)):
+                sizes = await loop.run_in_executor(
+                    self.executor, self._probe_sizes, self.jobs.url(job_id)
+                )
+            plan.set_sizes(job_id, sizes)
+
+        await asyncio.gather(*(probe(job_id) for job_id in job_ids))
+        for job_id in job_ids:
+            self._plans[job_id] = plan
+        return plan
+
+    def _probe_sizes(self, url: str) -> Dict[int, float]:
+        """Estimated size of ``url`` at each height cap; empty if unknown."""
+        if not self._is_youtube_url(url):
+            return {}
+        video_id = video_id_from_url(url)
+        info = None
+        if self.metadata_cache is not None:
+            info = self.metadata_cache.get_metadata(video_id)
+        if info is None:
+            options: Dict[str, Any] = {
+                "quiet": True,
+                "noplaylist": True,
+                "no_color": True,
+            }
+            if self.cookies_file:
+                options["cookiefile"] = self.cookies_file
+            started = time.perf_counter()
+            try:
+                with YoutubeDL(options) as ydl:
+                    info = ydl.extract_info(url, download=False)
+            except Exception as e:
+                self._handle_error(url, e)
+                return {}
+            if not info:
+                return {}
+            if self.metadata_cache is not None:
+                self.metadata_cache.put(info, time.perf_counter() - started)
+        return estimate_sizes(info.get("formats") or (), info.get("duration"))
+
+    def _planned_format(self, job_id: int) -> Optional[str]:
+        """Format string for a planned job, re-planned from current speeds."""
+        plan = self._plans.get(job_id)
+        if plan is None:
+            return None
+        snapshot = self.jobs.snapshot()
+        running = [snapshot[other] for other in plan.running]
+        speed = sum(
+            record.speed for record in running if record.status == JobStatus.RUNNING
+        )
+        if speed:
+            plan.observe(speed)
+        done = {record.job_id: record.bytes_done for record in running}
+        return format_selector(plan.choose(job_id, done))
+
+    async def resolve_many(self, queries: Iterable[str]) -> List[Optional[str]]:
+        """Search YouTube for each query concurrently, keeping input order."""
+        return [url async for batch in self.resolve_batches(queries) for url in batch]
+
+    async def resolve_batches(
+        self, queries: Iterable[str], batch_size: int = RESOLVE_BATCH
+    ) -> AsyncIterator[List[Optional[str]]]:
+        """Resolve ``queries`` ``batch_size`` at a time, yielding each batch.
+
+        ``queries`` is read lazily, so a streamed CSV file only ever has one
+        batch of searches and results in memory.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def resolve(query: str) -> Optional[str]:
+            async with self._slots().slot(None, INTERACTIVE_PRIORITY):
+                try:
+                    return await loop.run_in_executor(
+                        self.executor, self.process_track, query
+                    )
+                except Exception as e:
+                    self._handle_error(query, e)
+                    return None
+
+        queries = iter(queries)
+        while batch := list(islice(queries, batch_size)):
+            yield list(await asyncio.gather(*(resolve(query) for query in batch)))
+
+    def shutdown(self) -> None:
+        """Cancel queued work and release the executors."""
+        for job_id in range(len(self.jobs)):
+            self.cancel(job_id)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._integrity_executor.shutdown(wait=False, cancel_futures=True)
+        with self._executor_lock:
+            if self._process_executor is not None:
+                self._process_executor.shutdown(wait=False, cancel_futures=True)
+                self._process_executor = None
+            if self._progress_queue is not None:
+                self._progress_queue.put(None)
+                self._progress_queue = None
+
+    def _finish_job(self, job_id: int, outcome: DownloadOutcome) -> Optional[Path]:
+        self.jobs.record_cache_use(
+            outcome.cache_hits, outcome.cache_misses, outcome.seconds_saved
+        )
+        if self.low_memory:
+            path = self._handle_download_results(outcome.result)
+        else:
+            path = self._handle_download_result(outcome.result)
+        if path is None:
+            self.jobs.set_status(job_id, JobStatus.FAILED)
+            return None
+        self.jobs.set_output_path(job_id, str(path))
+        if self.verify_outputs:
+            # ``_verify_job`` completes the job once its files are checked.
+            self._unverified[job_id] = output_files(outcome.result)
+        else:
+            self.jobs.set_status(job_id, JobStatus.COMPLETED)
+        return path
+
+    def _on_progress(
+        self,
+        job_id: int,
+        fraction: float,
+        bytes_done: int,
+        bytes_total: int,
+        speed: float,
+    ) -> None:
+        if self.jobs.status(job_id) == JobStatus.QUEUED:
+            self.jobs.set_status(job_id, JobStatus.RUNNING)
+        self.jobs.update_progress(job_id, bytes_done, bytes_total, speed)
+        if self._individual_progress_callback:
+            self._individual_progress_callback(job_id, fraction)
 
     def _handle_download_result(self, info: Dict[str, Any]) -> Optional[Path]:
         if info is None:
@@ -219,51 +957,112 @@ class YouTubeDownloaderController:
             paths = []
             for entry in info["entries"]:
                 if entry:
-                    path = self.output_dir / f"{safe_path_string(entry['title'])}.mp4"
-                    paths.append(path)
+                    paths.append(self._result_path(entry))
             return paths[0] if paths else None
         else:
-            path = self.output_dir / f"{safe_path_string(info['title'])}.mp4"
-            return path
+            return self._result_path(info)
+
+    def _result_path(self, info: Dict[str, Any]) -> Path:
+        # Only results without a recorded filepath fall back to a guess.
+        if info.get("filepath"):
+            return Path(info["filepath"])
+        return self._library_path(info["title"])
+
+    def _library_path(self, title: str) -> Path:
+        """Where yt-dlp's default name for ``title`` is, on any volume."""
+        name = f"{safe_path_string(title)}.mp4"
+        return self.volumes.locate(name) or self.output_dir / name
+
+    def _handle_download_results(self, results: List[DownloadResult]) -> Optional[Path]:
+        for result in results:
+            if result.filepath:
+                return Path(result.filepath)
+            if result.title:
+                return self._library_path(result.title)
+        return None
 
     async def _download(
-        self, csv_path: str = None, scrolable_frame=None, song_widgets=None
+        self,
+        csv_path: str = None,
+        on_batch: Optional[Callable[[List[int], List[str]], None]] = None,
     ) -> None:
-        tracks = self.get_youtube_urls_from_csv(csv_path)
-        await self.add_to_queue(tracks)
+        """Download every track of a CSV file as one batch.
+
+        ``on_batch`` receives the job IDs and URLs once the batch is queued,
+        so a UI can add a row per job; a CSV can resolve several rows to one
+        URL, which is why rows must be keyed by job ID.
+        """
+        async for tracks in self.resolve_batches(self._read_csv_queries(csv_path)):
+            await self.add_to_queue([track for track in tracks if track])
 
         print(f"Downloading {self.download_queue.qsize()} videos...")
         urls = []
-
         while not self.download_queue.empty():
-            url = await self.download_queue.get()
-            urls.append(url)
+            urls.append(await self.download_queue.get())
 
-            if scrolable_frame and song_widgets:
-                label = customtkinter.CTkLabel(scrolable_frame, text=url, anchor="w")
-                label.pack(fill="x", padx=10, pady=(5, 0))
+        if not urls:
+            return
 
-                progressbar = customtkinter.CTkProgressBar(scrolable_frame, height=10)
-                progressbar.set(0)
-                progressbar.pack(fill="x", padx=10, pady=(0, 5))
+        job_ids = self._submit_batch(urls, BULK_PRIORITY)
+        if on_batch is not None:
+            on_batch(job_ids, urls)
+        await self._drive_batch(job_ids)
 
-                song_widgets[url] = {"label": label, "progressbar": progressbar}
+    def run_batch(
+        self,
+        urls: List[str],
+        priority: int = BULK_PRIORITY,
+        deadline: Optional[float] = None,
+        byte_budget: Optional[float] = None,
+    ) -> List[int]:
+        """Download ``urls`` with the configured backend, blocking until done.
 
-        if not urls:
-            return
+        Paused jobs keep the call waiting until they are resumed or
+        cancelled. Returns the job IDs so callers can read per-URL outcomes
+        from ``self.jobs.snapshot()``. See ``download_many`` for
+        ``deadline`` and ``byte_budget``.
+        """
+        job_ids = self._submit_batch(urls, priority)
+        if job_ids:
+            asyncio.run(self._drive_batch(job_ids, None, deadline, byte_budget))
+        return job_ids
 
-        self.total_downloads = len(urls)
-        self.completed_downloads = 0
+    def sync_playlist(self, url: str, prune: bool = False) -> SyncResult:
+        """Download only the entries added to a playlist since the last sync."""
+        return PlaylistSync(self).sync(url, prune=prune)
 
-        if self._progress_callback:
-            self._progress_callback(0.0)
+    def _make_job(
+        self, job_id: int, url: str, control_slot: Optional[int] = None
+    ) -> DownloadJob:
+        options = self._worker_options()
+        planned = self._planned_format(job_id)
+        if planned is not None:
+            options["format"] = planned
+        volume = self._job_volume(job_id)
+        options["paths"] = {"home": str(volume.root)}
+        return DownloadJob(
+            job_id=job_id,
+            url=url,
+            options=options,
+            low_memory=self.low_memory,
+            staging=volume.staging,
+            cache=self.metadata_cache,
+            control=self.controls if self.backend != PROCESS_BACKEND else None,
+            verify=self.verify_outputs,
+            fragments=self.fragments if self.backend != PROCESS_BACKEND else None,
+            control_slot=control_slot,
+        )
 
-        def download_and_track_progress(url):
-            self.download(url)
-            self.completed_downloads += 1
-            overall_progress = self.completed_downloads / self.total_downloads
-            if self._progress_callback:
-                self._progress_callback(overall_progress)
+    def _worker_options(self) -> Dict[str, Any]:
+        options = self._get_ydl_options()
+        options["no_color"] = True
+        if self.low_memory:
+            options["lazy_playlist"] = True
+        return options
 
-        with ThreadPool(cpu_count()) as pool:
-            pool.map(download_and_track_progress, urls)
+    def _drain_progress_queue(self, progress_queue: ProgressQueue) -> None:
+        while True:
+            event = progress_queue.get()
+            if event is None:
+                break
+            self._on_progress(*event)
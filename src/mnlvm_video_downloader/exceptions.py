@@ -1,3 +1,8 @@
+from typing import List
+
+from yt_dlp.utils import DownloadCancelled, PostProcessingError
+
+
 class FFmpegNotInstalledError(Exception):
     def __init__(
         self, message="FFmpeg must be installed  [https://ffmpeg.org/download.html]"
@@ -7,3 +12,59 @@ class FFmpegNotInstalledError(Exception):
 
     def __str__(self):
         return self.message
+
+
+class WorkerDownloadError(Exception):
+    def __init__(self, message: str = "Download failed in worker process") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class InsufficientDiskSpaceError(PostProcessingError):
+    def __init__(self, required: int, available: int) -> None:
+        self.required = required
+        self.available = available
+        self.message = (
+            f"Not enough free space to stage download: "
+            f"{required} bytes required, {available} bytes available"
+        )
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class DownloadPaused(DownloadCancelled):
+    """Stops a download from a progress hook while keeping its partial file."""
+
+    def __init__(self, message: str = "Download paused") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class DaemonRequestError(Exception):
+    """A daemon API call was rejected; ``status`` is the HTTP status code."""
+
+    def __init__(self, status: int, message: str) -> None:
+        self.status = status
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class CorruptOutputError(Exception):
+    def __init__(self, paths: List[str]) -> None:
+        self.paths = paths
+        self.message = "ffprobe rejected the output: " + ", ".join(paths)
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return self.message
@@ -1,11 +1,23 @@
+from typing import TYPE_CHECKING, Optional, Union
+
 from windows.views import Window
-from controllers.video import YouTubeDownloaderController
+from controllers.client import DaemonClient
+
+if TYPE_CHECKING:
+    from controllers.video import YouTubeDownloaderController
 
-youtuber_controler = YouTubeDownloaderController(
-    output_dir="downloads",
-    max_workers=4,
-    browser="chrome",
-    ffmpeg_path="ffmpeg",
+# A running daemon already has a warm controller: hand the work to it.
+youtuber_controler: Optional[Union[DaemonClient, "YouTubeDownloaderController"]] = (
+    DaemonClient.connect()
 )
+if youtuber_controler is None:
+    from controllers.video import YouTubeDownloaderController
+
+    youtuber_controler = YouTubeDownloaderController(
+        output_dir="downloads",
+        max_workers=4,
+        browser="chrome",
+        ffmpeg_path="ffmpeg",
+    )
 app = Window(yt_controler=youtuber_controler)
 app.mainloop()
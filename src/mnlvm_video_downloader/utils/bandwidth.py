@@ -0,0 +1,178 @@
+import threading
+import time
+from array import array
+from multiprocessing import get_context
+from typing import Any, Callable, ContextManager, Dict, MutableSequence, Optional
+
+from utils.constants import (
+    BANDWIDTH_ACTIVE_WINDOW,
+    BANDWIDTH_BURST_SECONDS,
+    BANDWIDTH_MAX_SLEEP,
+    BANDWIDTH_WEIGHTS,
+)
+
+# Layout of the state array: two global slots followed by one
+# ``(weight, tokens, last_active)`` triple per priority class.
+_RATE = 0
+_LAST_REFILL = 1
+_HEADER = 2
+_WEIGHT = 0
+_TOKENS = 1
+_LAST_ACTIVE = 2
+_CLASS_FIELDS = 3
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every download of a controller.
+
+    ``rate`` is the total budget in bytes per second (0 means unlimited).
+    Each priority class has its own bucket refilled with a share of the rate
+    proportional to its weight among the classes that downloaded recently,
+    so an idle class never holds bandwidth back. Downloads pay for bytes
+    after receiving them and sleep off the debt, which is what throttles the
+    connection.
+
+    With ``shared=True`` the state lives in shared memory guarded by a
+    process lock, so worker processes draw from the same budget.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        weights: Optional[Dict[int, float]] = None,
+        shared: bool = False,
+    ) -> None:
+        weights = dict(BANDWIDTH_WEIGHTS if weights is None else weights)
+        self.priorities = sorted(weights)
+        size = _HEADER + _CLASS_FIELDS * len(self.priorities)
+        self._state: MutableSequence[float]
+        self._lock: ContextManager[Any]
+        if shared:
+            context = get_context()
+            self._state = context.RawArray("d", size)
+            self._lock = context.Lock()
+        else:
+            self._state = array("d", bytes(8 * size))
+            self._lock = threading.Lock()
+        self._state[_LAST_REFILL] = time.monotonic()
+        self.set_rate(rate)
+        for priority, weight in weights.items():
+            self.set_weight(priority, weight)
+
+    @property
+    def rate(self) -> float:
+        return self._state[_RATE]
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._state[_RATE] = max(rate or 0.0, 0.0)
+
+    def set_weight(self, priority: int, weight: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._state[self._offset(priority) + _WEIGHT] = max(weight, 0.0)
+
+    def _offset(self, priority: int) -> int:
+        """State offset of the class ``priority`` falls into.
+
+        A priority belongs to the highest class whose value does not exceed
+        it, so reprioritized jobs with in-between values still map somewhere.
+        """
+        index = 0
+        for i, class_priority in enumerate(self.priorities):
+            if class_priority <= priority:
+                index = i
+        return _HEADER + _CLASS_FIELDS * index
+
+    def _active_weight(self, now: float, exclude: int = -1) -> float:
+        state = self._state
+        return sum(
+            state[offset + _WEIGHT]
+            for offset in range(_HEADER, len(state), _CLASS_FIELDS)
+            if offset != exclude
+            and now - state[offset + _LAST_ACTIVE] < BANDWIDTH_ACTIVE_WINDOW
+        )
+
+    def _share(self, offset: int, now: float) -> float:
+        total = self._active_weight(now)
+        if total <= 0:
+            return self._state[_RATE]
+        return self._state[_RATE] * self._state[offset + _WEIGHT] / total
+
+    def _refill(self, now: float) -> None:
+        state = self._state
+        elapsed = max(now - state[_LAST_REFILL], 0.0)
+        state[_LAST_REFILL] = now
+        for offset in range(_HEADER, len(state), _CLASS_FIELDS):
+            if now - state[offset + _LAST_ACTIVE] >= BANDWIDTH_ACTIVE_WINDOW:
+                continue
+            share = self._share(offset, now)
+            state[offset + _TOKENS] = min(
+                state[offset + _TOKENS] + elapsed * share,
+                share * BANDWIDTH_BURST_SECONDS,
+            )
+
+    def class_rate(self, priority: int) -> float:
+        """Bytes per second ``priority``'s class gets while downloading now."""
+        with self._lock:
+            offset = self._offset(priority)
+            weight = self._state[offset + _WEIGHT]
+            total = weight + self._active_weight(time.monotonic(), exclude=offset)
+            if total <= 0:
+                return self._state[_RATE]
+            return self._state[_RATE] * weight / total
+
+    def throttle(
+        self, priority: int, nbytes: int, check: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Charge ``nbytes`` to ``priority``'s class and sleep off any debt.
+
+        ``check`` runs before every sleep so a paused or cancelled job can
+        abort from a long wait.
+        """
+        offset = self._offset(priority)
+        while True:
+            with self._lock:
+                if self._state[_RATE] <= 0:
+                    return
+                now = time.monotonic()
+                self._state[offset + _LAST_ACTIVE] = now
+                self._refill(now)
+                self._state[offset + _TOKENS] -= nbytes
+                nbytes = 0
+                debt = -self._state[offset + _TOKENS]
+                share = self._share(offset, now)
+            # Float refills can leave a sub-byte remainder; treat it as paid.
+            if debt < 1:
+                return
+            if check is not None:
+                check()
+            wait = debt / share if share > 0 else BANDWIDTH_MAX_SLEEP
+            time.sleep(min(wait, BANDWIDTH_MAX_SLEEP))
+
+
+def throttle_hook(
+    limiter: BandwidthLimiter,
+    priority: Callable[[], int],
+    check: Optional[Callable[[], None]] = None,
+) -> Callable[[Dict[str, Any]], None]:
+    """yt-dlp progress hook charging each received block to ``limiter``.
+
+    ``priority`` is read for every block, so reprioritizing a running job
+    moves it to its new bandwidth class straight away.
+    """
+    received: Dict[str, int] = {}
+
+    def progress_hook(d: Dict[str, Any]) -> None:
+        if d["status"] != "downloading":
+            return
+        filename = d.get("tmpfilename") or d.get("filename") or ""
+        downloaded = int(d.get("downloaded_bytes") or 0)
+        # The first update of a file may include a resumed prefix; skip it.
+        previous = received.get(filename, downloaded)
+        received[filename] = downloaded
+        if downloaded > previous:
+            limiter.throttle(priority(), downloaded - previous, check)
+
+    return progress_hook
@@ -0,0 +1,218 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, cast
+from urllib.parse import parse_qs, urlparse
+
+from yt_dlp import YoutubeDL
+from yt_dlp.extractor.youtube import YoutubeIE
+from yt_dlp.utils import DownloadCancelled
+from utils.constants import (
+    METADATA_CACHE_MEMORY_ENTRIES,
+    METADATA_TTL,
+    STREAM_URL_TTL,
+)
+from utils.utils import create_dir
+
+STREAM_URL_KEYS = ("url", "manifest_url", "fragment_base_url")
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """Return the YouTube video ID of ``url`` without a network round-trip."""
+    if not YoutubeIE.suitable(url):
+        return None
+    return cast(Optional[str], YoutubeIE.get_temp_id(url))
+
+
+def streams_expire_at(info: Dict[str, Any], stored_at: float) -> float:
+    """Earliest time a signed stream URL in ``info`` stops being valid.
+
+    YouTube stream URLs carry an ``expire`` query parameter; when none is
+    found, fall back to ``STREAM_URL_TTL``.
+    """
+    expires = stored_at + STREAM_URL_TTL
+    for fmt in info.get("formats") or ():
+        query = parse_qs(urlparse(fmt.get("url") or "").query)
+        if "expire" in query:
+            try:
+                expires = min(expires, float(query["expire"][0]))
+            except ValueError:
+                continue
+    return expires
+
+
+def strip_stream_urls(info: Dict[str, Any]) -> Dict[str, Any]:
+    info = dict(info)
+    info["formats"] = [
+        {key: value for key, value in fmt.items() if key not in STREAM_URL_KEYS}
+        for fmt in info.get("formats") or ()
+    ]
+    info.pop("requested_formats", None)
+    for key in STREAM_URL_KEYS:
+        info.pop(key, None)
+    return info
+
+
+class MetadataCache:
+    """Disk-backed cache of yt-dlp video metadata keyed by video ID.
+
+    Stable fields and the format list are kept for ``metadata_ttl``; the
+    signed stream URLs are only trusted until they expire, after which
+    ``get`` misses but ``get_metadata`` still answers. A small in-memory LRU
+    sits in front of the JSON files.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        metadata_ttl: float = METADATA_TTL,
+        memory_entries: int = METADATA_CACHE_MEMORY_ENTRIES,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.metadata_ttl = metadata_ttl
+        self.memory_entries = memory_entries
+        create_dir(self.cache_dir)
+        self._init_memory()
+
+    def _init_memory(self) -> None:
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes get their own empty memory tier and share the disk.
+        return {
+            "cache_dir": self.cache_dir,
+            "metadata_ttl": self.metadata_ttl,
+            "memory_entries": self.memory_entries,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_memory()
+
+    def _path(self, video_id: str) -> Path:
+        return self.cache_dir / f"{video_id}.json"
+
+    def _load(self, video_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(video_id)
+            if entry is not None:
+                self._memory.move_to_end(video_id)
+                return entry
+        try:
+            with open(self._path(video_id), encoding="utf8") as file:
+                entry = cast(Dict[str, Any], json.load(file))
+        except (OSError, ValueError):
+            return None
+        self._remember(video_id, entry)
+        return entry
+
+    def _remember(self, video_id: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[video_id] = entry
+            self._memory.move_to_end(video_id)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, video_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return cached info whose stream URLs are still valid."""
+        if not video_id:
+            return None
+        entry = self._load(video_id)
+        if entry is None or time.time() >= entry["streams_expire_at"]:
+            return None
+        return cast(Dict[str, Any], entry["info"])
+
+    def get_metadata(self, video_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return cached info without stream URLs, even if they have expired."""
+        if not video_id:
+            return None
+        entry = self._load(video_id)
+        if entry is None or time.time() - entry["stored_at"] >= self.metadata_ttl:
+            return None
+        return strip_stream_urls(entry["info"])
+
+    def extraction_time(self, video_id: Optional[str]) -> float:
+        if not video_id:
+            return 0.0
+        entry = self._load(video_id)
+        return entry["extraction_time"] if entry else 0.0
+
+    def put(self, info: Dict[str, Any], extraction_time: float = 0.0) -> None:
+        video_id = info.get("id")
+        if not video_id or info.get("_type", "video") != "video":
+            return
+        stored_at = time.time()
+        entry = {
+            "stored_at": stored_at,
+            "streams_expire_at": streams_expire_at(info, stored_at),
+            "extraction_time": extraction_time,
+            "info": YoutubeDL.sanitize_info(info, remove_private_keys=True),
+        }
+        path = self._path(video_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf8") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+        self._remember(video_id, entry)
+
+    def invalidate(self, video_id: Optional[str]) -> None:
+        if not video_id:
+            return
+        with self._lock:
+            self._memory.pop(video_id, None)
+        try:
+            self._path(video_id).unlink()
+        except OSError:
+            pass
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "seconds_saved")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+
+def download_succeeded(info: Optional[Dict[str, Any]]) -> bool:
+    if not info:
+        return False
+    downloads = info.get("requested_downloads") or [info]
+    return all(
+        download.get("filepath") and os.path.exists(download["filepath"])
+        for download in downloads
+    )
+
+
+def download_cached(
+    ydl: YoutubeDL, cache: MetadataCache, video_id: Optional[str], stats: CacheStats
+) -> Optional[Dict[str, Any]]:
+    """Download ``video_id`` from cached info, skipping extraction.
+
+    Cached stream URLs can be revoked before they expire; a failed attempt
+    drops the entry so the caller falls back to a fresh extraction.
+    """
+    cached = cache.get(video_id)
+    if cached is None:
+        return None
+    try:
+        # yt-dlp mutates nested format dicts; keep the memory tier pristine.
+        info: Optional[Dict[str, Any]] = ydl.process_ie_result(
+            copy.deepcopy(cached), download=True
+        )
+    except DownloadCancelled:
+        raise
+    except Exception:
+        info = None
+    if not download_succeeded(info):
+        cache.invalidate(video_id)
+        return None
+    stats.hits += 1
+    stats.seconds_saved += cache.extraction_time(video_id)
+    return info
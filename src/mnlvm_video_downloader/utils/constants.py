@@ -1,7 +1,83 @@
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, Tuple
 
 GLIPH_ICON_SIZE: Tuple[int, int] = (40, 40)
 DEFAULT_WINDOW_SIZE: str = "1129x675"
 DATE_FORMAT: str = "\t\t Le %d %B %Y %H:%M:%S"
 BASE_DIR: Path = Path(__file__).resolve().parent.parent
+IMAGES_DIR: Path = BASE_DIR / "windows" / "images"
+# Window images scaled to their display size, under PathHolder.data_path.
+IMAGE_CACHE_DIRNAME: str = "image_cache"
+# How often the window runs the calls other threads hand to the Tk thread,
+# while images are loading or a download batch runs.
+TK_POLL_INTERVAL_MS: int = 20
+THREAD_BACKEND: str = "thread"
+PROCESS_BACKEND: str = "process"
+EXECUTION_BACKENDS: Tuple[str, ...] = (THREAD_BACKEND, PROCESS_BACKEND)
+STAGING_DIRNAME: str = ".staging"
+# Staging directories untouched for this long are treated as orphans and swept.
+STAGING_MAX_AGE: float = 24 * 60 * 60
+STAGING_FREE_SPACE_MARGIN: int = 64 * 1024 * 1024
+METADATA_CACHE_DIRNAME: str = "metadata_cache"
+# Stable video metadata (title, duration, format list) changes rarely.
+METADATA_TTL: float = 7 * 24 * 60 * 60
+# Signed stream URLs expire after a few hours; stay well inside that window.
+STREAM_URL_TTL: float = 60 * 60
+METADATA_CACHE_MEMORY_ENTRIES: int = 64
+PLAYLIST_SNAPSHOT_DIRNAME: str = "playlists"
+# Control slots shared with worker processes, one per job handed to a worker.
+CONTROL_TABLE_SLOTS: int = 1024
+# Lower values get a worker slot first.
+INTERACTIVE_PRIORITY: int = 0
+BULK_PRIORITY: int = 10
+# Relative bandwidth shares of the priority classes when both are downloading.
+BANDWIDTH_WEIGHTS: Dict[int, float] = {INTERACTIVE_PRIORITY: 4.0, BULK_PRIORITY: 1.0}
+BANDWIDTH_BURST_SECONDS: float = 1.0
+# A class that has not downloaded for this long gives its share back.
+BANDWIDTH_ACTIVE_WINDOW: float = 1.0
+BANDWIDTH_MAX_SLEEP: float = 0.25
+# The daemon only listens on loopback, and also checks a token (see below).
+DAEMON_HOST: str = "127.0.0.1"
+DAEMON_PORT: int = 8765
+# Host names the daemon answers to; anything else is a DNS rebinding attempt.
+DAEMON_ALLOWED_HOSTS: Tuple[str, ...] = ("127.0.0.1", "localhost", "::1")
+# Per-user secret every request must carry, written by the daemon on start.
+DAEMON_TOKEN_FILENAME: str = "daemon.token"
+# Job state is diffed and pushed to event subscribers at this period.
+DAEMON_EVENT_INTERVAL: float = 0.5
+DAEMON_KEEPALIVE: float = 5.0
+# A subscriber further behind than this is disconnected and must resync.
+DAEMON_EVENT_BACKLOG: int = 10_000
+DAEMON_REQUEST_TIMEOUT: float = 30.0
+CONTENT_HASH_ALGORITHM: str = "sha256"
+# The streaming hasher reads a download's new bytes once this many accumulate.
+CONTENT_HASH_CHUNK_SIZE: int = 1024 * 1024
+CONTENT_INDEX_FILENAME: str = ".content_index"
+CORRUPT_SUFFIX: str = ".corrupt"
+# ffprobe runs are short; a couple of threads keep them off the download pool.
+INTEGRITY_WORKERS: int = 2
+# Height caps tried by deadline planning, best first.
+QUALITY_LADDER: Tuple[int, ...] = (2160, 1440, 1080, 720, 480, 360, 240, 144)
+# Assumed until running jobs report their speed, unless a bandwidth limit is set.
+PLAN_INITIAL_THROUGHPUT: float = 4 * 1024 * 1024
+# Weight of the newest throughput sample in the planner's moving average.
+PLAN_THROUGHPUT_SMOOTHING: float = 0.3
+# Bytes read up front to detect a CSV file's encoding, delimiter and header.
+CSV_SNIFF_BYTES: int = 64 * 1024
+CSV_DELIMITERS: str = ",;\t|"
+# Rows whose search queries are normalized with one regex pass.
+CSV_QUERY_BATCH: int = 4096
+# Queries resolve_many searches for at a time, so a long CSV file is not
+# turned into one task per row up front.
+RESOLVE_BATCH: int = 64
+# Connections all downloads of a controller may open at once. A job whose
+# formats are split in fragments (DASH, HLS) gets a share of them.
+MAX_CONNECTIONS: int = 16
+# A fragment download needs about this many fragments per connection before
+# another connection pays for its setup.
+FRAGMENTS_PER_CONNECTION: int = 10
+MAX_FRAGMENT_CONCURRENCY: int = 8
+# Typical DASH/HLS segment length, to estimate fragment counts from duration.
+FRAGMENT_SECONDS: float = 5.0
+# Jobs the connection budget can track at once with the process backend.
+FRAGMENT_BUDGET_SLOTS: int = 256
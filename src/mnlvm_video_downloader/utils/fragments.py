@@ -0,0 +1,224 @@
+import math
+import threading
+from array import array
+from multiprocessing import get_context
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    List,
+    MutableMapping,
+    MutableSequence,
+    Optional,
+    Tuple,
+)
+
+from yt_dlp.postprocessor import PostProcessor
+from utils.constants import (
+    FRAGMENT_BUDGET_SLOTS,
+    FRAGMENT_SECONDS,
+    FRAGMENTS_PER_CONNECTION,
+    MAX_CONNECTIONS,
+    MAX_FRAGMENT_CONCURRENCY,
+)
+
+# Layout of the state array: the connection budget followed by one
+# ``(job_id + 1, wanted, allowed)`` triple per slot; job 0 marks a free slot.
+_CONNECTIONS = 0
+_HEADER = 1
+_JOB = 0
+_WANTED = 1
+_ALLOWED = 2
+_SLOT_FIELDS = 3
+
+FRAGMENT_PROTOCOLS = (
+    "m3u8",
+    "m3u8_native",
+    "http_dash_segments",
+    "http_dash_segments_generator",
+)
+
+
+def wanted_connections(fragments: int) -> int:
+    """Connections worth opening for a download of ``fragments`` fragments."""
+    wanted = math.ceil(fragments / FRAGMENTS_PER_CONNECTION)
+    return max(1, min(wanted, MAX_FRAGMENT_CONCURRENCY))
+
+
+class FragmentBudget:
+    """Split a controller's connection budget among its running jobs.
+
+    Every running job holds at least one connection. Jobs downloading
+    fragmented formats want more, in proportion to their fragment count,
+    and the rest of the budget is shared out so that no job gets more than
+    it wants or, while others want more, more than an even share. Shares
+    are recomputed whenever a job starts, learns its fragment count or
+    ends, and whenever the budget changes.
+
+    With ``shared=True`` the state lives in shared memory guarded by a
+    process lock, so worker processes split the same budget; at most
+    ``slots`` jobs are tracked, and further jobs get one connection.
+    """
+
+    def __init__(
+        self,
+        connections: int = MAX_CONNECTIONS,
+        shared: bool = False,
+        slots: int = FRAGMENT_BUDGET_SLOTS,
+    ) -> None:
+        size = _HEADER + _SLOT_FIELDS * slots
+        self._state: MutableSequence[int]
+        self._lock: ContextManager[Any]
+        if shared:
+            context = get_context()
+            self._state = context.RawArray("q", size)
+            self._lock = context.Lock()
+        else:
+            self._state = array("q", bytes(8 * size))
+            self._lock = threading.Lock()
+        self.slots = slots
+        self.set_connections(connections)
+
+    @property
+    def connections(self) -> int:
+        return self._state[_CONNECTIONS]
+
+    def set_connections(self, connections: int) -> None:
+        with self._lock:
+            self._state[_CONNECTIONS] = max(int(connections), 1)
+            self._rebalance()
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER + _SLOT_FIELDS * slot
+
+    def join(self, job_id: int, fragments: int = 1) -> Optional[int]:
+        """Track ``job_id``; returns its slot, or None when all are taken."""
+        with self._lock:
+            free = None
+            for slot in range(self.slots):
+                holder = self._state[self._offset(slot) + _JOB]
+                if holder == job_id + 1:
+                    free = slot
+                    break
+                if holder == 0 and free is None:
+                    free = slot
+            if free is None:
+                return None
+            offset = self._offset(free)
+            self._state[offset + _JOB] = job_id + 1
+            self._state[offset + _WANTED] = wanted_connections(fragments)
+            self._rebalance()
+            return free
+
+    def update(self, slot: int, fragments: int) -> None:
+        wanted = wanted_connections(fragments)
+        with self._lock:
+            offset = self._offset(slot)
+            if self._state[offset + _WANTED] != wanted:
+                self._state[offset + _WANTED] = wanted
+                self._rebalance()
+
+    def leave(self, slot: int) -> None:
+        with self._lock:
+            offset = self._offset(slot)
+            for field in range(_SLOT_FIELDS):
+                self._state[offset + field] = 0
+            self._rebalance()
+
+    def allowed(self, slot: Optional[int]) -> int:
+        """Fragments the job in ``slot`` may download at once; lock-free."""
+        if slot is None:
+            return 1
+        return max(self._state[self._offset(slot) + _ALLOWED], 1)
+
+    def _rebalance(self) -> None:
+        active = [
+            offset
+            for offset in map(self._offset, range(self.slots))
+            if self._state[offset + _JOB]
+        ]
+        active.sort(key=lambda offset: self._state[offset + _WANTED])
+        remaining = self._state[_CONNECTIONS]
+        # Smallest wants first, so what they leave over goes to the larger ones.
+        for left, offset in zip(range(len(active), 0, -1), active):
+            allowed = min(self._state[offset + _WANTED], max(remaining // left, 1))
+            self._state[offset + _ALLOWED] = allowed
+            remaining -= allowed
+
+
+def expected_fragments(info: Dict[str, Any]) -> int:
+    """Largest fragment count among the formats ``info`` will download.
+
+    Read from the extracted formats, without touching the network: DASH
+    formats list their fragments, HLS media playlists are only fetched by
+    the download itself, so their count is estimated from the duration.
+    """
+    formats = info.get("requested_formats") or [info]
+    return max(_format_fragments(fmt, info.get("duration")) for fmt in formats)
+
+
+def _format_fragments(fmt: Dict[str, Any], duration: Optional[float]) -> int:
+    if isinstance(fmt.get("fragments"), list):
+        return len(fmt["fragments"])
+    if fmt.get("protocol") not in FRAGMENT_PROTOCOLS:
+        return 1
+    duration = fmt.get("duration") or duration
+    if duration:
+        return math.ceil(duration / FRAGMENT_SECONDS)
+    return 1
+
+
+class FragmentTuner:
+    """Keep one job's ``concurrent_fragment_downloads`` at its share of the budget.
+
+    yt-dlp reads the option from its params once, when it starts downloading
+    a fragmented format, and keeps that pool until the format is done. The
+    job's share is therefore chosen before the download (see
+    ``FragmentPlanPP``) and rewritten from every progress update, so the
+    real fragment count and changes made by other jobs starting or ending
+    apply from the job's next format or playlist entry, never to the format
+    already downloading.
+    """
+
+    def __init__(self, budget: FragmentBudget, job_id: int) -> None:
+        self.budget = budget
+        self.job_id = job_id
+        self.params: MutableMapping[str, Any] = {}
+        self.slot = budget.join(job_id)
+        self._fragments = 1
+
+    def plan(self, fragments: int) -> None:
+        if self.slot is not None and fragments != self._fragments:
+            self._fragments = fragments
+            self.budget.update(self.slot, fragments)
+        self._apply()
+
+    def _apply(self) -> None:
+        allowed = self.budget.allowed(self.slot)
+        if self.params.get("concurrent_fragment_downloads") != allowed:
+            self.params["concurrent_fragment_downloads"] = allowed
+
+    def __call__(self, d: Dict[str, Any]) -> None:
+        if d["status"] != "downloading":
+            return
+        if d.get("fragment_count"):
+            self.plan(int(d["fragment_count"]))
+        else:
+            self._apply()
+
+    def close(self) -> None:
+        if self.slot is not None:
+            self.budget.leave(self.slot)
+            self.slot = None
+
+
+class FragmentPlanPP(PostProcessor):
+    """Size the job's fragment concurrency before each download starts."""
+
+    def __init__(self, tuner: FragmentTuner, downloader: Any = None) -> None:
+        super().__init__(downloader)
+        self.tuner = tuner
+
+    def run(self, info: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
+        self.tuner.plan(expected_fragments(info))
+        return [], info
@@ -0,0 +1,193 @@
+import codecs
+import csv
+import io
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from utils.constants import CSV_DELIMITERS, CSV_QUERY_BATCH, CSV_SNIFF_BYTES
+
+# Applied to a whole batch of newline-joined queries at once, so the patterns
+# must never match across a newline.
+_BRACKETED = re.compile(r"\([^)\n]*\)")
+_REMIX = re.compile(r" - [^\n]*Remix")
+_SPACES = re.compile(r"[^\S\n]+")
+_LINE_EDGES = re.compile(r"^ | $", re.MULTILINE)
+_HEADER_NOISE = re.compile(r"[^a-z0-9]+")
+
+# Normalized header names recognised for each field.
+COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "artist": ("artist", "artists", "artist name", "artist names", "artist name s"),
+    "title": ("title", "track", "track name", "track title", "song", "song name"),
+    "album": ("album", "album name", "album title", "release"),
+    "duration": ("duration", "length", "time", "duration ms", "track duration ms"),
+    "isrc": ("isrc",),
+    # Exports holding a ready "Artist - Title" string. The listening-history
+    # export this app first read heads that column "Listen num".
+    "query": ("query", "search", "listen num"),
+}
+_FIELDS = {alias: field for field, names in COLUMN_ALIASES.items() for alias in names}
+
+
+class Track(NamedTuple):
+    artist: str
+    title: str
+    album: str = ""
+    duration: Optional[float] = None
+    isrc: str = ""
+
+    @property
+    def query(self) -> str:
+        if self.artist and self.title:
+            return f"{self.artist} - {self.title}"
+        return self.title or self.artist
+
+
+def normalize_queries(queries: List[str]) -> List[str]:
+    """Clean search queries in one pass per pattern over the whole batch.
+
+    Drops bracketed parts such as "(Official Video)" and " - ... Remix"
+    suffixes and collapses whitespace, like ``clean_search_query``.
+    """
+    text = "\n".join(query.replace("\n", " ") for query in queries)
+    text = _BRACKETED.sub("", text)
+    text = _REMIX.sub("", text)
+    text = _SPACES.sub(" ", text)
+    text = _LINE_EDGES.sub("", text)
+    return text.split("\n")
+
+
+def sniff_encoding(sample: bytes) -> str:
+    """Encoding of a file starting with ``sample``: BOM, else UTF-8, else cp1252."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # Not final: the sample may end inside a multi-byte character.
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def sniff_dialect(sample: str) -> Type[csv.Dialect]:
+    lines = sample.splitlines()
+    if len(lines) > 1:
+        # Drop a line cut off by the end of the sample.
+        lines = lines[:-1]
+    sample = "\n".join(lines)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+    except csv.Error:
+        first = lines[0] if lines else ""
+        delimiter = max(CSV_DELIMITERS, key=first.count)
+
+        class Dialect(csv.excel):
+            pass
+
+        Dialect.delimiter = delimiter if first.count(delimiter) else ","
+        return Dialect
+
+
+def map_columns(header: List[str]) -> Dict[str, int]:
+    """Field name to column index for the header names that are recognised."""
+    columns: Dict[str, int] = {}
+    for index, name in enumerate(header):
+        key = _HEADER_NOISE.sub(" ", name.lower()).strip()
+        field = _FIELDS.get(key)
+        if field is not None:
+            columns.setdefault(field, index)
+            if field == "duration" and key.endswith("ms"):
+                columns["duration_ms"] = index
+    return columns
+
+
+def parse_duration(value: str, milliseconds: bool = False) -> Optional[float]:
+    """Seconds from "225", "3:45" or "1:02:03"; None if unparseable."""
+    try:
+        seconds = 0.0
+        for part in value.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return seconds / 1000 if milliseconds and ":" not in value else seconds
+
+
+def _cell(index: Optional[int]) -> Callable[[List[str]], str]:
+    if index is None:
+        return lambda row: ""
+    return lambda row: row[index].strip() if index < len(row) else ""
+
+
+class CsvTracks:
+    """Tracks of a playlist or listening-history CSV export, read lazily.
+
+    The encoding, delimiter and header are detected from the first
+    ``CSV_SNIFF_BYTES`` when the object is created, so a bad path fails
+    immediately. Columns are found by header name, whatever their order; a
+    file whose first row names no known column is read as headerless, one
+    query per row in its first column. Rows are then streamed: only one
+    batch of ``batch_size`` rows is held in memory at a time.
+    """
+
+    def __init__(self, path: str | Path, batch_size: int = CSV_QUERY_BATCH) -> None:
+        self.path = Path(path)
+        self.batch_size = batch_size
+        with open(self.path, "rb") as file:
+            sample = file.read(CSV_SNIFF_BYTES)
+        self.encoding = sniff_encoding(sample)
+        text = sample.decode(self.encoding, errors="ignore")
+        self.dialect = sniff_dialect(text)
+        header = next(csv.reader(io.StringIO(text), self.dialect), [])
+        self.columns = map_columns(header)
+        self.has_header = "title" in self.columns or "query" in self.columns
+        if not self.has_header:
+            self.columns = {"query": 0}
+
+    def rows(self) -> Iterator[List[str]]:
+        with open(
+            self.path, encoding=self.encoding, errors="replace", newline=""
+        ) as file:
+            reader = csv.reader(file, self.dialect)
+            if self.has_header:
+                next(reader, None)
+            for row in reader:
+                if row:
+                    yield row
+
+    def __iter__(self) -> Iterator[Track]:
+        artist = _cell(self.columns.get("artist"))
+        title = _cell(self.columns.get("title", self.columns.get("query")))
+        album = _cell(self.columns.get("album"))
+        duration = _cell(self.columns.get("duration"))
+        isrc = _cell(self.columns.get("isrc"))
+        milliseconds = "duration_ms" in self.columns
+        for row in self.rows():
+            seconds = duration(row)
+            yield Track(
+                artist(row),
+                title(row),
+                album(row),
+                parse_duration(seconds, milliseconds) if seconds else None,
+                isrc(row),
+            )
+
+    def queries(self) -> Iterator[str]:
+        """Normalized "Artist - Title" search queries, skipping empty rows."""
+        if "query" in self.columns and "title" not in self.columns:
+            query = _cell(self.columns["query"])
+        else:
+            artist = _cell(self.columns.get("artist"))
+            title = _cell(self.columns.get("title"))
+
+            def query(row: List[str]) -> str:
+                return Track(artist(row), title(row)).query
+
+        rows = self.rows()
+        while True:
+            batch = [query(row) for row in islice(rows, self.batch_size)]
+            if not batch:
+                return
+            yield from filter(None, normalize_queries(batch))
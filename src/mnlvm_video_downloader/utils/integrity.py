@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+from shutil import which
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from yt_dlp.postprocessor import PostProcessor
+from utils.constants import (
+    CONTENT_HASH_ALGORITHM,
+    CONTENT_HASH_CHUNK_SIZE,
+    CONTENT_INDEX_FILENAME,
+    CORRUPT_SUFFIX,
+    STAGING_DIRNAME,
+)
+
+
+def new_hash() -> "hashlib._Hash":
+    return hashlib.new(CONTENT_HASH_ALGORITHM)
+
+
+def _feed(hasher: "hashlib._Hash", path: str, offset: int) -> int:
+    """Hash ``path`` from ``offset`` to its current end; returns the new end."""
+    with open(path, "rb") as file:
+        file.seek(offset)
+        while True:
+            chunk = file.read(CONTENT_HASH_CHUNK_SIZE)
+            if not chunk:
+                return offset
+            hasher.update(chunk)
+            offset += len(chunk)
+
+
+def hash_file(path: str) -> str:
+    hasher = new_hash()
+    _feed(hasher, path, 0)
+    return hasher.hexdigest()
+
+
+def _file_key(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class StreamHasher:
+    """yt-dlp progress hook hashing each download while it is written.
+
+    Every ``CONTENT_HASH_CHUNK_SIZE`` bytes the newly appended part of the
+    ``.part`` file is read back, straight from the page cache, so the digest
+    is ready when the download finishes without another pass over the file.
+    A digest is only valid while the file keeps the size and modification
+    time it had then.
+
+    Only single-file formats get a digest. Separate video and audio streams,
+    which the default format selector asks for, are merged by ffmpeg into a
+    new file whose bytes never go through the hook, and fixups rewrite the
+    file; such files are left unhashed rather than read a second time.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, Tuple["hashlib._Hash", int]] = {}
+        self._digests: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+
+    def __call__(self, d: Dict[str, Any]) -> None:
+        if (d.get("info_dict") or {}).get("requested_formats"):
+            # A part of a merged format: its digest would be thrown away.
+            return
+        partial: Optional[str] = d.get("tmpfilename") or d.get("filename")
+        try:
+            if d["status"] == "downloading":
+                self._update(partial, d)
+            elif d["status"] == "finished":
+                self._finish(d.get("filename"))
+        except OSError:
+            # Hashing is best effort: a file without a digest is left unhashed.
+            if partial:
+                self._pending.pop(partial, None)
+
+    def _update(self, filename: Optional[str], d: Dict[str, Any]) -> None:
+        if not filename:
+            return
+        hasher, offset = self._pending.get(filename) or (new_hash(), 0)
+        downloaded = int(d.get("downloaded_bytes") or 0)
+        # The first read also covers a prefix left by a paused download.
+        if offset == 0 or downloaded - offset >= CONTENT_HASH_CHUNK_SIZE:
+            offset = _feed(hasher, filename, offset)
+        self._pending[filename] = (hasher, offset)
+
+    def _finish(self, filename: Optional[str]) -> None:
+        if not filename:
+            return
+        # yt-dlp has already renamed the ``.part`` file when it reports this.
+        pending = self._pending.pop(filename + ".part", None) or self._pending.pop(
+            filename, None
+        )
+        if pending is None:
+            return
+        hasher, offset = pending
+        _feed(hasher, filename, offset)
+        self._digests[filename] = (hasher.hexdigest(), _file_key(filename))
+
+    def digest(self, path: str) -> Optional[str]:
+        """Content hash streamed for ``path``, or None if it was not streamed."""
+        streamed = self._digests.get(path)
+        if streamed is not None and streamed[1] == _file_key(path):
+            return streamed[0]
+        return None
+
+
+class ContentHashPP(PostProcessor):
+    """Record the final file's streamed hash as ``content_hash`` in its info.
+
+    Runs after the merger and fixups; a file they wrote has no streamed
+    hash and gets no ``content_hash``, so it is not deduplicated when it
+    arrives (``ContentIndex.scan`` still covers it).
+    """
+
+    def __init__(self, hasher: StreamHasher, downloader: Any = None) -> None:
+        super().__init__(downloader)
+        self.hasher = hasher
+
+    def run(self, info: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
+        filepath = info.get("filepath")
+        if filepath and os.path.exists(filepath):
+            digest = self.hasher.digest(filepath)
+            if digest is not None:
+                info["content_hash"] = digest
+        return [], info
+
+
+def find_ffprobe(ffmpeg_path: Optional[str]) -> Optional[str]:
+    """ffprobe shipped next to ``ffmpeg_path``, else the one on PATH."""
+    if ffmpeg_path:
+        ffmpeg = Path(ffmpeg_path)
+        sibling = ffmpeg.with_name(ffmpeg.name.replace("ffmpeg", "ffprobe"))
+        if sibling != ffmpeg and sibling.is_file():
+            return str(sibling)
+    return which("ffprobe")
+
+
+def probe_media(path: str, ffprobe: str, logger: Any = None) -> Optional[str]:
+    """Return why ffprobe rejects ``path``, or None if it looks playable.
+
+    Decoding only the container header and stream table is enough to catch
+    truncated files and broken muxes in a few milliseconds. The verdict
+    rests on the exit code, the streams found and the duration: ffprobe also
+    reports harmless problems of playable files, like non-monotonic
+    timestamps or edit lists, which are only logged.
+    """
+    result = subprocess.run(
+        [
+            ffprobe,
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration:stream=index",
+            "-of",
+            "json",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    message = result.stderr.strip()
+    if result.returncode != 0:
+        return message or f"ffprobe exited with {result.returncode}"
+    try:
+        probed = json.loads(result.stdout)
+    except ValueError:
+        return "unreadable ffprobe output"
+    if not probed.get("streams"):
+        return "no streams"
+    try:
+        duration = float(probed.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = 0.0
+    if duration <= 0:
+        return "no duration"
+    if message and logger:
+        logger.warning(f"ffprobe accepted {path} with: {message}")
+    return None
+
+
+def quarantine(path: str) -> Path:
+    """Rename a rejected file so a retry downloads it again."""
+    target = Path(path + CORRUPT_SUFFIX)
+    os.replace(path, target)
+    return target
+
+
+class ContentIndex:
+    """Content hash to file map over ``output_dir`` and any ``extra_roots``.
+
+    A file whose content is already in the library is replaced by a hardlink
+    to the existing copy; copies on different filesystems are kept. The index
+    is an append-only log of ``<hash> <path>`` lines, paths being relative to
+    ``root`` (files on other volumes start with ``..``), so recording a file
+    costs one short write however large the library is; entries whose file is
+    gone or has changed size are ignored and overwritten.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        index_path: Optional[Path] = None,
+        extra_roots: Iterable[Path] = (),
+    ) -> None:
+        self.root = Path(root)
+        self.roots = [self.root, *(Path(extra) for extra in extra_roots)]
+        self.index_path = Path(index_path or self.root / CONTENT_INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._paths: Optional[Dict[str, str]] = None
+
+    def _load(self) -> Dict[str, str]:
+        if self._paths is None:
+            self._paths = {}
+            try:
+                with open(self.index_path, encoding="utf8") as file:
+                    for line in file:
+                        digest, _, relative = line.rstrip("\n").partition(" ")
+                        if relative:
+                            self._paths[digest] = relative
+            except FileNotFoundError:
+                pass
+        return self._paths
+
+    def add(self, path: str, digest: str) -> int:
+        """Index ``path``; returns the bytes reclaimed by hardlinking it."""
+        file = Path(path)
+        with self._lock:
+            existing = self._existing(digest, file)
+            if existing is not None and _link_over(existing, file):
+                return file.stat().st_size
+            self._record(digest, file)
+            return 0
+
+    def _existing(self, digest: str, path: Path) -> Optional[Path]:
+        relative = self._load().get(digest)
+        if relative is None:
+            return None
+        existing = self.root / relative
+        try:
+            if existing.stat().st_size != path.stat().st_size:
+                return None
+            if os.path.samefile(existing, path):
+                return None
+        except OSError:
+            return None
+        return existing
+
+    def _record(self, digest: str, path: Path) -> None:
+        path = path.resolve()
+        if not any(path.is_relative_to(root.resolve()) for root in self.roots):
+            return
+        try:
+            relative = Path(os.path.relpath(path, self.root.resolve())).as_posix()
+        except ValueError:
+            # A volume on another Windows drive has no relative path.
+            relative = path.as_posix()
+        self._load()[digest] = relative
+        with open(self.index_path, "a", encoding="utf8") as file:
+            file.write(f"{digest} {relative}\n")
+
+    def scan(self) -> int:
+        """Hash every file under the roots and hardlink duplicates.
+
+        Rewrites the index from scratch and returns the bytes reclaimed.
+        Use it once on an existing library; new downloads are indexed as they
+        finish.
+        """
+        with self._lock:
+            self._paths = {}
+            self.index_path.unlink(missing_ok=True)
+        reclaimed = 0
+        for path in self._library_files():
+            reclaimed += self.add(str(path), hash_file(str(path)))
+        return reclaimed
+
+    def _library_files(self) -> Iterator[Path]:
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [name for name in dirnames if name != STAGING_DIRNAME]
+                for name in filenames:
+                    path = Path(dirpath) / name
+                    if path != self.index_path and not name.endswith(CORRUPT_SUFFIX):
+                        yield path
+
+
+def _link_over(existing: Path, path: Path) -> bool:
+    """Atomically replace ``path`` with a hardlink to ``existing``."""
+    temporary = path.with_name(path.name + ".dedup")
+    try:
+        os.link(existing, temporary)
+    except OSError:
+        # Another filesystem, or one without hardlinks: keep both copies.
+        return False
+    os.replace(temporary, path)
+    return True
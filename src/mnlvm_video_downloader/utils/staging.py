@@ -0,0 +1,190 @@
+import ctypes
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+from sys import platform
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from yt_dlp.postprocessor import PostProcessor
+from exceptions import InsufficientDiskSpaceError
+from utils.constants import (
+    STAGING_DIRNAME,
+    STAGING_FREE_SPACE_MARGIN,
+    STAGING_MAX_AGE,
+)
+from utils.utils import create_dir
+
+FALLOC_FL_KEEP_SIZE = 0x01
+
+
+def _load_fallocate() -> Optional[Callable[..., int]]:
+    if platform != "linux":
+        return None
+    try:
+        fallocate = ctypes.CDLL(None, use_errno=True).fallocate
+    except (OSError, AttributeError):
+        return None
+    fallocate.argtypes = (
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_longlong,
+        ctypes.c_longlong,
+    )
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+
+_fallocate = _load_fallocate()
+
+
+def same_filesystem(first: Path, second: Path) -> bool:
+    try:
+        return first.stat().st_dev == second.stat().st_dev
+    except OSError:
+        return False
+
+
+def preallocate(path: str, size: int) -> bool:
+    """Reserve ``size`` bytes for ``path`` without changing its apparent size.
+
+    yt-dlp appends to its ``.part`` files, so the file length must stay
+    untouched; ``FALLOC_FL_KEEP_SIZE`` only reserves contiguous blocks. This is
+    a no-op on platforms without ``fallocate``.
+    """
+    if _fallocate is None or size <= 0:
+        return False
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except OSError:
+        return False
+    try:
+        return _fallocate(fd, FALLOC_FL_KEEP_SIZE, 0, size) == 0
+    finally:
+        os.close(fd)
+
+
+def expected_size(info: Dict[str, Any]) -> int:
+    formats = info.get("requested_formats") or [info]
+    return sum(
+        int(fmt.get("filesize") or fmt.get("filesize_approx") or 0) for fmt in formats
+    )
+
+
+def preallocation_hook() -> Callable[[Dict[str, Any]], None]:
+    preallocated: Set[str] = set()
+
+    def progress_hook(d: Dict[str, Any]) -> None:
+        filename = d.get("tmpfilename")
+        if d["status"] != "downloading" or not filename or filename in preallocated:
+            return
+        preallocated.add(filename)
+        preallocate(filename, int(d.get("total_bytes") or 0))
+
+    return progress_hook
+
+
+class StagingArea:
+    """Directory where downloads are written before being published.
+
+    Staging lives on the same filesystem as ``output_dir`` so finished files
+    can be published with a single atomic rename. Each job stages into a
+    directory derived from its URL, which lets interrupted downloads resume
+    from their partial files on the next run. The controller never runs two
+    jobs for the same URL at once, so a job directory has a single writer.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        temp_dir: Optional[Path] = None,
+        max_age: float = STAGING_MAX_AGE,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.max_age = max_age
+        if temp_dir is not None and same_filesystem(Path(temp_dir), self.output_dir):
+            self.root = Path(temp_dir) / STAGING_DIRNAME
+        else:
+            self.root = self.output_dir / STAGING_DIRNAME
+        create_dir(self.root)
+
+    def _job_path(self, url: str) -> Path:
+        return self.root / hashlib.sha1(url.encode("utf8")).hexdigest()[:16]
+
+    def job_dir(self, url: str) -> Path:
+        path = self._job_path(url)
+        create_dir(path)
+        return path
+
+    def has_partial(self, url: str) -> bool:
+        """Whether an earlier run left files to resume for ``url``."""
+        try:
+            return any(self._job_path(url).iterdir())
+        except OSError:
+            return False
+
+    def release(self, job_dir: Path) -> None:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    def check_free_space(self, size: int) -> None:
+        free = shutil.disk_usage(self.root).free
+        required = size + STAGING_FREE_SPACE_MARGIN
+        if free < required:
+            raise InsufficientDiskSpaceError(required, free)
+
+    def publish(self, staged: Path, destination: Path) -> Path:
+        # Windows refuses to flush a handle opened read-only.
+        with open(staged, "r+b") as file:
+            os.fsync(file.fileno())
+        create_dir(destination.parent)
+        os.replace(staged, destination)
+        return destination
+
+    def sweep(self) -> int:
+        """Remove job directories left behind by runs that never finished."""
+        removed = 0
+        cutoff = time.time() - self.max_age
+        for job_dir in self.root.iterdir():
+            try:
+                if job_dir.stat().st_mtime < cutoff:
+                    shutil.rmtree(job_dir, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+class FreeSpaceCheckPP(PostProcessor):
+    """Refuse to start a download that would not fit in the staging area."""
+
+    def __init__(self, staging: StagingArea, downloader: Any = None) -> None:
+        super().__init__(downloader)
+        self.staging = staging
+
+    def run(self, info: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
+        size = expected_size(info)
+        if info.get("requested_formats"):
+            # Merging keeps the separate streams until the output is written.
+            size *= 2
+        self.staging.check_free_space(size)
+        return [], info
+
+
+class AtomicPublishPP(PostProcessor):
+    """Move the finished file out of staging with ``os.replace``."""
+
+    def __init__(self, staging: StagingArea, downloader: Any = None) -> None:
+        super().__init__(downloader)
+        self.staging = staging
+
+    def run(self, info: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
+        staged = Path(info["filepath"])
+        final_dir = info.get("__finaldir")
+        if not final_dir or not staged.exists():
+            return [], info
+        destination = Path(final_dir) / staged.name
+        if staged != destination:
+            self.staging.publish(staged, destination)
+            info["filepath"] = str(destination)
+        return [], info
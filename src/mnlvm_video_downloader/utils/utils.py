@@ -2,9 +2,13 @@ import re
 from pathlib import Path
 from sys import platform
 from uuid import uuid1
+from typing import Optional
 from urllib.request import urlretrieve
 from shutil import which
 
+from utils.constants import DAEMON_TOKEN_FILENAME
+from utils.ingest import normalize_queries
+
 
 def safe_path_string(string: str) -> str:
     keep_characters = " !£$%^&()_-+=,.;'@#~[]{}"
@@ -28,10 +32,7 @@ def check_ffmpeg() -> bool:
 
 
 def clean_search_query(artist_title: str) -> str:
-    cleaned = re.sub(r"\([^)]*\)", "", artist_title)
-    cleaned = re.sub(r" - .*Remix", "", cleaned)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    return cleaned
+    return normalize_queries([artist_title])[0]
 
 
 def check_file(path: Path) -> bool:
@@ -46,7 +47,13 @@ def clean_percent_str(s: str) -> str:
 
 
 class PathHolder:
-    def __init__(self, data_path: str = None, downloads_path: str = None):
+    def __init__(
+        self,
+        data_path: Optional[str | Path] = None,
+        downloads_path: Optional[str | Path] = None,
+    ) -> None:
+        self.data_path: Path
+        self.downloads_path: Path
         if data_path is None:
             home = Path.home()
 
@@ -85,3 +92,8 @@ class PathHolder:
 
         urlretrieve(url, str(file_path))
         return file_path
+
+
+def daemon_token_path() -> Path:
+    """Where the daemon writes the token its clients must send."""
+    return PathHolder().data_path / DAEMON_TOKEN_FILENAME
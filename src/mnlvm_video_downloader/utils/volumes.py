@@ -0,0 +1,113 @@
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional
+
+from utils.constants import STAGING_FREE_SPACE_MARGIN
+from utils.staging import StagingArea
+from utils.utils import create_dir
+
+
+class Volume:
+    """One output root, usually a mount point of its own."""
+
+    __slots__ = ("root", "weight", "staging", "writers")
+
+    def __init__(self, root: str | Path, weight: float = 1.0) -> None:
+        self.root = Path(root)
+        self.weight = weight
+        self.staging: Optional[StagingArea] = None
+        self.writers = 0
+
+    def free_space(self) -> int:
+        try:
+            return shutil.disk_usage(self.root).free
+        except OSError:
+            return 0
+
+    def score(self, size: int) -> float:
+        """Higher is better; 0 if ``size`` bytes would not fit."""
+        free = self.free_space() - size - STAGING_FREE_SPACE_MARGIN
+        if free <= 0:
+            return 0.0
+        return self.weight * free / (1 + self.writers)
+
+
+class VolumeSet:
+    """Output roots that together hold one library.
+
+    Each job is placed on the volume with the best weighted free space per
+    job already writing there, so concurrent downloads and merges spread
+    over the disks instead of queueing on one. A job keeps its volume until
+    it finishes, so a paused job resumes from its partial file. The first
+    root is the primary one: it holds the content index and receives files
+    when no volume has room.
+
+    Paths in the library are relative to a root; ``locate`` finds which
+    volume holds one.
+    """
+
+    def __init__(self, roots: Mapping[str | Path, float]) -> None:
+        if not roots:
+            raise ValueError("at least one output root is required")
+        self.volumes = [Volume(root, weight) for root, weight in roots.items()]
+        for volume in self.volumes:
+            if volume.weight <= 0:
+                raise ValueError(f"weight of {volume.root} must be positive")
+            create_dir(volume.root)
+        self._lock = threading.Lock()
+        self._placements: Dict[int, Volume] = {}
+
+    @property
+    def primary(self) -> Volume:
+        return self.volumes[0]
+
+    @property
+    def roots(self) -> List[Path]:
+        return [volume.root for volume in self.volumes]
+
+    def __iter__(self) -> Iterator[Volume]:
+        return iter(self.volumes)
+
+    def __len__(self) -> int:
+        return len(self.volumes)
+
+    def place(
+        self, job_id: int, size: int = 0, prefer: Optional[Volume] = None
+    ) -> Volume:
+        """Volume ``job_id`` writes to, choosing one on its first call.
+
+        ``prefer`` wins over the scores, for a job with a partial download
+        left on that volume.
+        """
+        with self._lock:
+            volume = self._placements.get(job_id) or prefer
+            if volume is None:
+                score, volume = max(
+                    ((volume.score(size), volume) for volume in self.volumes),
+                    key=lambda scored: scored[0],
+                )
+                if score == 0:
+                    # Nowhere fits: the free space check will report it.
+                    volume = max(self.volumes, key=Volume.free_space)
+            if job_id not in self._placements:
+                volume.writers += 1
+                self._placements[job_id] = volume
+            return volume
+
+    def placement(self, job_id: int) -> Optional[Volume]:
+        return self._placements.get(job_id)
+
+    def release(self, job_id: int) -> None:
+        with self._lock:
+            volume = self._placements.pop(job_id, None)
+            if volume is not None:
+                volume.writers -= 1
+
+    def locate(self, relative: str | Path) -> Optional[Path]:
+        """Absolute path of a library file, on whichever volume holds it."""
+        for volume in self.volumes:
+            path = volume.root / relative
+            if path.exists():
+                return path
+        return None
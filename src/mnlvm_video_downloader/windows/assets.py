@@ -0,0 +1,114 @@
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from PIL import Image
+
+from utils.constants import GLIPH_ICON_SIZE, IMAGES_DIR
+from utils.utils import create_dir
+
+# Attribute name on the window -> (file in IMAGES_DIR, display size).
+WINDOW_IMAGES: Dict[str, Tuple[str, Tuple[int, int]]] = {
+    "logo": ("logos.png", (270, 145)),
+    "logo_welcome": ("ekila-downaudio.jpg", (859, 145)),
+    "search_image": ("search.png", GLIPH_ICON_SIZE),
+    "download_image": ("download.png", GLIPH_ICON_SIZE),
+    "quit_image": ("quitter.png", GLIPH_ICON_SIZE),
+}
+
+
+class ImageCache:
+    """Images scaled to their display size, kept on disk across runs.
+
+    The source images are several times larger than they are shown, so
+    decoding and resizing them dominates a cold start. Each scaled copy is
+    stored as PNG under a name that carries the pixel size and the source's
+    size and modification time, so replacing a source image or changing the
+    display scaling produces a new entry instead of a stale one.
+    """
+
+    def __init__(self, cache_dir: Path, images_dir: Path = IMAGES_DIR) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.images_dir = Path(images_dir)
+        create_dir(self.cache_dir)
+
+    @staticmethod
+    def _prefix(source: Path, size: Tuple[int, int]) -> str:
+        width, height = size
+        return f"{source.stem}-{width}x{height}-"
+
+    def _cache_path(self, source: Path, size: Tuple[int, int]) -> Path:
+        stat = source.stat()
+        return self.cache_dir / (
+            f"{self._prefix(source, size)}{stat.st_size}-{stat.st_mtime_ns}.png"
+        )
+
+    def load(self, filename: str, size: Tuple[int, int]) -> Image.Image:
+        """``filename`` from the images directory, scaled to ``size`` pixels."""
+        source = self.images_dir / filename
+        cached = self._cache_path(source, size)
+        try:
+            with Image.open(cached) as image:
+                image.load()
+                return image
+        except (OSError, ValueError):
+            pass
+
+        with Image.open(source) as image:
+            scaled = image.resize(size, Image.Resampling.LANCZOS)
+        self._store(cached, scaled, self._prefix(source, size))
+        return scaled
+
+    def _store(self, path: Path, image: Image.Image, prefix: str) -> None:
+        # Written aside and renamed, so a concurrent start never reads half a file.
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}")
+        try:
+            image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        # Copies of an older version of the source at the same size.
+        for stale in self.cache_dir.glob(f"{prefix}*.png"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    def load_all(
+        self, images: Mapping[str, Tuple[str, Tuple[int, int]]], scaling: float = 1.0
+    ) -> Dict[str, Image.Image]:
+        """Load every ``name: (filename, size)`` at ``scaling`` times its size."""
+        return {
+            name: self.load(
+                filename, (round(size[0] * scaling), round(size[1] * scaling))
+            )
+            for name, (filename, size) in images.items()
+        }
+
+    def load_in_background(
+        self,
+        images: Mapping[str, Tuple[str, Tuple[int, int]]],
+        callback: Callable[[Dict[str, Image.Image]], None],
+        scaling: float = 1.0,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> threading.Thread:
+        """Run ``load_all`` on a daemon thread and pass the result to ``callback``.
+
+        If loading fails, for a missing source image say, the exception goes
+        to ``on_error`` instead. Both run on that thread; a Tk caller must
+        hand them to the Tk thread.
+        """
+
+        def load() -> None:
+            try:
+                loaded = self.load_all(images, scaling)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+            else:
+                callback(loaded)
+
+        thread = threading.Thread(target=load, name="image-loader", daemon=True)
+        thread.start()
+        return thread
@@ -1,15 +1,30 @@
 import tkinter as tk
 import asyncio
+import queue
+import sys
 from datetime import datetime
 from windows.helper import open_many_file
 from tkinter import Menu, messagebox
-from typing import List, Tuple
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 from PIL import Image
 import customtkinter
-from utils.constants import GLIPH_ICON_SIZE, DEFAULT_WINDOW_SIZE, DATE_FORMAT, BASE_DIR
-from controllers.video import YouTubeDownloaderController
+from utils.constants import (
+    DEFAULT_WINDOW_SIZE,
+    DATE_FORMAT,
+    IMAGE_CACHE_DIRNAME,
+    INTERACTIVE_PRIORITY,
+    TK_POLL_INTERVAL_MS,
+)
+from utils.utils import PathHolder
+from windows.assets import WINDOW_IMAGES, ImageCache
 import threading
 
+if TYPE_CHECKING:
+    from controllers.client import DaemonClient
+    from controllers.video import YouTubeDownloaderController
+
 # Modes: "System" (standard), "Dark", "Light"
 customtkinter.set_appearance_mode("System")
 # Themes: "blue" (standard), "green", "dark-blue"
@@ -18,38 +33,70 @@ customtkinter.set_default_color_theme("green")
 
 class Window(customtkinter.CTk):
     def __init__(
-        self, yt_controler: YouTubeDownloaderController, user_login: str = "Anonymous"
+        self,
+        yt_controler: Union["YouTubeDownloaderController", "DaemonClient"],
+        user_login: str = "Anonymous",
+        image_cache_dir: Optional[Path] = None,
     ) -> None:
         super().__init__()
         self.user_login = user_login
         self.list_file: List[str] = []
         self.is_song_loading: bool = False
         self.yt_controler = yt_controler
+        self.image_cache = ImageCache(
+            image_cache_dir or PathHolder().data_path / IMAGE_CACHE_DIRNAME
+        )
+        # Filled in by _show_images once the background load finishes.
+        self.logo: Optional[customtkinter.CTkImage] = None
+        self.logo_welcome: Optional[customtkinter.CTkImage] = None
+        self.search_image: Optional[customtkinter.CTkImage] = None
+        self.download_image: Optional[customtkinter.CTkImage] = None
+        self.quit_image: Optional[customtkinter.CTkImage] = None
+        # Calls handed over by other threads, run by _run_tk_calls while
+        # background work is pending (see _expect_tk_calls).
+        self._tk_calls: "queue.Queue[Tuple[Callable[..., None], Tuple[Any, ...]]]" = (
+            queue.Queue()
+        )
+        self._tk_pending = 0
+        self._tk_polling = False
 
-        self._load_images()
+        # One long-lived event loop runs every download batch, so the
+        # controller's async API is shared instead of a loop per click.
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
 
         self._setup_window()
         self._create_widgets()
 
+        self._load_images()
         self._update_date()
 
     def _load_images(self) -> None:
-        self.logo = self._create_image(
-            str(BASE_DIR) + "\windows\images\logos.png", (270, 145)
-        )
-        self.logo_welcome = self._create_image(
-            str(BASE_DIR) + "\windows\images\ekila-downaudio.jpg", (859, 145)
+        # Images are decoded and scaled off the Tk thread: the window paints
+        # first and they appear as soon as they are ready.
+        self._expect_tk_calls()
+        self.image_cache.load_in_background(
+            WINDOW_IMAGES,
+            self._on_tk_thread(self._images_loaded),
+            customtkinter.ScalingTracker.get_widget_scaling(self),
+            on_error=self._on_tk_thread(self._images_failed),
         )
 
-        self.search_image = self._create_image(
-            str(BASE_DIR) + "\windows\images\search.png", GLIPH_ICON_SIZE
-        )
-        self.download_image = self._create_image(
-            str(BASE_DIR) + "\windows\images\download.png", GLIPH_ICON_SIZE
-        )
-        self.quit_image = self._create_image(
-            str(BASE_DIR) + "\windows\images\quitter.png", GLIPH_ICON_SIZE
-        )
+    def _images_loaded(self, images: Dict[str, Image.Image]) -> None:
+        self._tk_calls_done()
+        self._show_images(images)
+
+    def _images_failed(self, error: Exception) -> None:
+        self._tk_calls_done()
+        # The window stays usable without its images; report like Tk would.
+        self.report_callback_exception(type(error), error, error.__traceback__)
+
+    def _show_images(self, images: Dict[str, Image.Image]) -> None:
+        for name, image in images.items():
+            _, size = WINDOW_IMAGES[name]
+            setattr(self, name, customtkinter.CTkImage(image, size=size))
+        self.logo_label.configure(image=self.logo)
+        self.panel_logo_label.configure(image=self.logo_welcome)
 
     def set_path_file(self) -> None:
         path, _ = open_many_file()
@@ -58,13 +105,11 @@ class Window(customtkinter.CTk):
                 self.link_entry.delete(0, tk.END)
             self.link_entry.insert(0, str(path))
 
-    def _create_image(self, path: str, size: Tuple[int, int]) -> customtkinter.CTkImage:
-        return customtkinter.CTkImage(Image.open(path), size=size)
-
     def _setup_window(self) -> None:
         self.title("MNLVM Video Downloader")
         self.geometry(DEFAULT_WINDOW_SIZE)
         self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self.quit)
         self.grid_rowconfigure(6, weight=2)
         self.columnconfigure(0, weight=0)
 
@@ -90,8 +135,10 @@ class Window(customtkinter.CTk):
         customtkinter.set_widget_scaling(new_scaling_float)
 
     def _update_date(self) -> None:
-        self.date_label.configure(text=datetime.today().strftime(DATE_FORMAT))
-        self.after(200, self._update_date)
+        now = datetime.today()
+        self.date_label.configure(text=now.strftime(DATE_FORMAT))
+        # The label shows seconds: redraw once per second, just after it turns.
+        self.after(1000 - now.microsecond // 1000, self._update_date)
 
     def _create_menu_bar(self) -> None:
         menu_bar = Menu(self)
@@ -119,12 +166,12 @@ class Window(customtkinter.CTk):
         self.logo_container.grid(row=1, column=0, columnspan=2, sticky="nsew")
 
         self.logo_label = customtkinter.CTkLabel(
-            self.logo_container, text="", height=145, image=self.logo, width=270
+            self.logo_container, text="", height=145, width=270
         )
         self.logo_label.grid(row=1, column=0)
 
         self.panel_logo_label = customtkinter.CTkLabel(
-            self.logo_container, text="", width=859, height=145, image=self.logo_welcome
+            self.logo_container, text="", width=859, height=145
         )
         self.panel_logo_label.grid(row=1, column=2)
 
@@ -183,7 +230,7 @@ class Window(customtkinter.CTk):
             border_width=2,
             text_color=("white", "#ffffff"),
             text="Télécharger",
-            command=self._start_download_thread,
+            command=self._start_download,
         )
         self.download_sons_button.grid(row=3, column=1, pady=5, sticky="nw")
 
@@ -203,6 +250,23 @@ class Window(customtkinter.CTk):
         )
         self.progress_label.grid(row=3, column=1, padx=150, pady=5, sticky="ne")
 
+        self.batch_controls_frame = customtkinter.CTkFrame(
+            self.download_frame, fg_color="transparent"
+        )
+        self.batch_controls_frame.grid(row=4, column=1, pady=5, sticky="nw")
+        for text, command in (
+            ("Tout suspendre", self.yt_controler.pause_batch),
+            ("Tout reprendre", self.yt_controler.resume_batch),
+            ("Tout annuler", self.yt_controler.cancel_batch),
+        ):
+            customtkinter.CTkButton(
+                self.batch_controls_frame,
+                corner_radius=15,
+                width=120,
+                text=text,
+                command=command,
+            ).pack(side="left", padx=(0, 10))
+
     def _create_dashboard_title(
         self, frame: customtkinter.CTkFrame, title: str
     ) -> None:
@@ -230,20 +294,104 @@ class Window(customtkinter.CTk):
             message="Ekila Downloader v0.1, copyright MNLV Africa \n Droits réservés",
         )
 
-    def _start_download_thread(self):
-        threading.Thread(target=self._download_async_wrapper).start()
-
-    def _download_async_wrapper(self):
-        self.yt_controler._progress_callback = self._update_progressbar
+    def _start_download(self):
+        # Callbacks fire on the download loop thread; Tk must only be touched
+        # from its own thread, so each one is rescheduled there.
+        self._expect_tk_calls()
+        self.yt_controler.set_progress_callback(
+            self._on_tk_thread(self._update_progressbar)
+        )
         self.yt_controler.set_individual_progress_callback(
-            self.update_individual_progress
+            self._on_tk_thread(self.update_individual_progress)
         )
-        asyncio.run(
+        future = asyncio.run_coroutine_threadsafe(
             self.yt_controler._download(
-                self.down_path.get(), self.scrollable_frame, self.song_widgets
-            )
+                self.down_path.get(), self._on_tk_thread(self._add_download_rows)
+            ),
+            self._loop,
         )
+        future.add_done_callback(self._on_tk_thread(self._download_finished))
+
+    def _on_tk_thread(self, callback: Callable[..., None]) -> Callable[..., None]:
+        # Tk may only be called from its own thread, after() included: other
+        # threads queue the call and _run_tk_calls picks it up.
+        def schedule(*args: Any) -> None:
+            self._tk_calls.put((callback, args))
+
+        return schedule
+
+    def _expect_tk_calls(self) -> None:
+        """Run queued calls until the matching ``_tk_calls_done``.
+
+        The queue is only polled while some background work may still hand
+        calls over, so an idle window has no timer running.
+        """
+        self._tk_pending += 1
+        if not self._tk_polling:
+            self._tk_polling = True
+            self.after(TK_POLL_INTERVAL_MS, self._run_tk_calls)
+
+    def _tk_calls_done(self) -> None:
+        self._tk_pending -= 1
+
+    def _run_tk_calls(self) -> None:
+        while True:
+            try:
+                callback, args = self._tk_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                self.report_callback_exception(*sys.exc_info())
+        if self._tk_pending:
+            self.after(TK_POLL_INTERVAL_MS, self._run_tk_calls)
+        else:
+            self._tk_polling = False
+
+    def _download_finished(self, future: "Future[None]") -> None:
+        self._tk_calls_done()
         self.link_entry.delete(0, tk.END)
+        try:
+            future.result()
+        except Exception as e:
+            messagebox.showerror("Téléchargement interrompu", str(e))
+
+    def _add_download_rows(self, job_ids: List[int], urls: List[str]) -> None:
+        for job_id, url in zip(job_ids, urls):
+            label = customtkinter.CTkLabel(self.scrollable_frame, text=url, anchor="w")
+            label.pack(fill="x", padx=10, pady=(5, 0))
+
+            progressbar = customtkinter.CTkProgressBar(self.scrollable_frame, height=10)
+            progressbar.set(0)
+            progressbar.pack(fill="x", padx=10, pady=(0, 5))
+
+            controls = customtkinter.CTkFrame(
+                self.scrollable_frame, fg_color="transparent"
+            )
+            for text, action in (
+                ("Pause", self.yt_controler.pause),
+                ("Reprendre", self.yt_controler.resume),
+                (
+                    "Prioriser",
+                    lambda j: self.yt_controler.reprioritize(j, INTERACTIVE_PRIORITY),
+                ),
+                ("Annuler", self.yt_controler.cancel),
+            ):
+                customtkinter.CTkButton(
+                    controls,
+                    text=text,
+                    width=70,
+                    height=20,
+                    command=lambda a=action, j=job_id: a(j),
+                ).pack(side="left", padx=(0, 5))
+            controls.pack(fill="x", padx=10, pady=(0, 5))
+
+            self.song_widgets[job_id] = {
+                "label": label,
+                "progressbar": progressbar,
+                "controls": controls,
+            }
 
     def _update_progressbar(self, value: float):
         percent = int(value * 100)
@@ -258,8 +406,8 @@ class Window(customtkinter.CTk):
             self.download_progressbar.set(0)
             self.progress_label.configure(text="0%")
 
-    def update_individual_progress(self, url: str, percent: float):
-        widgets = self.song_widgets.get(url)
+    def update_individual_progress(self, job_id: int, percent: float):
+        widgets = self.song_widgets.get(job_id)
         if widgets:
             widgets["progressbar"].set(percent)
 
@@ -271,4 +419,7 @@ class Window(customtkinter.CTk):
         if messagebox.askyesno(
             title="Exit", message="Etes vous sur de vouloir quitter?"
         ):
+            # Stop running downloads before the loop thread goes away.
+            self.yt_controler.shutdown()
+            self._loop.call_soon_threadsafe(self._loop.stop)
             self.destroy()
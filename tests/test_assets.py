@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from mnlvm_video_downloader.windows.assets import WINDOW_IMAGES, ImageCache
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.images_dir = Path(self.tmp.name) / "images"
+        self.images_dir.mkdir()
+        Image.new("RGBA", (400, 200), "blue").save(self.images_dir / "logo.png")
+        self.cache = ImageCache(Path(self.tmp.name) / "cache", self.images_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cached_files(self):
+        return sorted(path.name for path in self.cache.cache_dir.iterdir())
+
+    def test_scaled_copy_is_reused(self):
+        image = self.cache.load("logo.png", (100, 50))
+
+        self.assertEqual(image.size, (100, 50))
+        [name] = self.cached_files()
+        self.assertTrue(name.startswith("logo-100x50-"))
+        # A later start reads the cached copy instead of the source.
+        Image.new("RGBA", (100, 50), "red").save(self.cache.cache_dir / name)
+        again = self.cache.load("logo.png", (100, 50))
+        self.assertEqual(again.getpixel((0, 0)), (255, 0, 0, 255))
+
+    def test_sizes_are_cached_separately(self):
+        self.cache.load("logo.png", (100, 50))
+        self.cache.load("logo.png", (200, 100))
+
+        self.assertEqual(len(self.cached_files()), 2)
+
+    def test_changed_source_replaces_cached_copy(self):
+        self.cache.load("logo.png", (100, 50))
+        [old] = self.cached_files()
+        source = self.images_dir / "logo.png"
+        Image.new("RGBA", (400, 200), "green").save(source)
+        os.utime(source, ns=(0, source.stat().st_mtime_ns + 1))
+
+        image = self.cache.load("logo.png", (100, 50))
+
+        self.assertEqual(image.getpixel((0, 0)), (0, 128, 0, 255))
+        [new] = self.cached_files()
+        self.assertNotEqual(new, old)
+
+    def test_unreadable_cache_entry_is_rebuilt(self):
+        self.cache.load("logo.png", (100, 50))
+        [name] = self.cached_files()
+        (self.cache.cache_dir / name).write_bytes(b"not a png")
+
+        image = self.cache.load("logo.png", (100, 50))
+
+        self.assertEqual(image.getpixel((0, 0)), (0, 0, 255, 255))
+        with Image.open(self.cache.cache_dir / name) as cached:
+            self.assertEqual(cached.size, (100, 50))
+
+    def test_background_load_applies_scaling(self):
+        loaded = {}
+        done = threading.Event()
+
+        def callback(images):
+            loaded.update(images)
+            done.set()
+
+        self.cache.load_in_background(
+            {"logo": ("logo.png", (100, 50))}, callback, scaling=1.5
+        )
+
+        self.assertTrue(done.wait(timeout=5))
+        self.assertEqual(loaded["logo"].size, (150, 75))
+
+    def test_background_load_reports_errors(self):
+        errors = []
+        done = threading.Event()
+
+        def on_error(error):
+            errors.append(error)
+            done.set()
+
+        self.cache.load_in_background(
+            {"logo": ("missing.png", (100, 50))},
+            lambda images: done.set(),
+            on_error=on_error,
+        )
+
+        self.assertTrue(done.wait(timeout=5))
+        [error] = errors
+        self.assertIsInstance(error, FileNotFoundError)
+
+    def test_window_images_exist(self):
+        cache = ImageCache(Path(self.tmp.name) / "window")
+        images = cache.load_all(WINDOW_IMAGES)
+        self.assertEqual(
+            {name: image.size for name, image in images.items()},
+            {name: size for name, (_, size) in WINDOW_IMAGES.items()},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
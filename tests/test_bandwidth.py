@@ -0,0 +1,128 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from unittest.mock import MagicMock, patch
+
+from mnlvm_video_downloader.utils.bandwidth import BandwidthLimiter, throttle_hook
+from mnlvm_video_downloader.utils.constants import (
+    BANDWIDTH_ACTIVE_WINDOW,
+    BULK_PRIORITY,
+    INTERACTIVE_PRIORITY,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+def _init(shared_limiter):
+    global limiter
+    limiter = shared_limiter
+
+
+def _bulk_rate():
+    return limiter.class_rate(BULK_PRIORITY)
+
+
+class TestBandwidthLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("mnlvm_video_downloader.utils.bandwidth.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unlimited_never_sleeps(self):
+        limiter = BandwidthLimiter()
+        limiter.throttle(BULK_PRIORITY, 10**9)
+        self.assertEqual(self.clock.slept, 0.0)
+
+    def test_rate_is_enforced(self):
+        limiter = BandwidthLimiter(rate=1000)
+        for _ in range(50):
+            limiter.throttle(BULK_PRIORITY, 100)
+        self.assertAlmostEqual(self.clock.now - 1000.0, 5.0, delta=0.5)
+
+    def test_weighted_shares_between_active_classes(self):
+        limiter = BandwidthLimiter(rate=1000)
+        limiter.throttle(INTERACTIVE_PRIORITY, 0)
+        limiter.throttle(BULK_PRIORITY, 0)
+        self.assertAlmostEqual(limiter.class_rate(INTERACTIVE_PRIORITY), 800)
+        self.assertAlmostEqual(limiter.class_rate(BULK_PRIORITY), 200)
+
+        self.clock.now += BANDWIDTH_ACTIVE_WINDOW
+        limiter.throttle(BULK_PRIORITY, 0)
+        self.assertAlmostEqual(limiter.class_rate(BULK_PRIORITY), 1000)
+
+    def test_sub_byte_debt_counts_as_paid(self):
+        limiter = BandwidthLimiter(rate=3)
+        for _ in range(10):
+            limiter.throttle(BULK_PRIORITY, 1)
+        self.assertAlmostEqual(self.clock.now - 1000.0, 10 / 3, delta=1.0)
+
+    def test_set_rate_releases_waiting_download(self):
+        limiter = BandwidthLimiter(rate=10)
+
+        def lift_limit():
+            limiter.set_rate(None)
+
+        limiter.throttle(BULK_PRIORITY, 10**6, check=lift_limit)
+        self.assertLess(self.clock.slept, 1.0)
+
+    def test_intermediate_priorities_map_to_lower_class(self):
+        limiter = BandwidthLimiter(rate=1000)
+        limiter.throttle(BULK_PRIORITY, 0)
+        limiter.set_weight(5, 3.0)
+        self.assertAlmostEqual(limiter.class_rate(INTERACTIVE_PRIORITY), 750)
+
+    def test_check_can_abort_wait(self):
+        limiter = BandwidthLimiter(rate=10)
+        check = MagicMock(side_effect=RuntimeError("cancelled"))
+        with self.assertRaises(RuntimeError):
+            limiter.throttle(BULK_PRIORITY, 10**6, check=check)
+
+
+class TestThrottleHook(unittest.TestCase):
+    def test_charges_deltas_and_skips_resumed_prefix(self):
+        limiter = MagicMock()
+        hook = throttle_hook(limiter, lambda: BULK_PRIORITY)
+        for downloaded in (5000, 6000, 8000):
+            hook(
+                {
+                    "status": "downloading",
+                    "tmpfilename": "video.part",
+                    "downloaded_bytes": downloaded,
+                }
+            )
+        hook({"status": "finished", "downloaded_bytes": 9000})
+        charged = [call.args[1] for call in limiter.throttle.call_args_list]
+        self.assertEqual(charged, [1000, 2000])
+
+    def test_reads_priority_for_every_block(self):
+        limiter = MagicMock()
+        priority = [BULK_PRIORITY]
+        hook = throttle_hook(limiter, lambda: priority[0])
+        for downloaded in (0, 100, 200):
+            hook({"status": "downloading", "downloaded_bytes": downloaded})
+            priority[0] = INTERACTIVE_PRIORITY
+        classes = [call.args[0] for call in limiter.throttle.call_args_list]
+        self.assertEqual(classes, [INTERACTIVE_PRIORITY, INTERACTIVE_PRIORITY])
+
+
+class TestSharedBandwidthLimiter(unittest.TestCase):
+    def test_rate_changes_reach_workers(self):
+        limiter = BandwidthLimiter(rate=1000, shared=True)
+        with ProcessPoolExecutor(
+            1, mp_context=get_context(), initializer=_init, initargs=(limiter,)
+        ) as executor:
+            self.assertEqual(executor.submit(_bulk_rate).result(), 1000)
+            limiter.set_rate(2000)
+            self.assertEqual(executor.submit(_bulk_rate).result(), 2000)
@@ -0,0 +1,101 @@
+import pickle
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from mnlvm_video_downloader.controllers.results import extract_and_download
+from mnlvm_video_downloader.utils.cache import (
+    CacheStats,
+    MetadataCache,
+    video_id_from_url,
+)
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MetadataCache(Path(self.tmp.name))
+        self.test_url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        self.info = {
+            "id": "dQw4w9WgXcQ",
+            "title": "Test Video",
+            "duration": 212,
+            "formats": [
+                {
+                    "format_id": "18",
+                    "filesize": 1000,
+                    "url": f"https://example.invalid/v?expire={int(time.time()) + 600}",
+                }
+            ],
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_video_id_from_url(self):
+        self.assertEqual(video_id_from_url(self.test_url), "dQw4w9WgXcQ")
+        self.assertIsNone(
+            video_id_from_url("https://www.youtube.com/playlist?list=PLx0sYbCqOb8")
+        )
+
+    def test_put_and_get_from_disk(self):
+        self.cache.put(self.info, extraction_time=2.5)
+        fresh = MetadataCache(Path(self.tmp.name))
+        self.assertEqual(fresh.get("dQw4w9WgXcQ")["title"], "Test Video")
+        self.assertEqual(fresh.extraction_time("dQw4w9WgXcQ"), 2.5)
+
+    def test_expired_stream_urls_keep_metadata(self):
+        self.info["formats"][0]["url"] = "https://example.invalid/v?expire=1"
+        self.cache.put(self.info)
+        self.assertIsNone(self.cache.get("dQw4w9WgXcQ"))
+        metadata = self.cache.get_metadata("dQw4w9WgXcQ")
+        self.assertEqual(metadata["formats"], [{"format_id": "18", "filesize": 1000}])
+
+    def test_pickle_drops_memory_tier(self):
+        self.cache.put(self.info)
+        clone = pickle.loads(pickle.dumps(self.cache))
+        self.assertEqual(len(clone._memory), 0)
+        self.assertIsNotNone(clone.get("dQw4w9WgXcQ"))
+
+    def test_extract_and_download_hit_skips_extraction(self):
+        self.cache.put(self.info, extraction_time=3.0)
+        filepath = Path(self.tmp.name) / "Test Video.mp4"
+        filepath.write_bytes(b"data")
+        ydl = MagicMock()
+        ydl.process_ie_result.return_value = {**self.info, "filepath": str(filepath)}
+
+        stats = CacheStats()
+        info = extract_and_download(ydl, self.test_url, self.cache, stats)
+        self.assertEqual(info["title"], "Test Video")
+        ydl.extract_info.assert_not_called()
+        self.assertEqual((stats.hits, stats.misses, stats.seconds_saved), (1, 0, 3.0))
+
+    def test_extract_and_download_failed_hit_re_extracts(self):
+        self.cache.put(self.info)
+        ydl = MagicMock()
+        ydl.process_ie_result.return_value = {**self.info, "filepath": "missing.mp4"}
+        ydl.extract_info.return_value = self.info
+
+        stats = CacheStats()
+        extract_and_download(ydl, self.test_url, self.cache, stats)
+        ydl.extract_info.assert_called_once_with(self.test_url, download=False)
+        self.assertEqual((stats.hits, stats.misses), (0, 1))
+
+    def test_cached_hit_does_not_mutate_memory_tier(self):
+        self.cache.put(self.info)
+        filepath = Path(self.tmp.name) / "Test Video.mp4"
+        filepath.write_bytes(b"data")
+
+        def process_ie_result(info, download):
+            info["formats"][0]["url"] = "https://example.invalid/rewritten"
+            return {**info, "filepath": str(filepath)}
+
+        ydl = MagicMock()
+        ydl.process_ie_result.side_effect = process_ie_result
+        extract_and_download(ydl, self.test_url, self.cache, CacheStats())
+        self.assertEqual(
+            self.cache.get("dQw4w9WgXcQ")["formats"][0]["url"],
+            self.info["formats"][0]["url"],
+        )
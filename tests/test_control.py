@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from yt_dlp.utils import DownloadCancelled
+
+from mnlvm_video_downloader import exceptions
+from mnlvm_video_downloader.controllers import control
+from mnlvm_video_downloader.controllers.control import (
+    ControlCheckPP,
+    ControlCode,
+    ControlTable,
+    PrioritySlots,
+    control_check_hook,
+)
+
+
+def _read_code(slot):
+    try:
+        control_table.check_slot(slot, 3)
+    except DownloadCancelled:
+        return ControlCode.CANCEL
+    return ControlCode.RUN
+
+
+def _init(table):
+    global control_table
+    control_table = table
+
+
+class TestControlTable(unittest.TestCase):
+    def test_defaults_to_run(self):
+        self.assertEqual(ControlTable().get(10), ControlCode.RUN)
+
+    def test_check_raises_for_pause_and_cancel(self):
+        table = ControlTable()
+        table.set(0, ControlCode.PAUSE)
+        table.set(1, ControlCode.CANCEL)
+        with self.assertRaises(control.DownloadPaused):
+            table.check(0)
+        with self.assertRaises(DownloadCancelled):
+            table.check(1)
+        table.check(2)
+
+    def test_paused_is_a_cancellation_for_yt_dlp(self):
+        self.assertTrue(issubclass(exceptions.DownloadPaused, DownloadCancelled))
+
+    def test_shared_table_is_visible_to_workers(self):
+        table = ControlTable(shared=True, capacity=8)
+        with ProcessPoolExecutor(
+            1, mp_context=get_context(), initializer=_init, initargs=(table,)
+        ) as executor:
+            slot = table.attach(3)
+            self.assertEqual(
+                executor.submit(_read_code, slot).result(), ControlCode.RUN
+            )
+            table.set(3, ControlCode.CANCEL)
+            self.assertEqual(
+                executor.submit(_read_code, slot).result(), ControlCode.CANCEL
+            )
+
+    def test_shared_slots_are_recycled(self):
+        table = ControlTable(shared=True, capacity=2)
+        table.set_priority(5_000_000, 7)
+        table.set(5_000_000, ControlCode.PAUSE)
+        first = table.attach(5_000_000)
+        table.attach(1)
+        self.assertIsNone(table.attach(2))
+
+        # Job IDs past the slot count are still controlled.
+        self.assertEqual(table.slot_priority(first), 7)
+        with self.assertRaises(control.DownloadPaused):
+            table.check_slot(first, 5_000_000)
+        table.detach(5_000_000)
+        slot = table.attach(2)
+        self.assertEqual(slot, first)
+        table.set(2, ControlCode.CANCEL)
+        with self.assertRaises(DownloadCancelled):
+            table.check_slot(slot, 2)
+        self.assertEqual(table.get(5_000_000), ControlCode.PAUSE)
+
+
+class TestControlCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.table = ControlTable()
+        self.table.set(0, ControlCode.CANCEL)
+
+    def test_postprocessor_stops_job(self):
+        with self.assertRaises(DownloadCancelled):
+            ControlCheckPP(lambda: self.table.check(0)).run({})
+        self.assertEqual(ControlCheckPP(lambda: self.table.check(1)).run({}), ([], {}))
+
+    def test_postprocessor_hook_checks_when_a_step_starts(self):
+        hook = control_check_hook(lambda: self.table.check(0))
+        hook({"status": "finished"})
+        with self.assertRaises(DownloadCancelled):
+            hook({"status": "started"})
+
+
+class TestPrioritySlots(unittest.IsolatedAsyncioTestCase):
+    async def test_lower_priority_value_runs_first(self):
+        slots = PrioritySlots(1)
+        order = []
+
+        async def job(job_id, priority):
+            async with slots.slot(job_id, priority):
+                order.append(job_id)
+
+        async with slots.slot(None, 0):
+            tasks = [
+                asyncio.create_task(job(job_id, priority))
+                for job_id, priority in ((0, 10), (1, 10), (2, 0))
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, [2, 0, 1])
+
+    async def test_reprioritize_waiting_job(self):
+        slots = PrioritySlots(1)
+        order = []
+
+        async def job(job_id):
+            async with slots.slot(job_id, 10):
+                order.append(job_id)
+
+        async with slots.slot(None, 0):
+            tasks = [asyncio.create_task(job(job_id)) for job_id in range(3)]
+            await asyncio.sleep(0)
+            slots.reprioritize(2, 0)
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, [2, 0, 1])
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        slots = PrioritySlots(1)
+        async with slots.slot(None, 0):
+            waiter = asyncio.create_task(slots.acquire(0, 0))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+        await asyncio.wait_for(slots.acquire(1, 0), 1.0)
@@ -0,0 +1,190 @@
+import asyncio
+import http.client
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from mnlvm_video_downloader.controllers import client
+from mnlvm_video_downloader.controllers.client import DaemonClient, iter_events
+from mnlvm_video_downloader.controllers.daemon import DownloadDaemon, EventStream
+from mnlvm_video_downloader.controllers.jobs import JobStatus, JobStore
+
+
+class FakeController:
+    """Just the controller surface the daemon drives, without yt-dlp."""
+
+    def __init__(self):
+        self.jobs = JobStore()
+        self.logger = None
+        self.last_batch_id = None
+        self._batches = []
+        self.release = asyncio.Event()
+        self.pause = MagicMock()
+        self.cancel_batch = MagicMock()
+        self.shutdown = MagicMock()
+
+    def _submit_batch(self, urls, priority):
+        job_ids = [self.jobs.add(url, priority) for url in urls]
+        self._batches.append(job_ids)
+        self.last_batch_id = len(self._batches) - 1
+        return job_ids
+
+    def batch_jobs(self, batch_id=None):
+        return self._batches[batch_id]
+
+    async def _drive_batch(
+        self, job_ids, timeout=None, deadline=None, byte_budget=None
+    ):
+        self.plan = (deadline, byte_budget)
+        for job_id in job_ids:
+            self.jobs.set_status(job_id, JobStatus.RUNNING)
+            self.jobs.update_progress(job_id, 50, 100, 1.0)
+        await self.release.wait()
+        for job_id in job_ids:
+            self.jobs.set_status(job_id, JobStatus.COMPLETED)
+
+    def _read_csv_queries(self, csv_path):
+        return ["Artist - Title", "Unknown"]
+
+    async def resolve_many(self, queries):
+        return ["https://www.youtube.com/watch?v=dQw4w9WgXcQ", None]
+
+    def _handle_error(self, url, error):
+        pass
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.token_path = Path(self.tmp.name) / "daemon.token"
+        self.controller = FakeController()
+        self.daemon = DownloadDaemon(
+            self.controller, port=0, token_path=self.token_path
+        )
+        self.daemon.start()
+        self.addCleanup(self.daemon.stop)
+        host, port = self.daemon.address
+        self.client = DaemonClient.connect(host, port, self.token_path.read_text())
+        self.urls = [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://www.youtube.com/watch?v=9bZkp7q19f0",
+        ]
+
+    def test_connect_returns_none_without_daemon(self):
+        self.assertIsNone(DaemonClient.connect("127.0.0.1", 9))
+
+    def test_submit_rejects_invalid_urls(self):
+        batch = self.client.submit(self.urls + ["not_a_url"])
+        self.assertEqual(batch["job_ids"], [0, 1])
+        self.assertEqual(batch["rejected"], ["not_a_url"])
+        self.assertEqual(self.client.last_batch_id, batch["batch_id"])
+        self.assertEqual(
+            [job["url"] for job in self.client.jobs(batch["batch_id"])], self.urls
+        )
+
+    def test_wait_batch_streams_progress(self):
+        batch = self.client.submit(self.urls)
+        overall, individual = [], []
+        self.client.set_progress_callback(overall.append)
+        self.client.set_individual_progress_callback(
+            lambda job_id, fraction: individual.append((job_id, fraction))
+        )
+        loop = self.daemon._loop
+        loop.call_soon_threadsafe(loop.call_later, 1.0, self.controller.release.set)
+
+        records = self.client.wait_batch(batch["batch_id"])
+
+        self.assertEqual({record["status"] for record in records}, {"completed"})
+        self.assertEqual(overall[-1], 1.0)
+        self.assertEqual(overall.count(1.0), 1)
+        self.assertIn((0, 0.5), individual)
+        self.assertTrue(self.client.batch(batch["batch_id"])["done"])
+
+    def test_csv_submission_skips_unresolved_rows(self):
+        batch = self.client.submit_csv("tracks.csv")
+        self.assertEqual(batch["urls"], [self.urls[0]])
+
+    def test_controls_are_forwarded(self):
+        batch = self.client.submit(self.urls)
+        self.client.pause(1)
+        self.client.cancel_batch()
+        self.controller.pause.assert_called_once_with(1)
+        self.controller.cancel_batch.assert_called_once_with(batch["batch_id"])
+
+    def post(self, path, body=b"{}", **headers):
+        connection = http.client.HTTPConnection(*self.daemon.address, timeout=5)
+        self.addCleanup(connection.close)
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.daemon.token}",
+            **headers,
+        }
+        connection.request("POST", path, body, headers)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_token_file_is_private(self):
+        self.assertEqual(self.token_path.read_text(), self.daemon.token)
+        if os.name == "posix":
+            self.assertEqual(self.token_path.stat().st_mode & 0o777, 0o600)
+
+    def test_requests_without_token_are_rejected(self):
+        host, port = self.daemon.address
+        self.assertIsNone(DaemonClient.connect(host, port, token="guess"))
+        status, _ = self.post("/shutdown", Authorization="Bearer guess")
+        self.assertEqual(status, 401)
+        self.controller.shutdown.assert_not_called()
+
+    def test_cross_site_requests_are_rejected(self):
+        status, _ = self.post(
+            "/jobs",
+            json.dumps({"urls": self.urls}),
+            **{"Content-Type": "text/plain"},
+        )
+        self.assertEqual(status, 415)
+        status, _ = self.post("/shutdown", Host="attacker.example:8765")
+        self.assertEqual(status, 403)
+        port = self.daemon.address[1]
+        status, _ = self.post("/shutdown", Origin=f"http://attacker.example:{port}")
+        self.assertEqual(status, 403)
+        self.controller.shutdown.assert_not_called()
+        self.assertEqual(self.client.jobs(), [])
+
+    def test_unexpected_errors_are_reported_as_json(self):
+        self.client.submit(self.urls)
+        self.controller.pause.side_effect = RuntimeError("boom")
+        status, body = self.post("/jobs/0/pause")
+        self.assertEqual((status, body), (500, {"error": "boom"}))
+
+    def test_unknown_ids_are_not_found(self):
+        with self.assertRaises(client.DaemonRequestError) as raised:
+            self.client.pause(42)
+        self.assertEqual(raised.exception.status, 404)
+        with self.assertRaises(client.DaemonRequestError):
+            self.client.batch(3)
+
+
+class TestEvents(unittest.TestCase):
+    def test_iter_events_parses_events_and_keepalives(self):
+        stream = io.BytesIO(
+            b'event: job\ndata: {"job_id": 1}\n\n: keepalive\n\n'
+            b'event: batch\ndata: {"batch_id": 0}\n\n'
+        )
+        self.assertEqual(
+            list(iter_events(stream)),
+            [("job", {"job_id": 1}), (None, None), ("batch", {"batch_id": 0})],
+        )
+
+    def test_slow_subscriber_is_disconnected(self):
+        events = EventStream(backlog=2)
+        subscriber = events.subscribe()
+        for n in range(3):
+            events.publish("job", {"job_id": n})
+        self.assertFalse(events.has_subscribers)
+        self.assertIsNotNone(subscriber.get_nowait())
+        self.assertIsNone(subscriber.get_nowait())
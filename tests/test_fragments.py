@@ -0,0 +1,197 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mnlvm_video_downloader.controllers.executors import DownloadJob, execute_download
+from mnlvm_video_downloader.utils.fragments import (
+    FragmentBudget,
+    FragmentTuner,
+    expected_fragments,
+    wanted_connections,
+)
+
+SEGMENT = b"\x47" + b"\x00" * 187
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Serves an HLS and a DASH stream and records concurrent segment requests."""
+
+    daemon_threads = True
+
+    def __init__(self, segments: int) -> None:
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.segments = segments
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.served = 0
+
+    @property
+    def url(self) -> str:
+        return "http://%s:%d" % self.server_address
+
+    def playlist(self) -> str:
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:1"]
+        for index in range(self.segments):
+            lines += ["#EXTINF:1.0,", f"seg{index}.ts"]
+        return "\n".join(lines + ["#EXT-X-ENDLIST", ""])
+
+    def manifest(self) -> str:
+        segments = "".join(
+            f'<SegmentURL media="seg{index}.ts"/>' for index in range(self.segments)
+        )
+        return (
+            '<?xml version="1.0"?>'
+            '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" '
+            f'mediaPresentationDuration="PT{self.segments}S" minBufferTime="PT1S" '
+            'profiles="urn:mpeg:dash:profile:isoff-main:2011">'
+            '<Period><AdaptationSet mimeType="video/mp4">'
+            '<Representation id="v" codecs="avc1.4d401e" bandwidth="1000" '
+            'width="320" height="180">'
+            f'<SegmentList duration="1" timescale="1">{segments}</SegmentList>'
+            "</Representation></AdaptationSet></Period></MPD>"
+        )
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if self.path.endswith(".m3u8"):
+            return self._send(server.playlist().encode(), "application/x-mpegURL")
+        if self.path.endswith(".mpd"):
+            return self._send(server.manifest().encode(), "application/dash+xml")
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        time.sleep(0.05)
+        # Counted out before the reply: once the client has it, the same
+        # worker may ask for its next segment while this thread unwinds.
+        with server.lock:
+            server.active -= 1
+            server.served += 1
+        self._send(SEGMENT, "video/mp2t")
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestFragmentBudget(unittest.TestCase):
+    def test_budget_is_shared_out_by_need(self):
+        budget = FragmentBudget(connections=10)
+        long_video = budget.join(0, fragments=500)
+        self.assertEqual(budget.allowed(long_video), 8)
+
+        short_video = budget.join(1, fragments=5)
+        progressive = budget.join(2)
+        self.assertEqual(budget.allowed(short_video), 1)
+        self.assertEqual(budget.allowed(progressive), 1)
+        self.assertEqual(budget.allowed(long_video), 8)
+
+        second_long = budget.join(3, fragments=500)
+        self.assertEqual(budget.allowed(long_video), 4)
+        self.assertEqual(budget.allowed(second_long), 4)
+
+        budget.leave(second_long)
+        self.assertEqual(budget.allowed(long_video), 8)
+
+    def test_every_job_keeps_one_connection(self):
+        budget = FragmentBudget(connections=2, slots=3)
+        slots = [budget.join(job_id, fragments=100) for job_id in range(3)]
+        self.assertEqual([budget.allowed(slot) for slot in slots], [1, 1, 1])
+        self.assertIsNone(budget.join(3))
+        self.assertEqual(budget.allowed(None), 1)
+
+    def test_shared_budget(self):
+        budget = FragmentBudget(connections=4, shared=True, slots=4)
+        slot = budget.join(0, fragments=100)
+        self.assertEqual(budget.allowed(slot), 4)
+        budget.set_connections(2)
+        self.assertEqual(budget.allowed(slot), 2)
+
+    def test_wanted_connections(self):
+        self.assertEqual(wanted_connections(0), 1)
+        self.assertEqual(wanted_connections(25), 3)
+        self.assertEqual(wanted_connections(10_000), 8)
+
+
+class TestExpectedFragments(unittest.TestCase):
+    def test_counts_come_from_the_formats(self):
+        dash = {"protocol": "http_dash_segments", "fragments": [{}] * 120}
+        hls = {"protocol": "m3u8_native", "url": "http://127.0.0.1:9/x.m3u8"}
+        progressive = {"protocol": "https", "url": "http://127.0.0.1:9/x.mp4"}
+
+        self.assertEqual(expected_fragments(dash), 120)
+        self.assertEqual(expected_fragments({**hls, "duration": 200}), 40)
+        self.assertEqual(expected_fragments(hls), 1)
+        self.assertEqual(expected_fragments(progressive), 1)
+        merged = {"requested_formats": [dash, progressive], "duration": 600}
+        self.assertEqual(expected_fragments(merged), 120)
+
+
+class TestFragmentTuner(unittest.TestCase):
+    def test_progress_rewrites_concurrency_live(self):
+        budget = FragmentBudget(connections=8)
+        tuner = FragmentTuner(budget, job_id=0)
+        tuner({"status": "downloading", "fragment_count": 200})
+        self.assertEqual(tuner.params["concurrent_fragment_downloads"], 8)
+
+        other = FragmentTuner(budget, job_id=1)
+        other.plan(200)
+        tuner({"status": "downloading", "fragment_index": 3})
+        self.assertEqual(tuner.params["concurrent_fragment_downloads"], 4)
+
+        other.close()
+        tuner({"status": "downloading", "fragment_index": 4})
+        self.assertEqual(tuner.params["concurrent_fragment_downloads"], 8)
+        tuner.close()
+        self.assertEqual(budget.allowed(0), 1)
+
+
+class TestFixtureServer(unittest.TestCase):
+    """Real yt-dlp downloads from a local server, to see connections on the wire."""
+
+    def setUp(self):
+        self.server = FixtureServer(segments=40)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def download(self, path, budget):
+        options = {
+            "quiet": True,
+            "noprogress": True,
+            "fixup": "never",
+            "outtmpl": "%(id)s.%(ext)s",
+            "paths": {"home": self.tmp.name},
+        }
+        job = DownloadJob(0, self.server.url + path, options, fragments=budget)
+        return execute_download(job, [])
+
+    def test_hls_download_of_unknown_length_uses_one_connection(self):
+        outcome = self.download("/video.m3u8", FragmentBudget(connections=16))
+        self.assertEqual(self.server.served, 40)
+        # Only the download itself reads the media playlist; with no duration
+        # to estimate the fragment count from, the format gets one connection.
+        self.assertEqual(self.server.peak, 1)
+        self.assertEqual(os.path.getsize(outcome.result["filepath"]), 40 * len(SEGMENT))
+
+    def test_dash_download_respects_budget(self):
+        budget = FragmentBudget(connections=5)
+        other = budget.join(1, fragments=100)
+        self.download("/video.mpd", budget)
+        self.assertEqual(self.server.served, 40)
+        # An even share of the budget, while the other job wants more.
+        self.assertEqual(self.server.peak, 2)
+        self.assertEqual(budget.allowed(other), 5)
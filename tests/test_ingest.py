@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from mnlvm_video_downloader.utils.ingest import (
+    CsvTracks,
+    Track,
+    map_columns,
+    normalize_queries,
+    parse_duration,
+    sniff_encoding,
+)
+
+
+class TestCsvTracks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data, encoding="utf-8"):
+        path = os.path.join(self.tmp.name, "tracks.csv")
+        with open(path, "wb") as file:
+            file.write(data.encode(encoding) if isinstance(data, str) else data)
+        return path
+
+    def test_columns_are_found_by_name(self):
+        path = self.write(
+            "ISRC,Track Name,Album Name,Artist Name(s),Duration (ms)\n"
+            'USUM71703861,"Shape of You","÷ (Deluxe)","Ed Sheeran",233712\n'
+        )
+        track = Track(
+            "Ed Sheeran", "Shape of You", "÷ (Deluxe)", 233.712, "USUM71703861"
+        )
+        self.assertEqual(list(CsvTracks(path)), [track])
+
+    def test_quoted_delimiters_and_legacy_header(self):
+        path = self.write(
+            "Date;Listen num;Count\n"
+            '2024-01-01;"Daft Punk - One More Time (Official Video)";3\n'
+            '2024-01-02;"Artist; Band: Song - Club Remix";1\n'
+        )
+        reader = CsvTracks(path)
+        self.assertEqual(reader.dialect.delimiter, ";")
+        self.assertEqual(
+            list(reader.queries()), ["Daft Punk - One More Time", "Artist; Band: Song"]
+        )
+
+    def test_encoding_is_detected(self):
+        data = "artist,title\nBeyoncé,Halo\n"
+        for encoding in ("utf-8-sig", "utf-16", "cp1252"):
+            with self.subTest(encoding=encoding):
+                path = self.write(data, encoding)
+                self.assertEqual(list(CsvTracks(path).queries()), ["Beyoncé - Halo"])
+
+    def test_headerless_file_reads_first_column(self):
+        path = self.write("Artist - Song\n\nOther - Track (Live)\n")
+        self.assertEqual(
+            list(CsvTracks(path).queries()), ["Artist - Song", "Other - Track"]
+        )
+
+    def test_queries_are_streamed_in_batches(self):
+        path = self.write("title\n" + "".join(f"Song {n}\n" for n in range(10)))
+        queries = CsvTracks(path, batch_size=3).queries()
+        self.assertEqual(next(queries), "Song 0")
+        self.assertEqual(list(queries)[-1], "Song 9")
+
+    def test_missing_file_fails_on_open(self):
+        with self.assertRaises(FileNotFoundError):
+            CsvTracks(os.path.join(self.tmp.name, "missing.csv"))
+
+
+class TestHelpers(unittest.TestCase):
+    def test_normalize_queries_keeps_rows_apart(self):
+        self.assertEqual(
+            normalize_queries(["A (feat. B", "C) - D", "  E   -  F (Live)  ", ""]),
+            ["A (feat. B", "C) - D", "E - F", ""],
+        )
+
+    def test_map_columns_keeps_first_match(self):
+        self.assertEqual(
+            map_columns(["Artist", "Title", "artist", "Length"]),
+            {"artist": 0, "title": 1, "duration": 3},
+        )
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("3:45"), 225)
+        self.assertEqual(parse_duration("1:02:03"), 3723)
+        self.assertEqual(parse_duration("225000", milliseconds=True), 225)
+        self.assertIsNone(parse_duration("n/a"))
+
+    def test_sniff_encoding_tolerates_cut_character(self):
+        self.assertEqual(sniff_encoding("é".encode()[:1] + b"x"), "cp1252")
+        self.assertEqual(sniff_encoding(b"abc" + "é".encode()[:1]), "utf-8")
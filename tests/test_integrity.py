@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from mnlvm_video_downloader.utils import integrity
+from mnlvm_video_downloader.utils.integrity import (
+    ContentHashPP,
+    ContentIndex,
+    StreamHasher,
+    probe_media,
+)
+
+
+class TestStreamHasher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.final = os.path.join(self.tmp.name, "video.mp4")
+        self.part = self.final + ".part"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _download(self, hasher, blocks):
+        written = 0
+        with open(self.part, "wb") as file:
+            for block in blocks:
+                file.write(block)
+                file.flush()
+                written += len(block)
+                hasher(
+                    {
+                        "status": "downloading",
+                        "tmpfilename": self.part,
+                        "downloaded_bytes": written,
+                    }
+                )
+        os.replace(self.part, self.final)
+        hasher({"status": "finished", "filename": self.final})
+
+    @patch.object(integrity, "CONTENT_HASH_CHUNK_SIZE", 4)
+    def test_digest_is_streamed_without_rereading(self):
+        hasher = StreamHasher()
+        blocks = [b"abc", b"defgh", b"ij", b"klmnop"]
+        self._download(hasher, blocks)
+        expected = hashlib.sha256(b"".join(blocks)).hexdigest()
+        with patch.object(integrity, "hash_file") as hash_file:
+            self.assertEqual(hasher.digest(self.final), expected)
+        hash_file.assert_not_called()
+
+    def test_rewritten_file_is_not_hashed_again(self):
+        hasher = StreamHasher()
+        self._download(hasher, [b"original"])
+        with open(self.final, "wb") as file:
+            file.write(b"rewritten by a fixup")
+        with patch.object(integrity, "_feed") as feed:
+            info = ContentHashPP(hasher).run({"filepath": self.final})[1]
+        feed.assert_not_called()
+        self.assertNotIn("content_hash", info)
+
+    def test_merged_download_is_not_read_again(self):
+        hasher = StreamHasher()
+        info = {"requested_formats": [{"format_id": "137"}, {"format_id": "140"}]}
+        with open(self.final, "wb") as file:
+            file.write(b"merged by ffmpeg")
+        with patch.object(integrity, "_feed") as feed:
+            for part in (self.final + ".f137.mp4", self.final + ".f140.m4a"):
+                hasher(
+                    {
+                        "status": "downloading",
+                        "tmpfilename": part + ".part",
+                        "downloaded_bytes": 1024,
+                        "info_dict": info,
+                    }
+                )
+                hasher({"status": "finished", "filename": part, "info_dict": info})
+            info = ContentHashPP(hasher).run({"filepath": self.final})[1]
+
+        feed.assert_not_called()
+        self.assertNotIn("content_hash", info)
+
+
+class TestContentIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.index = ContentIndex(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, data):
+        path = self.root / name
+        path.write_bytes(data)
+        return path
+
+    def test_duplicate_becomes_hardlink(self):
+        first = self._write("a.mp4", b"same bytes")
+        second = self._write("b.mp4", b"same bytes")
+        digest = integrity.hash_file(str(first))
+
+        self.assertEqual(self.index.add(str(first), digest), 0)
+        self.assertEqual(self.index.add(str(second), digest), len(b"same bytes"))
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(second.read_bytes(), b"same bytes")
+
+    def test_index_survives_restart_and_ignores_missing_files(self):
+        first = self._write("a.mp4", b"content")
+        digest = integrity.hash_file(str(first))
+        self.index.add(str(first), digest)
+
+        duplicate = self._write("b.mp4", b"content")
+        self.assertEqual(ContentIndex(self.root).add(str(duplicate), digest), 7)
+        self.assertTrue(os.path.samefile(first, duplicate))
+        first.unlink()
+        duplicate.unlink()
+        replacement = self._write("c.mp4", b"content")
+        self.assertEqual(ContentIndex(self.root).add(str(replacement), digest), 0)
+
+    def test_scan_reports_reclaimed_space(self):
+        self._write("a.mp4", b"x" * 100)
+        (self.root / "sub").mkdir()
+        self._write("sub/b.mp4", b"x" * 100)
+        self._write("c.mp4", b"y" * 50)
+        self.assertEqual(self.index.scan(), 100)
+
+
+class TestProbeMedia(unittest.TestCase):
+    def probed(self, streams=1, duration="12.5", returncode=0, stderr=""):
+        output = {
+            "streams": [{"index": index} for index in range(streams)],
+            "format": {"duration": duration},
+        }
+        return MagicMock(
+            returncode=returncode, stdout=json.dumps(output), stderr=stderr
+        )
+
+    @patch("mnlvm_video_downloader.utils.integrity.subprocess.run")
+    def test_rejects_errors_and_missing_duration(self, mock_run):
+        mock_run.return_value = self.probed()
+        self.assertIsNone(probe_media("video.mp4", "ffprobe"))
+
+        mock_run.return_value = MagicMock(
+            returncode=1, stdout="", stderr="moov atom not found"
+        )
+        self.assertEqual(probe_media("video.mp4", "ffprobe"), "moov atom not found")
+
+        mock_run.return_value = self.probed(duration="N/A")
+        self.assertEqual(probe_media("video.mp4", "ffprobe"), "no duration")
+
+        mock_run.return_value = self.probed(streams=0)
+        self.assertEqual(probe_media("video.mp4", "ffprobe"), "no streams")
+
+    @patch("mnlvm_video_downloader.utils.integrity.subprocess.run")
+    def test_warnings_on_a_playable_file_are_only_logged(self, mock_run):
+        mock_run.return_value = self.probed(
+            stderr="[mov,mp4] Non-monotonic DTS in output stream"
+        )
+        logger = MagicMock()
+
+        self.assertIsNone(probe_media("video.mp4", "ffprobe", logger))
+        logger.warning.assert_called_once()
@@ -0,0 +1,60 @@
+import tracemalloc
+import unittest
+
+from mnlvm_video_downloader.controllers.jobs import JobStatus, JobStore
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.store = JobStore()
+        self.test_url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+    def test_add_and_lookup(self):
+        job_id = self.store.add(self.test_url)
+        self.assertEqual(job_id, 0)
+        self.assertEqual(self.store.job_id(self.test_url), job_id)
+        self.assertEqual(self.store.url(job_id), self.test_url)
+        self.assertEqual(self.store.status(job_id), JobStatus.QUEUED)
+
+    def test_status_counts(self):
+        first = self.store.add(self.test_url)
+        second = self.store.add(self.test_url + "2")
+        self.store.set_status(first, JobStatus.RUNNING)
+        self.store.set_status(first, JobStatus.COMPLETED)
+        self.store.set_status(second, JobStatus.FAILED)
+        self.assertEqual(self.store.count(JobStatus.QUEUED), 0)
+        self.assertEqual(self.store.finished_count(), 2)
+
+    def test_snapshot_is_isolated_copy(self):
+        job_id = self.store.add(self.test_url)
+        self.store.set_status(job_id, JobStatus.RUNNING)
+        self.store.update_progress(job_id, 50, 200, 10.0)
+        snapshot = self.store.snapshot()
+
+        self.store.update_progress(job_id, 200, 200, 0.0)
+        self.store.set_output_path(job_id, "downloads/video.mp4")
+        self.store.set_status(job_id, JobStatus.COMPLETED)
+
+        record = snapshot[job_id]
+        self.assertEqual(record.status, JobStatus.RUNNING)
+        self.assertEqual(record.fraction, 0.25)
+        self.assertIsNone(record.output_path)
+        self.assertEqual(snapshot.total_speed, 10.0)
+        self.assertEqual(
+            self.store.snapshot()[job_id].output_path, "downloads/video.mp4"
+        )
+
+    def test_priority_accepts_values_beyond_a_byte(self):
+        job_id = self.store.add(self.test_url, priority=1000)
+        self.store.set_priority(job_id, -1000)
+        self.assertEqual(self.store.priority(job_id), -1000)
+
+    def test_memory_per_job(self):
+        urls = [f"https://www.youtube.com/watch?v={i:011d}" for i in range(100_000)]
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        for url in urls:
+            self.store.add(url)
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess((after - before) / len(urls), 300)
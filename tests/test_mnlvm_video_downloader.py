@@ -1,12 +1,65 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadCancelled
 from mnlvm_video_downloader.controllers.video import YouTubeDownloaderController
+from mnlvm_video_downloader.controllers.executors import (
+    DownloadJob,
+    DownloadOutcome,
+    compact_info,
+    execute_download,
+    run_download,
+)
+from mnlvm_video_downloader.controllers.control import ControlCode, ControlTable
+from mnlvm_video_downloader.controllers.jobs import JobStatus
+from mnlvm_video_downloader.controllers.results import (
+    DownloadResult,
+    iter_download_results,
+)
+from mnlvm_video_downloader.utils.integrity import ContentIndex
+from mnlvm_video_downloader.utils.constants import (
+    BULK_PRIORITY,
+    INTERACTIVE_PRIORITY,
+)
+
+
+class FakeYoutubeDL:
+    """Stands in for yt-dlp in worker processes, which inherit it via fork."""
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_post_processor(self, pp, when="post_process"):
+        pass
+
+    def extract_info(self, url, download=True, process=True, ie_key=None):
+        if "fail" in url:
+            raise Exception("extraction failed")
+        return {"id": url[-11:], "title": f"Video {url[-11:]}"}
+
+    def process_ie_result(self, info, download=True):
+        for hook in self.params.get("progress_hooks", ()):
+            hook({"status": "downloading", "_percent_str": "50%"})
+        return info
 
 
 class TestYouTubeDownloaderController(unittest.TestCase):
     def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_dir = self.tmp.name
         self.test_url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
         self.test_playlist_url = (
             "https://www.youtube.com/playlist?list=PLx0sYbCqOb8TBPRdmBHs5Iftvv9TPboYG"
@@ -30,7 +83,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
     @patch("concurrent.futures.ThreadPoolExecutor")
     @patch("pathlib.Path.mkdir")
     def test_init_default_values(self, mock_mkdir, mock_executor):
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         self.assertEqual(controller.output_dir, Path("downloads"))
         self.assertEqual(controller.max_workers, 4)
         self.assertIsNone(controller.logger)
@@ -41,7 +94,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
 
     @patch("subprocess.run")
     def test_validate_ffmpeg_path_system(self, mock_run):
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = controller._validate_ffmpeg_path(None)
         self.assertEqual(result, "ffmpeg")
         mock_run.assert_called_once_with(
@@ -52,7 +105,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
     def test_validate_ffmpeg_path_custom(self, mock_exists):
         mock_exists.return_value = True
         test_path = "/custom/path/ffmpeg"
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = controller._validate_ffmpeg_path(test_path)
         self.assertEqual(result, test_path)
         mock_exists.assert_called_once()
@@ -60,21 +113,21 @@ class TestYouTubeDownloaderController(unittest.TestCase):
     @patch("pathlib.Path.exists")
     def test_validate_ffmpeg_path_invalid(self, mock_exists):
         mock_exists.return_value = False
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = controller._validate_ffmpeg_path("/invalid/path")
         self.assertIsNone(result)
 
     @patch("validators.url")
     async def test_add_to_queue_valid_url(self, mock_validators):
         mock_validators.return_value = True
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         await controller.add_to_queue([self.test_url])
         self.assertEqual(controller.download_queue.qsize(), 1)
 
     @patch("validators.url")
     async def test_add_to_queue_invalid_url(self, mock_validators):
         mock_validators.return_value = False
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         await controller.add_to_queue([self.invalid_url])
         self.assertEqual(controller.download_queue.qsize(), 0)
 
@@ -87,7 +140,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
             "ext": "mp4",
         }
 
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = await controller.download(self.test_url)
         self.assertIsNotNone(result)
         self.assertEqual(result.name, "Test Video.mp4")
@@ -95,7 +148,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
     @patch("yt_dlp.YoutubeDL")
     @patch("asyncio.get_event_loop")
     async def test_download_non_youtube(self, mock_loop, mock_ydl):
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = await controller.download(self.non_youtube_url)
         self.assertIsNone(result)
         mock_ydl.assert_not_called()
@@ -107,7 +160,9 @@ class TestYouTubeDownloaderController(unittest.TestCase):
         mock_ydl_instance = mock_ydl.return_value
         mock_ydl_instance.extract_info.side_effect = Exception("Test error")
 
-        controller = YouTubeDownloaderController(logger=self.mock_logger)
+        controller = YouTubeDownloaderController(
+            logger=self.mock_logger, data_dir=self.data_dir
+        )
         result = await controller.download(self.test_url)
         self.assertIsNone(result)
         self.mock_logger.error.assert_called_once()
@@ -115,7 +170,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
     def test_handle_download_result_single_video(self):
         test_info = {"title": "Single Video", "ext": "mp4", "entries": None}
 
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = controller._handle_download_result(test_info)
         self.assertEqual(result.name, "Single Video.mp4")
 
@@ -129,24 +184,26 @@ class TestYouTubeDownloaderController(unittest.TestCase):
             ],
         }
 
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = controller._handle_download_result(test_info)
         self.assertEqual(result.name, "Video 1.mp4")
 
     def test_handle_download_result_none(self):
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         result = controller._handle_download_result(None)
         self.assertIsNone(result)
 
     @patch("subprocess.run")
     def test_extract_cookies_success(self, mock_run):
         mock_run.return_value.stdout = "/path/to/cookies.txt\n"
-        controller = YouTubeDownloaderController(browser="chrome")
+        controller = YouTubeDownloaderController(
+            browser="chrome", data_dir=self.data_dir
+        )
         result = controller._extract_cookies("chrome")
         self.assertEqual(result, "/path/to/cookies.txt")
 
     def test_get_ydl_options_default(self):
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         options = controller._get_ydl_options()
         self.assertIsInstance(options, dict)
         self.assertEqual(
@@ -158,7 +215,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
         self.assertNotIn("ffmpeg_location", options)
 
     def test_get_ydl_options_with_cookies_and_ffmpeg(self):
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         controller.cookies_file = "/path/to/cookies.txt"
         controller.ffmpeg_path = "/path/to/ffmpeg"
         options = controller._get_ydl_options()
@@ -169,7 +226,7 @@ class TestYouTubeDownloaderController(unittest.TestCase):
     async def test_process_queue(self, mock_download):
         mock_download.return_value = Path("test.mp4")
 
-        controller = YouTubeDownloaderController()
+        controller = YouTubeDownloaderController(data_dir=self.data_dir)
         await controller.download_queue.put(self.test_url)
         await controller.download_queue.put(self.test_url)
 
@@ -182,10 +239,591 @@ class TestYouTubeDownloaderController(unittest.TestCase):
     async def test_process_queue_with_error(self, mock_download):
         mock_download.side_effect = Exception("Test error")
 
-        controller = YouTubeDownloaderController(logger=self.mock_logger)
+        controller = YouTubeDownloaderController(
+            logger=self.mock_logger, data_dir=self.data_dir
+        )
         await controller.download_queue.put(self.test_url)
 
         await controller.process_queue()
 
         self.mock_logger.error.assert_called_once()
         self.assertFalse(controller.is_processing)
+
+    def test_init_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            YouTubeDownloaderController(
+                browser=None, backend="fiber", data_dir=self.data_dir
+            )
+
+    def test_compact_info_playlist(self):
+        info = {
+            "title": "Test Playlist",
+            "formats": [{"format_id": "18"}],
+            "entries": [{"title": "Video 1", "formats": []}, None],
+        }
+        self.assertEqual(
+            compact_info(info),
+            {"title": "Test Playlist", "entries": [{"title": "Video 1"}, None]},
+        )
+
+    def test_compact_info_keeps_final_filepath(self):
+        info = {
+            "title": "Video 1",
+            "filepath": "downloads/Video 1.f137.mp4",
+            "requested_downloads": [{"filepath": "downloads/Video_1.mp4"}],
+        }
+        self.assertEqual(
+            compact_info(info),
+            {"title": "Video 1", "filepath": "downloads/Video_1.mp4"},
+        )
+
+    @patch("mnlvm_video_downloader.controllers.executors.YoutubeDL")
+    def test_run_download_reports_error(self, mock_ydl):
+        mock_ydl.return_value.__enter__.return_value.extract_info.side_effect = (
+            Exception("Test error")
+        )
+        job_id, outcome, error = run_download(DownloadJob(0, self.test_url, {}))
+        self.assertEqual(job_id, 0)
+        self.assertIsNone(outcome)
+        self.assertEqual(error, "Test error")
+
+    @patch("mnlvm_video_downloader.controllers.executors.YoutubeDL")
+    def test_run_download_returns_compact_info(self, mock_ydl):
+        mock_ydl.return_value.__enter__.return_value.extract_info.return_value = {
+            "title": "Test Video",
+            "formats": [{"format_id": "18"}],
+        }
+        _, outcome, error = run_download(DownloadJob(0, self.test_url, {}))
+        self.assertEqual(outcome.result, {"title": "Test Video"})
+        self.assertIsNone(error)
+
+    def test_execute_download_checks_control_before_downloading(self):
+        info = {
+            "id": "dQw4w9WgXcQ",
+            "title": "Test Video",
+            "url": "https://example.invalid/video.mp4",
+            "ext": "mp4",
+            "extractor": "fake",
+            "extractor_key": "Fake",
+            "webpage_url": self.test_url,
+        }
+
+        def extract_info(ydl, url, download=True, **kwargs):
+            return ydl.process_ie_result(dict(info), download=download)
+
+        controls = ControlTable()
+        controls.set(0, ControlCode.PAUSE)
+        job = DownloadJob(0, self.test_url, {"quiet": True}, control=controls)
+        with patch.object(YoutubeDL, "extract_info", extract_info):
+            with self.assertRaises(DownloadCancelled):
+                execute_download(job, [])
+
+    def test_iter_download_results_playlist_is_lazy(self):
+        processed = []
+
+        def entries():
+            for index in range(3):
+                yield {"_type": "url", "url": f"video-{index}", "ie_key": "Youtube"}
+
+        def extract_info(url, download=False, process=True, ie_key=None):
+            if url == self.test_playlist_url:
+                return {"_type": "playlist", "entries": entries()}
+            return {"id": url, "title": url.upper(), "duration": 10}
+
+        def process_ie_result(info, download=True):
+            processed.append(info["id"])
+            return {**info, "filepath": f"downloads/{info['id']}.mp4"}
+
+        ydl = MagicMock()
+        ydl.extract_info.side_effect = extract_info
+        ydl.process_ie_result.side_effect = process_ie_result
+
+        results = iter_download_results(ydl, self.test_playlist_url)
+        first = next(results)
+        self.assertEqual(processed, ["video-0"])
+        self.assertEqual(
+            first,
+            DownloadResult("video-0", "VIDEO-0", "downloads/video-0.mp4", None, 10),
+        )
+        self.assertEqual(len(list(results)), 2)
+
+    def test_iter_download_results_skips_failed_entry(self):
+        def process_ie_result(info, download=True):
+            if info["id"] == "bad":
+                raise OSError("disk full")
+            return {**info, "filepath": f"downloads/{info['id']}.mp4"}
+
+        ydl = MagicMock()
+        ydl.params = {"ignoreerrors": True}
+        ydl.extract_info.return_value = {
+            "_type": "playlist",
+            "entries": [{"id": video_id} for video_id in ("a", "bad", "b")],
+        }
+        ydl.process_ie_result.side_effect = process_ie_result
+
+        results = list(iter_download_results(ydl, self.test_playlist_url))
+        self.assertEqual([result.video_id for result in results], ["a", "b"])
+        ydl.report_error.assert_called_once()
+
+        ydl.params = {"ignoreerrors": False}
+        with self.assertRaises(OSError):
+            list(iter_download_results(ydl, self.test_playlist_url))
+
+    def test_handle_download_results_uses_filepath(self):
+        controller = YouTubeDownloaderController(
+            browser=None, low_memory=True, data_dir=self.data_dir
+        )
+        result = controller._handle_download_results(
+            [DownloadResult("id", "Video", "downloads/Video.webm", 10, 1.0)]
+        )
+        self.assertEqual(result, Path("downloads/Video.webm"))
+
+
+class TestAsyncControllerApi(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.test_url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_dir = self.tmp.name
+        self.controller = YouTubeDownloaderController(
+            browser=None,
+            max_workers=2,
+            staging=False,
+            metadata_cache=False,
+            data_dir=self.data_dir,
+        )
+
+    def tearDown(self):
+        self.controller.shutdown()
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_download_many_keeps_order_and_bounds_concurrency(self, mock_execute):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def execute(job, hooks):
+            with lock:
+                running.append(job.job_id)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(job.job_id)
+            return DownloadOutcome({"title": job.url[-1]})
+
+        mock_execute.side_effect = execute
+        urls = [f"{self.test_url}&n={n}" for n in range(5)]
+        paths = await self.controller.download_many(urls)
+
+        self.assertEqual([path.name for path in paths], [f"{n}.mp4" for n in range(5)])
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(self.controller.jobs.count(JobStatus.COMPLETED), 5)
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_download_timeout_cancels_running_job(self, mock_execute):
+        stopped = threading.Event()
+
+        def execute(job, hooks):
+            try:
+                for _ in range(200):
+                    hooks[0]({"status": "downloading", "_percent_str": "1%"})
+                    time.sleep(0.01)
+            finally:
+                stopped.set()
+            return DownloadOutcome({"title": "late"})
+
+        mock_execute.side_effect = execute
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.controller.download(self.test_url, timeout=0.05)
+
+        self.assertTrue(await asyncio.to_thread(stopped.wait, 1.0))
+        job_id = self.controller.jobs.job_id(self.test_url)
+        self.assertEqual(self.controller.jobs.status(job_id), JobStatus.CANCELLED)
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_retry_after_timeout_waits_for_the_old_download(self, mock_execute):
+        writing = []
+        peak = []
+        stopped = threading.Event()
+
+        def execute(job, hooks):
+            writing.append(job.job_id)
+            peak.append(len(writing))
+            try:
+                if len(peak) == 1:
+                    # A stage that cannot be interrupted, like a merge.
+                    time.sleep(0.2)
+                hooks[0]({"status": "downloading", "_percent_str": "1%"})
+                return DownloadOutcome({"title": "retried"})
+            finally:
+                writing.remove(job.job_id)
+                if len(peak) == 1:
+                    stopped.set()
+
+        mock_execute.side_effect = execute
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.controller.download(self.test_url, timeout=0.05)
+        first = self.controller.jobs.job_id(self.test_url)
+
+        # The timed out download is still running: the retry must not start.
+        self.assertIsNone(await self.controller.download(self.test_url))
+        self.assertIsNotNone(self.controller.volumes.placement(first))
+
+        self.assertTrue(await asyncio.to_thread(stopped.wait, 1.0))
+        for _ in range(100):
+            if self.controller.volumes.placement(first) is None:
+                break
+            await asyncio.sleep(0.01)
+        path = await self.controller.download(self.test_url)
+
+        self.assertEqual(path.name, "retried.mp4")
+        self.assertEqual(max(peak), 1)
+        self.assertEqual(self.controller.jobs.status(first), JobStatus.CANCELLED)
+
+    @patch.object(YouTubeDownloaderController, "process_track")
+    async def test_resolve_many(self, mock_process_track):
+        mock_process_track.side_effect = lambda query: f"url-{query}"
+        self.assertEqual(
+            await self.controller.resolve_many(["a", "b"]), ["url-a", "url-b"]
+        )
+
+    @patch.object(YouTubeDownloaderController, "process_track")
+    async def test_resolve_batches_reads_queries_lazily(self, mock_process_track):
+        mock_process_track.side_effect = lambda query: f"url-{query}"
+        read = []
+
+        def queries():
+            for n in range(5):
+                read.append(n)
+                yield str(n)
+
+        batches = self.controller.resolve_batches(queries(), batch_size=2)
+        self.assertEqual(await batches.__anext__(), ["url-0", "url-1"])
+        self.assertEqual(read, [0, 1])
+        self.assertEqual(
+            [batch async for batch in batches], [["url-2", "url-3"], ["url-4"]]
+        )
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_pause_frees_slot_and_resume_reruns_job(self, mock_execute):
+        runs = []
+        started = threading.Event()
+
+        def execute(job, hooks):
+            runs.append(job.job_id)
+            if len(runs) == 1:
+                started.set()
+                for _ in range(200):
+                    hooks[0]({"status": "downloading", "_percent_str": "1%"})
+                    time.sleep(0.01)
+            return DownloadOutcome({"title": "done"})
+
+        mock_execute.side_effect = execute
+        task = asyncio.create_task(self.controller.download(self.test_url))
+        await asyncio.to_thread(started.wait, 1.0)
+        job_id = self.controller.jobs.job_id(self.test_url)
+
+        self.controller.pause(job_id)
+        for _ in range(100):
+            if self.controller.jobs.status(job_id) == JobStatus.PAUSED:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.controller.jobs.status(job_id), JobStatus.PAUSED)
+        self.assertFalse(task.done())
+
+        self.controller.resume(job_id)
+        path = await asyncio.wait_for(task, 2.0)
+        self.assertEqual(path.name, "done.mp4")
+        self.assertEqual(runs, [job_id, job_id])
+
+    async def test_cancel_paused_batch_job(self):
+        task = asyncio.create_task(
+            self.controller.download_many([self.test_url, "https://example.com"])
+        )
+        await asyncio.sleep(0)
+        self.controller.pause_batch()
+        await asyncio.sleep(0.05)
+        self.controller.cancel_batch()
+
+        self.assertEqual(await asyncio.wait_for(task, 1.0), [None, None])
+        statuses = [
+            self.controller.jobs.status(job_id)
+            for job_id in self.controller.batch_jobs()
+        ]
+        self.assertEqual(statuses, [JobStatus.CANCELLED, JobStatus.CANCELLED])
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_individual_progress_is_keyed_by_job_id(self, mock_execute):
+        def execute(job, hooks):
+            hooks[0]({"status": "downloading", "_percent_str": "50%"})
+            return DownloadOutcome({"title": f"video-{job.job_id}"})
+
+        mock_execute.side_effect = execute
+        updates = []
+        self.controller.set_individual_progress_callback(
+            lambda job_id, fraction: updates.append((job_id, fraction))
+        )
+        await self.controller.download_many(
+            [self.test_url, "https://www.youtube.com/watch?v=aaaaaaaaaaa"]
+        )
+        self.assertEqual(
+            sorted(updates), [(job_id, 0.5) for job_id in self.controller.batch_jobs()]
+        )
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_batch_progress_ignores_other_jobs(self, mock_execute):
+        mock_execute.side_effect = lambda job, hooks: (
+            time.sleep(0.02 if "single" in job.url else 0.1)
+            or DownloadOutcome({"title": job.url[-6:]})
+        )
+        progress = []
+        self.controller.set_progress_callback(progress.append)
+        urls = [f"{self.test_url}&n={n}" for n in range(2)]
+        await asyncio.gather(
+            self.controller.download_many(urls),
+            self.controller.download(f"{self.test_url}&single"),
+        )
+        self.assertEqual(progress, [0.0, 0.5, 1.0])
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_duplicate_in_flight_url_is_skipped(self, mock_execute):
+        mock_execute.side_effect = lambda job, hooks: (
+            time.sleep(0.05) or DownloadOutcome({"title": "once"})
+        )
+        paths = await self.controller.download_many([self.test_url, self.test_url])
+
+        self.assertEqual(paths[0].name, "once.mp4")
+        self.assertIsNone(paths[1])
+        statuses = [
+            self.controller.jobs.status(job_id)
+            for job_id in self.controller.batch_jobs()
+        ]
+        self.assertEqual(statuses, [JobStatus.COMPLETED, JobStatus.SKIPPED])
+        self.assertEqual(mock_execute.call_count, 1)
+
+        # The claim is released once the first job is done.
+        self.assertEqual(
+            (await self.controller.download(self.test_url)).name, "once.mp4"
+        )
+
+    async def test_finished_job_records_final_filepath(self):
+        final = self.controller.output_dir / "Never_Gonna_Give_You_Up.webm"
+
+        class MergingYoutubeDL(FakeYoutubeDL):
+            def extract_info(self, url, download=True, process=True, ie_key=None):
+                info = super().extract_info(url, download, process, ie_key)
+                return {**info, "requested_downloads": [{"filepath": str(final)}]}
+
+        with patch("controllers.executors.YoutubeDL", MergingYoutubeDL):
+            path = await self.controller.download(self.test_url)
+
+        self.assertEqual(path, final)
+        job_id = self.controller.jobs.job_id(self.test_url)
+        self.assertEqual(
+            self.controller.jobs.snapshot()[job_id].output_path, str(final)
+        )
+
+    @patch("mnlvm_video_downloader.controllers.video.probe_media")
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_outputs_are_checked_and_deduplicated(self, mock_execute, mock_probe):
+        with tempfile.TemporaryDirectory() as library:
+            library = Path(library)
+            self.controller.content_index = ContentIndex(library)
+            self.controller.ffprobe_path = "ffprobe"
+            mock_probe.side_effect = lambda path, ffprobe, logger: (
+                "moov atom not found" if "broken" in path else None
+            )
+
+            def execute(job, hooks):
+                name = job.url[-6:]
+                path = library / f"{name}.mp4"
+                path.write_bytes(b"same video")
+                return DownloadOutcome(
+                    {"title": name, "filepath": str(path), "content_hash": "h"}
+                )
+
+            mock_execute.side_effect = execute
+            urls = [f"{self.test_url}&{name}" for name in ("first", "second", "broken")]
+            paths = await self.controller.download_many(urls)
+
+            self.assertIsNone(paths[2])
+            self.assertTrue(os.path.samefile(paths[0], paths[1]))
+            self.assertTrue((library / "broken.mp4.corrupt").exists())
+            snapshot = self.controller.jobs.snapshot()
+            self.assertEqual(snapshot.bytes_reclaimed, len(b"same video"))
+            self.assertEqual(
+                [snapshot[job_id].status for job_id in self.controller.batch_jobs()],
+                [JobStatus.COMPLETED, JobStatus.COMPLETED, JobStatus.FAILED],
+            )
+
+    @patch.object(YouTubeDownloaderController, "_probe_sizes")
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_byte_budget_caps_batch_quality(self, mock_execute, mock_probe):
+        mock_probe.return_value = {1080: 400.0, 720: 200.0, 480: 100.0}
+        formats = []
+
+        def execute(job, hooks):
+            formats.append(job.options["format"])
+            return DownloadOutcome({"title": job.url[-1]})
+
+        mock_execute.side_effect = execute
+        urls = [f"{self.test_url}&n={n}" for n in range(3)]
+        await self.controller.download_many(urls, byte_budget=700)
+
+        self.assertEqual(mock_probe.call_count, 3)
+        self.assertTrue(all("height<=720" in fmt for fmt in formats))
+        self.assertEqual(self.controller._plans, {})
+
+    @patch.object(YouTubeDownloaderController, "_probe_sizes", return_value={})
+    async def test_plan_starts_from_the_batch_bandwidth_share(self, mock_probe):
+        self.controller.set_bandwidth_limit(1000)
+        # An interactive download is running, so bulk jobs get a fifth.
+        self.controller.limiter.throttle(INTERACTIVE_PRIORITY, 0)
+        job_ids = self.controller._submit_batch([self.test_url], BULK_PRIORITY)
+
+        plan = await self.controller._plan_batch(job_ids, 3600, None)
+
+        self.assertAlmostEqual(plan.throughput, 200)
+
+    def test_job_is_placed_on_a_root_it_fits(self):
+        GiB = 1024**3
+        with (
+            tempfile.TemporaryDirectory() as small,
+            tempfile.TemporaryDirectory() as large,
+        ):
+            controller = YouTubeDownloaderController(
+                browser=None,
+                staging=False,
+                verify_outputs=False,
+                output_dirs={small: 4.0, large: 1.0},
+                data_dir=self.data_dir,
+            )
+            self.addCleanup(controller.shutdown)
+            free = {Path(small): 2.3 * GiB, Path(large): 8 * GiB}
+            volume_type = type(controller.volumes.primary)
+            video_id = self.test_url[-11:]
+            controller.metadata_cache.put(
+                {
+                    "id": video_id,
+                    "title": "Video",
+                    "duration": 60,
+                    "formats": [
+                        {
+                            "format_id": "137",
+                            "ext": "mp4",
+                            "vcodec": "avc1",
+                            "acodec": "none",
+                            "height": 1080,
+                            "filesize": GiB,
+                        },
+                        {
+                            "format_id": "140",
+                            "ext": "m4a",
+                            "vcodec": "none",
+                            "acodec": "mp4a",
+                            "filesize": GiB // 10,
+                        },
+                    ],
+                }
+            )
+            with patch.object(
+                volume_type,
+                "free_space",
+                autospec=True,
+                side_effect=lambda volume: int(free[volume.root]),
+            ):
+                # Unknown size: the heavier, emptier-per-weight root wins.
+                unknown = controller.jobs.add(
+                    "https://www.youtube.com/watch?v=aaaaaaaaaaa", 0
+                )
+                job = controller._make_job(unknown, controller.jobs.url(unknown))
+                self.assertEqual(job.options["paths"]["home"], small)
+                controller.volumes.release(unknown)
+
+                # 1.1 GiB of streams, kept until merged, do not fit the small one.
+                known = controller.jobs.add(self.test_url, 0)
+                job = controller._make_job(known, self.test_url)
+                self.assertEqual(job.options["paths"]["home"], large)
+
+    @patch("mnlvm_video_downloader.controllers.video.execute_download")
+    async def test_jobs_are_striped_over_output_roots(self, mock_execute):
+        with (
+            tempfile.TemporaryDirectory() as first,
+            tempfile.TemporaryDirectory() as second,
+        ):
+            controller = YouTubeDownloaderController(
+                browser=None,
+                max_workers=4,
+                metadata_cache=False,
+                verify_outputs=False,
+                output_dirs={first: 1.0, second: 1.0},
+                data_dir=self.data_dir,
+            )
+            self.addCleanup(controller.shutdown)
+            barrier = threading.Barrier(4)
+
+            def execute(job, hooks):
+                home = Path(job.options["paths"]["home"])
+                self.assertEqual(job.staging.output_dir, home)
+                # Keep every job writing while the others are placed.
+                barrier.wait(timeout=5)
+                name = job.url[-1]
+                (home / f"{name}.mp4").write_bytes(b"video")
+                return DownloadOutcome({"title": name})
+
+            mock_execute.side_effect = execute
+            urls = [f"{self.test_url}&n={n}" for n in range(4)]
+            paths = await controller.download_many(urls)
+
+            self.assertEqual(
+                sorted(str(path.parent) for path in paths),
+                sorted([first, first, second, second]),
+            )
+            self.assertTrue(all(path.exists() for path in paths))
+            self.assertEqual(controller._library_path("3"), paths[3])
+            self.assertEqual([volume.writers for volume in controller.volumes], [0, 0])
+
+
+class TestBackendParity(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_dir = self.tmp.name
+
+    def run_backend(self, backend):
+        controller = YouTubeDownloaderController(
+            browser=None,
+            backend=backend,
+            max_workers=2,
+            staging=False,
+            metadata_cache=False,
+            data_dir=self.data_dir,
+        )
+        urls = [
+            "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+            "https://www.youtube.com/watch?v=failfailfai",
+            "https://example.com/video",
+            "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+        ]
+        try:
+            with patch("controllers.executors.YoutubeDL", FakeYoutubeDL):
+                paths = asyncio.run(controller.download_many(urls))
+            statuses = [
+                controller.jobs.status(job_id) for job_id in controller.batch_jobs()
+            ]
+        finally:
+            controller.shutdown()
+        return paths, statuses
+
+    def test_process_backend_matches_thread_backend(self):
+        thread_result = self.run_backend("thread")
+        self.assertEqual(
+            thread_result[1],
+            [
+                JobStatus.COMPLETED,
+                JobStatus.FAILED,
+                JobStatus.SKIPPED,
+                JobStatus.COMPLETED,
+            ],
+        )
+        self.assertEqual(self.run_backend("process"), thread_result)
@@ -0,0 +1,117 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from mnlvm_video_downloader.controllers.planner import (
+    BatchPlan,
+    DEFAULT_FORMAT,
+    estimate_sizes,
+    format_selector,
+)
+
+
+def video(height, filesize=None, tbr=None, ext="mp4"):
+    return {
+        "height": height,
+        "ext": ext,
+        "vcodec": "avc1",
+        "acodec": "none",
+        "filesize": filesize,
+        "tbr": tbr,
+    }
+
+
+AUDIO = {"ext": "m4a", "vcodec": "none", "acodec": "mp4a", "filesize": 100}
+
+
+class TestFormatSelection(unittest.TestCase):
+    def test_selector_caps_every_alternative(self):
+        self.assertEqual(format_selector(), DEFAULT_FORMAT)
+        selector = format_selector(720)
+        self.assertEqual(selector.count("height<=720"), 3)
+        self.assertNotIn("2160", selector)
+
+    def test_sizes_follow_the_selector(self):
+        formats = [
+            video(1080, filesize=3000),
+            video(1080, filesize=5000, ext="webm"),
+            video(720, tbr=0.08),
+            AUDIO,
+        ]
+        sizes = estimate_sizes(formats, duration=100, ladder=(2160, 1080, 720, 480))
+        self.assertEqual(sizes[2160], 3100)
+        self.assertEqual(sizes[1080], 3100)
+        # 80 bit/s for 100 seconds, plus the audio stream.
+        self.assertEqual(sizes[720], 1100)
+        self.assertNotIn(480, sizes)
+
+    def test_muxed_fallback(self):
+        muxed = {"height": 360, "ext": "mp4", "vcodec": "avc1", "acodec": "mp4a"}
+        muxed["filesize_approx"] = 700
+        sizes = estimate_sizes([muxed], None, ladder=(720, 360))
+        self.assertEqual(sizes, {720: 700, 360: 700})
+
+
+class TestBatchPlan(unittest.TestCase):
+    LADDER = (1080, 720, 480)
+    SIZES = {1080: 400.0, 720: 200.0, 480: 100.0}
+
+    def plan(self, jobs=3, **kwargs):
+        plan = BatchPlan(range(jobs), ladder=self.LADDER, **kwargs)
+        for job_id in range(jobs):
+            plan.set_sizes(job_id, self.SIZES)
+        return plan
+
+    def test_deadline_picks_highest_fitting_quality(self):
+        plan = self.plan(deadline=100, throughput=7)
+        now = plan.deadline_at - 100
+        self.assertEqual(plan.choose(0, now=now), 720)
+        self.assertEqual(plan.choose(0, now=now + 50), 720)
+
+    def test_replans_as_throughput_changes(self):
+        plan = self.plan(deadline=100, throughput=7)
+        now = plan.deadline_at - 100
+        plan.choose(0, now=now)
+        plan.finish(0)
+        for _ in range(20):
+            plan.observe(100)
+        self.assertEqual(plan.choose(1, now=now + 10), 1080)
+        plan.finish(1)
+        for _ in range(20):
+            plan.observe(0.5)
+        self.assertEqual(plan.choose(2, now=now + 20), 480)
+
+    def test_running_jobs_reserve_their_remaining_bytes(self):
+        for done, expected in ((0, 720), (200, 1080)):
+            plan = self.plan(jobs=2, deadline=100, throughput=5)
+            now = plan.deadline_at - 100
+            self.assertEqual(plan.choose(0, now=now), 720)
+            self.assertEqual(plan.choose(1, {0: done}, now=now), expected)
+
+    def test_byte_budget_counts_started_jobs(self):
+        plan = self.plan(byte_budget=700)
+        self.assertEqual([plan.choose(job_id) for job_id in range(3)], [720, 720, 720])
+
+    def test_unknown_jobs_count_as_average(self):
+        plan = BatchPlan(range(2), byte_budget=500, ladder=self.LADDER)
+        plan.set_sizes(0, self.SIZES)
+        self.assertEqual(plan.choose(1), 720)
+
+    def test_concurrent_jobs_do_not_share_a_budget_figure(self):
+        jobs = 200
+        plan = self.plan(jobs=jobs, byte_budget=jobs * self.SIZES[720])
+        barrier = threading.Barrier(8)
+
+        def start(job_id):
+            if job_id < 8:
+                barrier.wait(timeout=5)
+            choice = plan.choose(job_id)
+            plan.finish(job_id)
+            return choice
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            choices = list(pool.map(start, range(jobs)))
+
+        self.assertEqual(set(choices), {720})
+        self.assertEqual(plan.committed, jobs * self.SIZES[720])
+        self.assertEqual(plan.running, [])
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from yt_dlp.utils import PostProcessingError
+from mnlvm_video_downloader.utils import staging
+from mnlvm_video_downloader.utils.staging import AtomicPublishPP, StagingArea
+
+
+class TestStagingArea(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.tmp.name) / "downloads"
+        self.output_dir.mkdir()
+        self.staging = StagingArea(self.output_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_root_falls_back_to_output_dir(self):
+        self.assertEqual(self.staging.root, self.output_dir / ".staging")
+
+    def test_root_uses_temp_dir_on_same_filesystem(self):
+        temp_dir = Path(self.tmp.name) / "temp"
+        temp_dir.mkdir()
+        area = StagingArea(self.output_dir, temp_dir)
+        self.assertEqual(area.root, temp_dir / ".staging")
+
+    def test_job_dir_is_stable_per_url(self):
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        self.assertEqual(self.staging.job_dir(url), self.staging.job_dir(url))
+
+    def test_publish_replaces_destination(self):
+        staged = self.staging.job_dir("url") / "video.mp4"
+        staged.write_bytes(b"new")
+        destination = self.output_dir / "video.mp4"
+        destination.write_bytes(b"old")
+
+        self.staging.publish(staged, destination)
+        self.assertEqual(destination.read_bytes(), b"new")
+        self.assertFalse(staged.exists())
+
+    def test_sweep_removes_only_stale_job_dirs(self):
+        stale = self.staging.job_dir("stale")
+        fresh = self.staging.job_dir("fresh")
+        old = time.time() - self.staging.max_age - 60
+        os.utime(stale, (old, old))
+
+        self.assertEqual(self.staging.sweep(), 1)
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+
+    @patch("shutil.disk_usage")
+    def test_check_free_space(self, mock_disk_usage):
+        mock_disk_usage.return_value.free = 1024
+        with self.assertRaises(staging.InsufficientDiskSpaceError) as context:
+            self.staging.check_free_space(10 * 1024 * 1024)
+        # yt-dlp reports postprocessor failures of this type per entry.
+        self.assertIsInstance(context.exception, PostProcessingError)
+
+    def test_atomic_publish_pp(self):
+        staged = self.staging.job_dir("url") / "video.mp4"
+        staged.write_bytes(b"data")
+        pp = AtomicPublishPP(self.staging)
+        _, info = pp.run(
+            {"filepath": str(staged), "__finaldir": str(self.output_dir.resolve())}
+        )
+        self.assertEqual(
+            Path(info["filepath"]), self.output_dir.resolve() / "video.mp4"
+        )
+        self.assertTrue((self.output_dir / "video.mp4").exists())
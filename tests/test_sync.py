@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from mnlvm_video_downloader.controllers.jobs import JobStatus, JobStore
+from mnlvm_video_downloader.controllers.sync import PlaylistSync
+
+
+class TestPlaylistSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.jobs = JobStore()
+        self.controller = MagicMock()
+        self.controller.jobs = self.jobs
+        self.controller.run_batch.side_effect = self._run_batch
+        self.failing = set()
+        self.sync = PlaylistSync(self.controller, Path(self.tmp.name) / "playlists")
+        self.playlist_url = "https://www.youtube.com/playlist?list=PLtest"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run_batch(self, urls):
+        job_ids = []
+        for url in urls:
+            job_id = self.jobs.add(url)
+            if url in self.failing:
+                self.jobs.set_status(job_id, JobStatus.FAILED)
+            else:
+                path = Path(self.tmp.name) / f"{url[-1]}.mp4"
+                path.write_bytes(b"data")
+                self.jobs.set_output_path(job_id, str(path))
+                self.jobs.set_status(job_id, JobStatus.COMPLETED)
+            job_ids.append(job_id)
+        return job_ids
+
+    def _entries(self, *ids):
+        return "PLtest", [
+            (entry_id, f"https://youtu.be/{entry_id}") for entry_id in ids
+        ]
+
+    def test_only_new_entries_are_downloaded(self):
+        with patch.object(
+            self.sync, "fetch_entries", return_value=self._entries("a", "b")
+        ):
+            first = self.sync.sync(self.playlist_url)
+        self.assertEqual(first.added, ["a", "b"])
+
+        with patch.object(
+            self.sync, "fetch_entries", return_value=self._entries("a", "b", "c")
+        ):
+            second = self.sync.sync(self.playlist_url)
+        self.assertEqual(second.added, ["c"])
+        self.controller.run_batch.assert_called_with(["https://youtu.be/c"])
+
+        with patch.object(
+            self.sync, "fetch_entries", return_value=self._entries("a", "b", "c")
+        ):
+            third = self.sync.sync(self.playlist_url)
+        self.assertTrue(third.unchanged)
+        self.assertEqual(self.controller.run_batch.call_count, 2)
+
+    def test_failed_entries_are_retried(self):
+        self.failing.add("https://youtu.be/b")
+        with patch.object(
+            self.sync, "fetch_entries", return_value=self._entries("a", "b")
+        ):
+            first = self.sync.sync(self.playlist_url)
+        self.assertEqual(first.failed, ["b"])
+
+        self.failing.clear()
+        with patch.object(
+            self.sync, "fetch_entries", return_value=self._entries("a", "b")
+        ):
+            second = self.sync.sync(self.playlist_url)
+        self.assertEqual(second.added, ["b"])
+
+    def test_prune_removes_files_of_removed_entries(self):
+        with patch.object(
+            self.sync, "fetch_entries", return_value=self._entries("a", "b")
+        ):
+            self.sync.sync(self.playlist_url)
+        with patch.object(self.sync, "fetch_entries", return_value=self._entries("b")):
+            result = self.sync.sync(self.playlist_url, prune=True)
+        self.assertEqual(result.removed, ["a"])
+        self.assertEqual(result.pruned, ["a"])
+        self.assertFalse((Path(self.tmp.name) / "a.mp4").exists())
+        self.assertTrue((Path(self.tmp.name) / "b.mp4").exists())
+
+    def test_prune_keeps_files_shared_with_other_playlists(self):
+        with patch.object(
+            self.sync, "fetch_entries", return_value=self._entries("a", "b")
+        ):
+            self.sync.sync(self.playlist_url)
+        other_entries = ("PLother", [("a", "https://youtu.be/a")])
+        with patch.object(self.sync, "fetch_entries", return_value=other_entries):
+            self.sync.sync("https://www.youtube.com/playlist?list=PLother")
+
+        with patch.object(self.sync, "fetch_entries", return_value=self._entries("b")):
+            result = self.sync.sync(self.playlist_url, prune=True)
+        self.assertEqual(result.pruned, ["a"])
+        self.assertTrue((Path(self.tmp.name) / "a.mp4").exists())
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from collections import namedtuple
+from pathlib import Path
+from unittest.mock import patch
+
+from mnlvm_video_downloader.utils import volumes
+from mnlvm_video_downloader.utils.integrity import ContentIndex, hash_file
+from mnlvm_video_downloader.utils.volumes import VolumeSet
+
+Usage = namedtuple("Usage", "total used free")
+GIB = 1024**3
+
+
+class TestVolumeSet(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.roots = [Path(self.tmp.name) / name for name in ("fast", "big", "full")]
+        self.free = dict(zip(self.roots, (100 * GIB, 400 * GIB, 0)))
+        patcher = patch.object(
+            volumes.shutil,
+            "disk_usage",
+            side_effect=lambda root: Usage(0, 0, self.free[Path(root)]),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_jobs_spread_by_weight_free_space_and_load(self):
+        fast, big, full = self.roots
+        volume_set = VolumeSet({fast: 5.0, big: 1.0, full: 9.0})
+        placed = [volume_set.place(job_id).root for job_id in range(4)]
+        self.assertEqual(placed, [fast, big, fast, big])
+        self.assertEqual(volume_set.place(1).root, big)
+
+        volume_set.release(0)
+        volume_set.release(2)
+        self.assertEqual(volume_set.place(4).root, fast)
+
+    def test_preferred_volume_and_no_room(self):
+        volume_set = VolumeSet({self.roots[0]: 1.0, self.roots[2]: 1.0})
+        full = volume_set.volumes[1]
+        self.assertIs(volume_set.place(0, prefer=full), full)
+        self.assertEqual(full.writers, 1)
+        self.assertEqual(volume_set.place(1, size=200 * GIB).root, self.roots[0])
+
+    def test_locate_searches_every_volume(self):
+        volume_set = VolumeSet({self.roots[0]: 1.0, self.roots[1]: 1.0})
+        (self.roots[1] / "video.mp4").write_bytes(b"x")
+        self.assertEqual(volume_set.locate("video.mp4"), self.roots[1] / "video.mp4")
+        self.assertIsNone(volume_set.locate("missing.mp4"))
+
+    def test_invalid_roots(self):
+        with self.assertRaises(ValueError):
+            VolumeSet({})
+        with self.assertRaises(ValueError):
+            VolumeSet({self.roots[0]: 0})
+
+
+class TestLibraryIndex(unittest.TestCase):
+    def test_index_spans_volumes(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            first, second = Path(a), Path(b)
+            original = first / "a.mp4"
+            original.write_bytes(b"same")
+            elsewhere = second / "sub" / "b.mp4"
+            elsewhere.parent.mkdir()
+            elsewhere.write_bytes(b"other")
+
+            index = ContentIndex(first, extra_roots=[second])
+            index.add(str(original), hash_file(str(original)))
+            index.add(str(elsewhere), hash_file(str(elsewhere)))
+
+            reopened = ContentIndex(first, extra_roots=[second])
+            duplicate = first / "b.mp4"
+            duplicate.write_bytes(b"other")
+            reopened.add(str(duplicate), hash_file(str(duplicate)))
+            self.assertTrue(os.path.samefile(duplicate, elsewhere))
+            (second / "copy.mp4").write_bytes(b"same")
+            reopened.scan()
+            self.assertTrue(os.path.samefile(second / "copy.mp4", original))